@@ -1,30 +1,135 @@
-import requests
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
 
-# Simple client that posts an image file to the AI service and returns JSON response.
+# Client that posts images to the AI service and returns its JSON response.
 # The AI service is expected to expose an endpoint like /process-image that accepts
 # a multipart/form-data 'image' file and returns JSON { texto: ..., detecciones: [...] }
+#
+# One AIClient keeps a pooled requests.Session per endpoint, so consecutive calls
+# reuse the TCP/TLS connection instead of handshaking every time. Images can be
+# bytes, a file-like object or a path. Recognition has no side effects on the
+# service, so failed calls (connection errors, timeouts, 429 and 5xx) are retried
+# with jittered exponential backoff, honouring Retry-After. Other 4xx are not retried.
 
 TIMEOUT = int(os.environ.get("AI_CLIENT_TIMEOUT", "30"))
+RETRIES = int(os.environ.get("AI_CLIENT_RETRIES", "3"))
+BACKOFF = float(os.environ.get("AI_CLIENT_BACKOFF", "0.25"))  # seconds
+MAX_BACKOFF = float(os.environ.get("AI_CLIENT_MAX_BACKOFF", "8"))
+MAX_WORKERS = int(os.environ.get("AI_CLIENT_MAX_WORKERS", "8"))
 
+RETRY_STATUS = {429} | set(range(500, 600))
 
-def send_image_to_ai_service(ai_service_url: str, image_path: str) -> dict:
-    """Send image at image_path to ai_service_url and return parsed JSON.
 
-    ai_service_url can be either the full URL to the endpoint (e.g. https://.../process-image)
-    or a base URL; if it's a base URL we will append '/api/braille-image'.
-    """
+def _endpoint(ai_service_url):
+    """Full endpoint URL; a base URL gets '/api/braille-image' appended."""
     if not ai_service_url:
         raise ValueError("AI service URL not configured")
-
-    # Normalize URL: if path doesn't look like an endpoint, append expected route
     if not ai_service_url.rstrip("/").endswith("/api/braille-image"):
-        endpoint = ai_service_url.rstrip("/") + "/api/braille-image"
-    else:
-        endpoint = ai_service_url
-
-    with open(image_path, "rb") as f:
-        files = {"image": (os.path.basename(image_path), f, "image/jpeg")}
-        resp = requests.post(endpoint, files=files, timeout=TIMEOUT)
-        resp.raise_for_status()
-        return resp.json()
+        return ai_service_url.rstrip("/") + "/api/braille-image"
+    return ai_service_url
+
+
+def _read_image(image):
+    """(filename, bytes) from bytes, a file-like object or a path."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return "image.jpg", bytes(image)
+    if hasattr(image, "read"):
+        # Read once so every retry sends the same body
+        name = os.path.basename(getattr(image, "name", "") or "image.jpg")
+        return name, image.read()
+    with open(image, "rb") as f:
+        return os.path.basename(image), f.read()
+
+
+class AIClient:
+    """Pooled, retrying client for one AI service endpoint."""
+
+    def __init__(self, ai_service_url, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+                 max_workers=MAX_WORKERS):
+        self.endpoint = _endpoint(ai_service_url)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_workers = max(1, max_workers)
+        self.session = requests.Session()
+        # One pooled connection per concurrent send_many worker
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _delay(self, attempt, resp=None):
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+        # Full jitter: spreads out clients that failed at the same moment
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** attempt))
+
+    def send_image(self, image) -> dict:
+        """Send one image (bytes, file-like or path) and return the parsed JSON."""
+        filename, data = _read_image(image)
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                resp = self.session.post(
+                    self.endpoint, files={"image": (filename, data, "image/jpeg")}, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            if resp.status_code in RETRY_STATUS and not last:
+                time.sleep(self._delay(attempt, resp))
+                continue
+            resp.raise_for_status()
+            return resp.json()
+
+    def send_many(self, images, max_workers=None, return_exceptions=False) -> list:
+        """
+        Send a batch concurrently with at most max_workers requests in flight.
+        Results keep the input order; with return_exceptions a failed image
+        yields its exception instead of aborting the batch.
+        """
+        def run(image):
+            try:
+                return self.send_image(image)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        workers = max(1, min(max_workers or self.max_workers, self.max_workers))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-client") as executor:
+            return list(executor.map(run, images))
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(ai_service_url) -> AIClient:
+    """Shared client per endpoint (keeps its connection pool between calls)."""
+    endpoint = _endpoint(ai_service_url)
+    with _clients_lock:
+        client = _clients.get(endpoint)
+        if client is None:
+            client = _clients[endpoint] = AIClient(endpoint)
+        return client
+
+
+def send_image_to_ai_service(ai_service_url: str, image) -> dict:
+    """Send an image (bytes, file-like or path) to ai_service_url and return parsed JSON.
+
+    ai_service_url can be either the full URL to the endpoint (e.g. https://.../process-image)
+    or a base URL; if it's a base URL we will append '/api/braille-image'.
+    """
+    return get_client(ai_service_url).send_image(image)
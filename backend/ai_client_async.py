@@ -0,0 +1,259 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from ai_client import _endpoint, _read_image
+
+# Asyncio client for the AI service (same endpoint and payload as ai_client.py).
+#
+# - Hedged requests: if the first attempt has not answered after the endpoint's
+#   recent p95 latency, a second identical request is sent and whichever answers
+#   first wins (the other is cancelled). Only a slow tail pays for the extra call.
+# - Circuit breaker: after AI_BREAKER_FAILURES consecutive failures the endpoint
+#   is considered down for AI_BREAKER_RESET seconds and calls fail fast with
+#   CircuitOpen (or go to the fallback). Then a single trial call decides whether
+#   to close the breaker again; a trial that never concludes (cancelled by the
+#   caller) sends it back to open, so the next trial comes after another reset.
+# - Latency and breaker state are tracked per endpoint and shared by all clients
+#   in the process, so a new client starts with what earlier ones learned.
+#
+# With fallback=True an open breaker sends the image to the local YOLO path in
+# braille_detector instead of failing.
+
+TIMEOUT = float(os.environ.get("AI_CLIENT_TIMEOUT", "30"))
+HEDGE_DELAY = float(os.environ.get("AI_HEDGE_DELAY", "1.0"))  # seconds, until p95 is known
+MIN_HEDGE_DELAY = float(os.environ.get("AI_MIN_HEDGE_DELAY", "0.05"))
+LATENCY_WINDOW = int(os.environ.get("AI_LATENCY_WINDOW", "200"))
+MIN_SAMPLES = 20
+BREAKER_FAILURES = int(os.environ.get("AI_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.environ.get("AI_BREAKER_RESET", "30"))  # seconds
+MAX_CONCURRENCY = int(os.environ.get("AI_CLIENT_MAX_WORKERS", "8"))
+
+
+class CircuitOpen(Exception):
+    """The AI service endpoint is marked as unhealthy."""
+
+
+class LatencyTracker:
+    """Latencies (seconds) of the last successful calls to one endpoint."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.calls += 1
+
+    def percentile(self, q):
+        with self._lock:
+            values = sorted(self.samples)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+    def hedge_delay(self):
+        """p95 of recent calls, or HEDGE_DELAY until there are enough samples."""
+        if len(self.samples) < MIN_SAMPLES:
+            return HEDGE_DELAY
+        return max(MIN_HEDGE_DELAY, self.percentile(0.95))
+
+    def stats(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "calls": self.calls,
+            "p50Ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95Ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "hedges": self.hedges,
+            "hedgeWins": self.hedge_wins,
+        }
+
+
+class CircuitBreaker:
+    """closed → open after `failures` consecutive errors → half-open after `reset` s.
+
+    In half-open only one trial goes out; if it is abandoned the breaker reopens.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset=BREAKER_RESET):
+        self.failures = failures
+        self.reset = reset
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now; in half-open only one trial at a time."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset:
+                self.state = "half-open"
+                return True
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive = 0
+
+    def abandon(self):
+        """The call ended without a verdict (cancelled); a pending trial counts as failed."""
+        with self._lock:
+            if self.state == "half-open":
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self.state == "half-open" or self.consecutive >= self.failures:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {"state": self.state, "consecutiveFailures": self.consecutive, "trips": self.trips}
+
+
+_trackers = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def _health(endpoint):
+    with _registry_lock:
+        if endpoint not in _trackers:
+            _trackers[endpoint] = LatencyTracker()
+            _breakers[endpoint] = CircuitBreaker()
+        return _trackers[endpoint], _breakers[endpoint]
+
+
+def endpoint_stats():
+    """Latency and breaker state of every endpoint used in this process."""
+    with _registry_lock:
+        endpoints = list(_trackers)
+    return {endpoint: {**_trackers[endpoint].stats(), "breaker": _breakers[endpoint].stats()}
+            for endpoint in endpoints}
+
+
+def _local_fallback(data):
+    from braille_detector import detectar_braille_bytes
+
+    return {"texto": detectar_braille_bytes(data), "detecciones": [], "fallback": "local"}
+
+
+class AsyncAIClient:
+    """Hedged, circuit-broken asyncio client for one AI service endpoint."""
+
+    def __init__(self, ai_service_url, timeout=TIMEOUT, hedge=True, fallback=False,
+                 max_concurrency=MAX_CONCURRENCY):
+        self.endpoint = _endpoint(ai_service_url)
+        self.timeout = timeout
+        self.hedge = hedge
+        self.fallback = fallback
+        self.max_concurrency = max(1, max_concurrency)
+        self.latency, self.breaker = _health(self.endpoint)
+        # Room for a hedge per in-flight call
+        self.http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=2 * self.max_concurrency,
+                                max_keepalive_connections=2 * self.max_concurrency),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def _post(self, filename, data):
+        started = time.monotonic()
+        resp = await self.http.post(self.endpoint, files={"image": (filename, data, "image/jpeg")})
+        resp.raise_for_status()
+        result = resp.json()
+        self.latency.observe(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, filename, data):
+        first = asyncio.ensure_future(self._post(filename, data))
+        tasks = {first}
+        try:
+            # Half-open: the trial call is not duplicated
+            if self.hedge and self.breaker.state == "closed":
+                done, _ = await asyncio.wait(tasks, timeout=self.latency.hedge_delay())
+                if not done:
+                    self.latency.hedges += 1
+                    tasks.add(asyncio.ensure_future(self._post(filename, data)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.latency.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def send_image(self, image) -> dict:
+        """Send one image (bytes, file-like or path) and return the parsed JSON."""
+        filename, data = _read_image(image)
+        if not self.breaker.allow():
+            if self.fallback:
+                return await asyncio.to_thread(_local_fallback, data)
+            raise CircuitOpen(f"AI service unavailable: {self.endpoint}")
+        concluded = False
+        try:
+            result = await self._hedged(filename, data)
+            concluded = True
+        except httpx.HTTPStatusError as e:
+            concluded = True
+            # A 4xx is the caller's problem, not a sign the service is down
+            if e.response.status_code < 500 and e.response.status_code != 429:
+                self.breaker.record_success()
+                raise
+            self.breaker.record_failure()
+            if self.fallback and self.breaker.state == "open":
+                return await asyncio.to_thread(_local_fallback, data)
+            raise
+        except (httpx.TransportError, ValueError):
+            concluded = True
+            self.breaker.record_failure()
+            if self.fallback and self.breaker.state == "open":
+                return await asyncio.to_thread(_local_fallback, data)
+            raise
+        finally:
+            # Cancelled (e.g. asyncio.wait_for in the caller) or an unexpected error
+            if not concluded:
+                self.breaker.abandon()
+        self.breaker.record_success()
+        return result
+
+    async def send_many(self, images, return_exceptions=False) -> list:
+        """Send a batch with at most max_concurrency calls in flight, keeping input order."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(image):
+            async with semaphore:
+                return await self.send_image(image)
+
+        return await asyncio.gather(*(run(image) for image in images), return_exceptions=return_exceptions)
+
+    def stats(self):
+        return {**self.latency.stats(), "breaker": self.breaker.stats()}
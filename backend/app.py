@@ -1,16 +1,65 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timedelta
+import codecs
+import io
+import json
 import os
+import sys
 import bcrypt
 import bson
 import secrets
+import time
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
+# utils/ y services/ se importan relativos a backend/ (también con backend.app:app)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.braille_translator import translate, translate_many, translate_stream, validate_options
+from services.result_cache import cached, file_signature, result_cache
+from services.model_registry import registry as model_registry
+from services.inference_scheduler import scheduler as inference_scheduler
+from services.inference_pool import InferenceBusy, pool_client
+from services.job_queue import JOB_RUNNER, QueueFull, job_queue
+from services.stats_service import AdminStats
+from utils.brf import brf_stream, DEFAULT_CELLS_PER_LINE, DEFAULT_LINES_PER_PAGE
+from config import MAX_CONTENT_LENGTH
+
+# Detección en imágenes (requiere OpenCV y el modelo YOLO)
+try:
+    from utils.image_utils import read_upload, UploadTooLarge
+    from services.translate_service import translate_image_bytes
+    from services.image_cache import image_cache
+    from services.document_service import DOCUMENT_DPI, open_document, translate_document
+    from utils.document_utils import UnsupportedDocument
+except ImportError as e:
+    print(f"⚠️ Detección de imágenes no disponible: {e}")
+    translate_image_bytes = None
+    image_cache = None
+    open_document = None
+
+class InMemoryRequest(Request):
+    """Los archivos de un multipart se quedan en memoria (nunca en un temporal en disco)."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 # 1️⃣ Inicializar Flask
 app = Flask(__name__)
+app.request_class = InMemoryRequest
+# Límite por defecto del cuerpo de las peticiones (el de las imágenes); las
+# rutas de documentos y de streaming lo cambian con request.max_content_length
+app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+
+# Carga anticipada del modelo YOLO en cada worker (PRELOAD_MODEL=1);
+# con el pool de inferencia (INFERENCE_POOL=1) el modelo vive fuera de los workers web
+if os.environ.get("PRELOAD_MODEL") == "1" and pool_client is None:
+    try:
+        model_registry.preload()
+    except Exception as e:
+        print(f"⚠️ No se pudo precargar el modelo YOLO: {e}")
 
 # 2️⃣ Configurar CORS con credenciales
 ALLOWED_ORIGIN = "https://www.easy-braille.com"
@@ -24,6 +73,14 @@ def add_cors_headers(response):
     response.headers["Access-Control-Allow-Credentials"] = "true"
     return response
 
+# Cola de inferencia llena: el cliente debe reintentar más tarde
+@app.errorhandler(InferenceBusy)
+def handle_inference_busy(e):
+    response = jsonify({"error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
 # 3️⃣ Conexión a MongoDB Atlas
 try:
     MONGO_URI = os.environ.get("MONGO_URI")
@@ -40,6 +97,15 @@ except Exception as e:
     usuarios = None
     traducciones = None
 
+# Estadísticas del panel materializadas (contadores con $inc y reconciliación periódica)
+admin_stats = None
+if usuarios is not None:
+    try:
+        admin_stats = AdminStats(db["stats"], usuarios, traducciones)
+        admin_stats.start_reconciler()
+    except Exception as e:
+        print(f"⚠️ Estadísticas materializadas no disponibles: {e}")
+
 # Función para enviar emails de recuperación
 def send_reset_email(to_email, reset_url):
     """Envía email de recuperación de contraseña usando SendGrid"""
@@ -115,7 +181,7 @@ def register():
 
         hashed_pw = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
 
-        result = usuarios.insert_one({
+        user = {
             "email": email,
             "password": hashed_pw.decode(),
             "name": email.split("@")[0],
@@ -123,7 +189,10 @@ def register():
             "isActive": True,
             "createdAt": datetime.utcnow(),
             "updatedAt": datetime.utcnow()
-        })
+        }
+        result = usuarios.insert_one(user)
+        if admin_stats is not None:
+            admin_stats.record_user(user)
 
         user_id = str(result.inserted_id)
         print(f"✅ Usuario registrado: {email}")
@@ -187,6 +256,22 @@ def login():
         return jsonify({"error": "Error interno"}), 500
 
 # 7️⃣ Guardar traducción
+# Los textos largos se traducen a través de la caché compartida: un acierto
+# cuesta de 3 a 10 veces menos que traducirlos. En los cortos la diferencia
+# es de microsegundos y no compensa la escritura en SQLite de cada fallo
+TEXT_CACHE_MIN_CHARS = int(os.environ.get("TEXT_CACHE_MIN_CHARS", 1000))
+# Versión del traductor en la clave: tras un despliegue no se sirven traducciones viejas
+TRANSLATOR_VERSION = ":".join(
+    file_signature(os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", name))
+    for name in ("braille_translator.py", "braille_grade2.py")
+)
+
+def translate_text(text, translationType, language):
+    if len(text) < TEXT_CACHE_MIN_CHARS:
+        return translate(text, translationType, language)
+    return cached("translate", [TRANSLATOR_VERSION, translationType, language, text],
+                  lambda: translate(text, translationType, language))
+
 @app.route("/api/translations", methods=["POST", "OPTIONS"])
 def save_translation():
     if request.method == "OPTIONS":
@@ -203,11 +288,19 @@ def save_translation():
         translationType = data.get("translationType", "TEXT_TO_BRAILLE")
         language = data.get("language", "es")
 
-        if not userId or not originalText or not brailleText:
+        if not userId or not originalText:
             return jsonify({"error": "Faltan campos"}), 400
 
+        # Si el cliente no envía la traducción, se calcula en el servidor
+        # ("language": "es" = Grado 1, "es-g2" = Grado 2)
+        if not brailleText:
+            try:
+                brailleText = translate_text(originalText, translationType, language)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
         now = datetime.utcnow()
-        traducciones.insert_one({
+        doc = {
             "userId": userId,
             "originalText": originalText,
             "brailleText": brailleText,
@@ -215,7 +308,10 @@ def save_translation():
             "language": language,
             "createdAt": now,
             "updatedAt": now
-        })
+        }
+        traducciones.insert_one(doc)
+        if admin_stats is not None:
+            admin_stats.record_translations([doc])
 
         print(f"✅ Traducción guardada para usuario {userId}")
         return jsonify({"message": "Traducción guardada"}), 200
@@ -366,7 +462,13 @@ def get_admin_stats():
         return jsonify({"error": "Base de datos no disponible"}), 500
 
     try:
-        # Calcular fechas
+        # Contadores materializados: una consulta acotada, no depende del tamaño de las colecciones
+        stats = admin_stats.admin_stats() if admin_stats is not None else None
+        if stats is not None:
+            return jsonify({"stats": stats}), 200
+
+        # Sin contadores (colección stats no disponible o aún sin materializar):
+        # cálculo directo sobre las colecciones
         now = datetime.utcnow()
         start_of_month = datetime(now.year, now.month, 1)
         start_of_week = now - timedelta(days=7)
@@ -549,7 +651,388 @@ def test_connection():
             "message": f"Error: {str(e)}"
         }), 500
 
-# 1️⃣5️⃣ Configuración Railway/Gunicorn
+# 1️⃣5️⃣ Traducción en streaming (documentos grandes)
+STREAM_READ_SIZE = 64 * 1024
+
+@app.route("/api/translate/stream", methods=["POST", "OPTIONS"])
+def translate_stream_endpoint():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    translationType = request.args.get("translationType", "TEXT_TO_BRAILLE")
+    language = request.args.get("language", "es")
+    try:
+        validate_options(translationType, language)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # El texto se traduce por bloques sin guardarlo entero: sin límite de tamaño
+    request.max_content_length = None
+
+    def body_chunks():
+        # El cuerpo se lee por bloques; el decodificador incremental conserva
+        # los caracteres UTF-8 partidos entre dos bloques
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            block = request.stream.read(STREAM_READ_SIZE)
+            if not block:
+                break
+            text = decoder.decode(block)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def generate():
+        try:
+            for piece in translate_stream(body_chunks(), translationType, language):
+                yield piece.encode("utf-8")
+        except Exception as e:
+            print(f"❌ Error en traducción en streaming: {e}")
+            raise
+
+    # Sin Content-Length: la respuesta se envía con Transfer-Encoding: chunked
+    return Response(stream_with_context(generate()), mimetype="text/plain; charset=utf-8")
+
+# 1️⃣6️⃣ Traducción por lotes
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 10000))
+
+@app.route("/api/translate/batch", methods=["POST", "OPTIONS"])
+def translate_batch():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get("items")
+        translationType = data.get("translationType", "TEXT_TO_BRAILLE")
+        language = data.get("language", "es")
+        userId = data.get("userId")
+        save = bool(data.get("save", False))
+
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            return jsonify({"error": "items debe ser una lista de textos"}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Máximo {BATCH_MAX_ITEMS} textos por lote"}), 400
+        if save and not userId:
+            return jsonify({"error": "Falta el userId"}), 400
+
+        try:
+            results = translate_many(items, translationType, language)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        saved = 0
+        if save and items:
+            if traducciones is None:
+                return jsonify({"error": "Base de datos no disponible"}), 500
+            now = datetime.utcnow()
+            docs = [{
+                "userId": userId,
+                "originalText": original,
+                "brailleText": result,
+                "translationType": translationType,
+                "language": language,
+                "createdAt": now,
+                "updatedAt": now
+            } for original, result in zip(items, results) if original]
+            if docs:
+                # Una sola escritura; ordered=False no se detiene en el primer error
+                try:
+                    saved = len(traducciones.insert_many(docs, ordered=False).inserted_ids)
+                    inserted = docs
+                except BulkWriteError as e:
+                    # Sólo cuentan los documentos que sí se insertaron
+                    saved = e.details.get("nInserted", 0)
+                    failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                    inserted = [doc for i, doc in enumerate(docs) if i not in failed]
+                    print(f"⚠️ {len(docs) - saved} traducciones del lote no se guardaron: {e}")
+                if admin_stats is not None and inserted:
+                    admin_stats.record_translations(inserted)
+            print(f"✅ {saved} traducciones guardadas para usuario {userId}")
+
+        return jsonify({"results": results, "count": len(results), "saved": saved}), 200
+
+    except Exception as e:
+        print(f"❌ Error en traducción por lotes: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+# 1️⃣7️⃣ Métricas internas (caché compartida entre workers)
+@app.route("/api/admin/metrics", methods=["GET", "OPTIONS"])
+def get_admin_metrics():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    try:
+        cache = result_cache.stats() if result_cache is not None else {"available": False}
+        # Modelos cargados en el worker que atiende la petición
+        models = model_registry.info()
+        inference = inference_scheduler.stats()
+        if image_cache is not None:
+            cache["nearDuplicates"] = image_cache.stats()
+        if pool_client is not None:
+            try:
+                inference["pool"] = pool_client.stats()
+            except InferenceBusy:
+                inference["pool"] = {"available": False}
+        metrics = {"cache": cache, "models": models, "inference": inference}
+        if job_queue is not None:
+            metrics["jobs"] = job_queue.stats()
+        return jsonify({"metrics": metrics}), 200
+    except Exception as e:
+        print(f"❌ Error al obtener métricas: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+# 1️⃣8️⃣ Exportar una traducción a BRF (embosadoras)
+BRF_CHUNK_SIZE = 64 * 1024
+
+@app.route("/api/translations/<translation_id>/export.brf", methods=["GET", "OPTIONS"])
+def export_translation_brf(translation_id):
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    if traducciones is None:
+        return jsonify({"error": "Base de datos no disponible"}), 500
+
+    if not bson.ObjectId.is_valid(translation_id):
+        return jsonify({"error": "Id de traducción inválido"}), 400
+
+    cells_per_line = request.args.get("cells", DEFAULT_CELLS_PER_LINE, type=int)
+    lines_per_page = request.args.get("lines", DEFAULT_LINES_PER_PAGE, type=int)
+    page_numbers = request.args.get("pageNumbers", "true").lower() != "false"
+    if not 10 <= cells_per_line <= 100 or not 1 <= lines_per_page <= 100:
+        return jsonify({"error": "Formato de página no válido"}), 400
+
+    try:
+        doc = traducciones.find_one(
+            {"_id": bson.ObjectId(translation_id)},
+            {"originalText": 1, "brailleText": 1, "translationType": 1}
+        )
+        if not doc:
+            return jsonify({"error": "Traducción no encontrada"}), 404
+
+        # El lado en Braille depende del sentido de la traducción
+        if doc.get("translationType") == "BRAILLE_TO_TEXT":
+            braille = doc.get("originalText") or ""
+        else:
+            braille = doc.get("brailleText") or ""
+
+        chunks = (braille[i:i + BRF_CHUNK_SIZE] for i in range(0, len(braille), BRF_CHUNK_SIZE))
+        pages = brf_stream(chunks, cells_per_line, lines_per_page, page_numbers)
+        body = (page.encode("ascii", errors="replace") for page in pages)
+
+        return Response(
+            stream_with_context(body),
+            mimetype="text/plain; charset=us-ascii",
+            headers={"Content-Disposition": f'attachment; filename="traduccion-{translation_id}.brf"'}
+        )
+
+    except Exception as e:
+        print(f"❌ Error al exportar BRF: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+# 1️⃣9️⃣ Imagen Braille → texto (foto subida como multipart "image" o cuerpo image/*;
+#      ?tiled=1 procesa páginas escaneadas a resolución completa por mosaicos;
+#      ?engine=dots usa el detector clásico de puntos y recurre a YOLO si no encaja)
+@app.route("/api/braille-image", methods=["POST", "OPTIONS"])
+def braille_image():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    if translate_image_bytes is None:
+        return jsonify({"error": "Detección de imágenes no disponible"}), 503
+
+    # El límite se comprueba antes de leer nada del cuerpo
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Falta Content-Length"}), 411
+    max_bytes = app.config["MAX_CONTENT_LENGTH"]
+    if length > max_bytes:
+        return jsonify({"error": f"La imagen supera {max_bytes} bytes"}), 413
+
+    started = time.perf_counter()
+    try:
+        if request.mimetype == "multipart/form-data":
+            image = request.files.get("image")
+            if image is None:
+                return jsonify({"error": "Falta el archivo 'image'"}), 400
+            data = read_upload(image.stream, max_bytes)
+        else:
+            data = read_upload(request.stream, max_bytes, length)
+        if not len(data):
+            return jsonify({"error": "Imagen vacía"}), 400
+
+        tiled = request.args.get("tiled", "0").lower() in ("1", "true")
+        engine = request.args.get("engine", "yolo")
+        result = translate_image_bytes(data, tiled=tiled, engine=engine)
+        result["tiempoMs"] = round((time.perf_counter() - started) * 1000, 1)
+        return jsonify(result), 200
+
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except InferenceBusy:
+        raise
+    except Exception as e:
+        print(f"❌ Error al procesar la imagen: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+# 2️⃣0️⃣ Documento Braille de varias páginas → texto (PDF o TIFF multipágina,
+#      multipart "document" o el archivo como cuerpo). Respuesta NDJSON: una
+#      línea de inicio, una por página en cuanto se procesa y una de fin;
+#      admite ?tiled=1, ?engine=dots y ?dpi= (rasterizado de los PDF)
+DOCUMENT_MAX_BYTES = int(os.environ.get("DOCUMENT_MAX_BYTES", 50 * 1024 * 1024))
+
+@app.route("/api/braille-document", methods=["POST", "OPTIONS"])
+def braille_document():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    if open_document is None:
+        return jsonify({"error": "Detección de imágenes no disponible"}), 503
+
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Falta Content-Length"}), 411
+    if length > DOCUMENT_MAX_BYTES:
+        return jsonify({"error": f"El documento supera {DOCUMENT_MAX_BYTES} bytes"}), 413
+    # Los documentos pueden superar el límite general de las imágenes
+    request.max_content_length = DOCUMENT_MAX_BYTES
+
+    tiled = request.args.get("tiled", "0").lower() in ("1", "true")
+    engine = request.args.get("engine", "yolo")
+    dpi = request.args.get("dpi", DOCUMENT_DPI, type=int)
+    if engine not in ("yolo", "dots"):
+        return jsonify({"error": f"Motor de detección no soportado: {engine}"}), 400
+    if not 72 <= dpi <= 600:
+        return jsonify({"error": "dpi debe estar entre 72 y 600"}), 400
+
+    started = time.perf_counter()
+    try:
+        if request.mimetype == "multipart/form-data":
+            upload = request.files.get("document")
+            if upload is None:
+                return jsonify({"error": "Falta el archivo 'document'"}), 400
+            data = read_upload(upload.stream, DOCUMENT_MAX_BYTES)
+        else:
+            data = read_upload(request.stream, DOCUMENT_MAX_BYTES, length)
+        if not len(data):
+            return jsonify({"error": "Documento vacío"}), 400
+        document = open_document(data, dpi)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except UnsupportedDocument as e:
+        return jsonify({"error": str(e)}), 415
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error al abrir el documento: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+    def line(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def generate():
+        yield line({"evento": "inicio", "tipo": document.kind, "paginas": document.page_count})
+        done = failed = 0
+        pages = translate_document(document, tiled=tiled, engine=engine)
+        try:
+            for page in pages:
+                done += 1
+                failed += "error" in page
+                yield line({"evento": "pagina", **page})
+        except Exception as e:
+            # Página ilegible: el documento se corta aquí
+            print(f"❌ Error al procesar el documento: {e}")
+            yield line({"evento": "error", "error": "Error al leer el documento", "pagina": done + 1})
+        finally:
+            # Primero se detiene el rasterizado de fondo y después se cierra el documento
+            pages.close()
+            document.close()
+        yield line({"evento": "fin", "procesadas": done, "errores": failed,
+                    "tiempoMs": round((time.perf_counter() - started) * 1000, 1)})
+
+    # Sin Content-Length: cada página se envía en cuanto está lista
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# 2️⃣1️⃣ Trabajos asíncronos de imagen: la petición sólo encola la imagen
+#      (mismos parámetros que /api/braille-image) y devuelve su id al momento;
+#      el resultado se consulta en /api/braille-image/jobs/<id> hasta que caduca
+@app.route("/api/braille-image/jobs", methods=["POST", "OPTIONS"])
+def create_image_job():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    if job_queue is None:
+        return jsonify({"error": "Cola de trabajos no disponible"}), 503
+    if translate_image_bytes is None:
+        # El runner tampoco podría procesarla: no se encola
+        return jsonify({"error": "Detección de imágenes no disponible"}), 503
+    if not JOB_RUNNER:
+        # Sin runner los trabajos se quedarían pendientes para siempre
+        return jsonify({"error": "Procesamiento de trabajos no configurado (JOB_RUNNER)"}), 503
+
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Falta Content-Length"}), 411
+    max_bytes = app.config["MAX_CONTENT_LENGTH"]
+    if length > max_bytes:
+        return jsonify({"error": f"La imagen supera {max_bytes} bytes"}), 413
+
+    tiled = request.args.get("tiled", "0").lower() in ("1", "true")
+    engine = request.args.get("engine", "yolo")
+    if engine not in ("yolo", "dots"):
+        return jsonify({"error": f"Motor de detección no soportado: {engine}"}), 400
+
+    try:
+        if request.mimetype == "multipart/form-data":
+            image = request.files.get("image")
+            if image is None:
+                return jsonify({"error": "Falta el archivo 'image'"}), 400
+            data = read_upload(image.stream, max_bytes)
+        else:
+            data = read_upload(request.stream, max_bytes, length)
+        if not len(data):
+            return jsonify({"error": "Imagen vacía"}), 400
+
+        job_id = job_queue.enqueue(data, {"tiled": tiled, "engine": engine})
+        return jsonify({
+            "jobId": job_id,
+            "estado": "pendiente",
+            "url": f"/api/braille-image/jobs/{job_id}"
+        }), 202
+
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except QueueFull as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+    except Exception as e:
+        print(f"❌ Error al encolar la imagen: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+@app.route("/api/braille-image/jobs/<job_id>", methods=["GET", "OPTIONS"])
+def get_image_job(job_id):
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    if job_queue is None:
+        return jsonify({"error": "Cola de trabajos no disponible"}), 503
+
+    try:
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({"error": "Trabajo no encontrado o caducado"}), 404
+        return jsonify({"jobId": job_id, **job}), 200
+    except Exception as e:
+        print(f"❌ Error al consultar el trabajo: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+# 2️⃣2️⃣ Configuración Railway/Gunicorn
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port, debug=False)
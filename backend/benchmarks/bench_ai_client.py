@@ -0,0 +1,129 @@
+"""
+Mide el cliente del servicio de IA (ai_client.py) contra un servidor local.
+
+El servidor de prueba imita /api/braille-image: lee el multipart, espera
+--latency ms y responde un JSON fijo; con --fail_rate una fracción de las
+peticiones recibe 503 con Retry-After: 0 para ejercitar los reintentos.
+Se comparan tres modos sobre las mismas --requests imágenes:
+
+- post: un requests.post por imagen (conexión nueva cada vez, sin reintentos)
+- sesión: AIClient.send_image en serie (conexión reutilizada)
+- lote: AIClient.send_many con --workers peticiones en vuelo
+
+Sin TLS la ganancia de la conexión reutilizada es sólo el handshake TCP;
+contra un servicio HTTPS remoto es mayor.
+
+Uso: python backend/benchmarks/bench_ai_client.py [--requests 200] [--latency 20]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ai_client import AIClient  # noqa: E402
+
+BODY = json.dumps({"texto": "hola", "detecciones": []}).encode("utf-8")
+
+
+def make_handler(latency, fail_rate):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True  # cabeceras y cuerpo van en escrituras separadas
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def timed(label, run, count):
+    started = time.perf_counter()
+    latencies, errors = run()
+    total = time.perf_counter() - started
+    mean = f"{statistics.fmean(latencies):9.1f}" if latencies else f"{'-':>9}"
+    return f"{label:<8} {count / total:8.1f} {mean} {errors:7d}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=20, help="latencia del servidor en ms")
+    parser.add_argument("--fail_rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--size", type=int, default=64 * 1024, help="bytes por imagen")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency / 1000, args.fail_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/braille-image"
+    image = random.randbytes(args.size)
+    images = [image] * args.requests
+
+    def plain():
+        latencies, errors = [], 0
+        for data in images:
+            started = time.perf_counter()
+            try:
+                requests.post(url, files={"image": ("image.jpg", data, "image/jpeg")}, timeout=30).raise_for_status()
+            except requests.RequestException:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies, errors
+
+    client = AIClient(url, backoff=0.01, max_workers=args.workers)
+
+    def session():
+        latencies, errors = [], 0
+        for data in images:
+            started = time.perf_counter()
+            try:
+                client.send_image(data)
+            except requests.RequestException:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies, errors
+
+    def batch():
+        results = client.send_many(images, return_exceptions=True)
+        return [], sum(isinstance(r, Exception) for r in results)
+
+    outp = [
+        f"Peticiones: {args.requests}  latencia={args.latency} ms  fallos={args.fail_rate:.0%}  "
+        f"workers={args.workers}",
+        f"{'modo':<8} {'pet/s':>8} {'media ms':>9} {'errores':>7}",
+        timed("post", plain, args.requests),
+        timed("sesión", session, args.requests),
+        timed("lote", batch, args.requests),
+    ]
+    client.close()
+    server.shutdown()
+    print("\n".join(outp))
+
+
+if __name__ == "__main__":
+    main()
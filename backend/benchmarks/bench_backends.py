@@ -0,0 +1,117 @@
+"""
+Compara los backends de inferencia del detector contra torch.
+
+Para cada artefacto exportado con yolov8_model/export.py que exista
+(onnxruntime / openvino, FP32 / INT8) mide la latencia por imagen sobre las
+imágenes de validación de eval_translation.py y el CER del texto reconstruido
+frente a las etiquetas. El informe incluye la aceleración y el ΔCER respecto
+a torch.
+
+Uso: python backend/benchmarks/bench_backends.py [--weights best.pt] [--limit 100]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import eval_translation as ev  # noqa: E402
+from services.model_registry import DEFAULT_MODEL_PATH, artifact_path  # noqa: E402
+
+CANDIDATES = (
+    ("torch", False),
+    ("onnxruntime", False),
+    ("onnxruntime", True),
+    ("openvino", False),
+    ("openvino", True),
+)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def evaluate(path, samples, names, conf, line_tol, warmup):
+    model = ev.YOLO(path, task="detect")
+    for img_path, _ in samples[:warmup]:
+        ev.predict_text(model, img_path, names, conf=conf, line_tol=line_tol)
+
+    latencies = []
+    chars = errors = 0
+    for img_path, gt_text in samples:
+        started = time.perf_counter()
+        pred_text, _ = ev.predict_text(model, img_path, names, conf=conf, line_tol=line_tol)
+        latencies.append((time.perf_counter() - started) * 1000)
+        pred_norm = ev.normalize_text(pred_text)
+        dist, _, _ = ev.levenshtein_alignment(list(gt_text), list(pred_norm))
+        chars += len(gt_text)
+        errors += dist
+    return {
+        "mean": statistics.fmean(latencies),
+        "p50": _percentile(latencies, 0.5),
+        "p95": _percentile(latencies, 0.95),
+        "cer": errors / max(1, chars),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", default="backend/dataset/dataset7/data.yaml")
+    parser.add_argument("--images", default="backend/dataset/dataset7/valid/images")
+    parser.add_argument("--labels", default="backend/dataset/dataset7/valid/labels")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--line_tol", type=float, default=ev.LINE_TOL)
+    parser.add_argument("--limit", type=int, default=0, help="máximo de imágenes (0 = todas)")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--save", default="runs/backend_report.txt")
+    args = parser.parse_args()
+
+    names = ev.load_data_yaml(args.data).get("names", None) or []
+    image_paths = sorted(p for p in Path(args.images).glob("*")
+                         if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    if args.limit:
+        image_paths = image_paths[:args.limit]
+    samples = []
+    for img_path in image_paths:
+        gt_items = ev.read_yolo_label_txt(str(Path(args.labels) / (img_path.stem + ".txt")))
+        gt_text, _ = ev.detections_to_text_tokens(ev.labels_to_detections(gt_items, names), args.line_tol)
+        samples.append((img_path, ev.normalize_text(gt_text)))
+    if not samples:
+        sys.exit(f"No hay imágenes de validación en {args.images}")
+
+    weights = str(Path(args.weights).resolve())
+    rows = []
+    for backend, int8 in CANDIDATES:
+        path = artifact_path(weights, backend, int8)
+        if not Path(path).exists():
+            print(f"⚠️ {backend} {'INT8' if int8 else 'FP32'} sin exportar ({path}), se omite")
+            continue
+        print(f"⏱  {backend} {'INT8' if int8 else 'FP32'} …")
+        rows.append((backend, "INT8" if int8 else "FP32",
+                     evaluate(path, samples, names, args.conf, args.line_tol, args.warmup)))
+    if not rows or rows[0][0] != "torch":
+        sys.exit("Falta la referencia torch (best.pt)")
+
+    base = rows[0][2]
+    outp = [
+        f"Imágenes: {len(samples)}  conf={args.conf}",
+        f"{'backend':<12} {'prec':<5} {'media ms':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'acel.':>6} {'CER':>7} {'ΔCER':>8}",
+    ]
+    for backend, precision, r in rows:
+        outp.append(
+            f"{backend:<12} {precision:<5} {r['mean']:9.1f} {r['p50']:8.1f} {r['p95']:8.1f} "
+            f"{base['mean'] / r['mean']:5.2f}x {r['cer']:7.4f} {r['cer'] - base['cer']:+8.4f}"
+        )
+
+    Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.save).write_text("\n".join(outp), encoding="utf-8")
+    print("\n".join(outp))
+
+
+if __name__ == "__main__":
+    main()
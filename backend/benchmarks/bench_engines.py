@@ -0,0 +1,115 @@
+"""
+Compara el detector clásico de puntos (services/dot_detector) con YOLO.
+
+Sobre las imágenes de validación de eval_translation.py mide, para cada
+motor, imágenes por segundo, latencia media y CER del texto reconstruido.
+El motor "dots" recurre a YOLO cuando el ajuste de la rejilla no llega a
+DOT_MIN_CONFIDENCE, como en la API; el informe da también la fracción de
+imágenes que acabaron en YOLO.
+
+Uso: python backend/benchmarks/bench_engines.py [--weights best.pt] [--limit 100]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import eval_translation as ev  # noqa: E402
+from services.dot_detector import MIN_CONFIDENCE, detect_dots  # noqa: E402
+from services.model_registry import DEFAULT_MODEL_PATH  # noqa: E402
+from utils.postprocess import detections_to_text  # noqa: E402
+
+
+def run_yolo(model, img_path, names, args):
+    text, _ = ev.predict_text(model, img_path, names, conf=args.conf, line_tol=args.line_tol)
+    return text, False
+
+
+def run_dots(model, img_path, names, args):
+    img = cv2.imread(str(img_path))
+    detections, fit = detect_dots(img) if img is not None else (None, None)
+    if detections is None or fit["confidence"] < args.min_confidence:
+        return run_yolo(model, img_path, names, args)[0], True
+    text, _ = detections_to_text(detections, angle=fit["angle"])
+    return text, False
+
+
+def evaluate(run, model, samples, names, args):
+    for img_path, _ in samples[:args.warmup]:
+        run(model, img_path, names, args)
+
+    latencies = []
+    chars = errors = fallbacks = 0
+    for img_path, gt_text in samples:
+        started = time.perf_counter()
+        pred_text, fell_back = run(model, img_path, names, args)
+        latencies.append((time.perf_counter() - started) * 1000)
+        dist, _, _ = ev.levenshtein_alignment(list(gt_text), list(ev.normalize_text(pred_text)))
+        chars += len(gt_text)
+        errors += dist
+        fallbacks += fell_back
+    return {
+        "ips": 1000 * len(latencies) / sum(latencies),
+        "mean": statistics.fmean(latencies),
+        "cer": errors / max(1, chars),
+        "fallback": fallbacks / len(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", default="backend/dataset/dataset7/data.yaml")
+    parser.add_argument("--images", default="backend/dataset/dataset7/valid/images")
+    parser.add_argument("--labels", default="backend/dataset/dataset7/valid/labels")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--line_tol", type=float, default=ev.LINE_TOL)
+    parser.add_argument("--min_confidence", type=float, default=MIN_CONFIDENCE,
+                        help="ajuste mínimo de la rejilla para no recurrir a YOLO")
+    parser.add_argument("--limit", type=int, default=0, help="máximo de imágenes (0 = todas)")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--save", default="runs/engine_report.txt")
+    args = parser.parse_args()
+
+    names = ev.load_data_yaml(args.data).get("names", None) or []
+    image_paths = sorted(p for p in Path(args.images).glob("*")
+                         if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    if args.limit:
+        image_paths = image_paths[:args.limit]
+    samples = []
+    for img_path in image_paths:
+        gt_items = ev.read_yolo_label_txt(str(Path(args.labels) / (img_path.stem + ".txt")))
+        gt_text, _ = ev.detections_to_text_tokens(ev.labels_to_detections(gt_items, names), args.line_tol)
+        samples.append((img_path, ev.normalize_text(gt_text)))
+    if not samples:
+        sys.exit(f"No hay imágenes de validación en {args.images}")
+
+    model = ev.YOLO(args.weights)
+    rows = []
+    for engine, run in (("yolo", run_yolo), ("dots", run_dots)):
+        print(f"⏱  {engine} …")
+        rows.append((engine, evaluate(run, model, samples, names, args)))
+
+    base = rows[0][1]
+    outp = [
+        f"Imágenes: {len(samples)}  conf={args.conf}  ajuste mínimo={args.min_confidence}",
+        f"{'motor':<6} {'img/s':>7} {'media ms':>9} {'acel.':>6} {'CER':>7} {'ΔCER':>8} {'a YOLO':>7}",
+    ]
+    for engine, r in rows:
+        outp.append(
+            f"{engine:<6} {r['ips']:7.1f} {r['mean']:9.1f} {base['mean'] / r['mean']:5.2f}x "
+            f"{r['cer']:7.4f} {r['cer'] - base['cer']:+8.4f} {r['fallback']:7.1%}"
+        )
+
+    Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.save).write_text("\n".join(outp), encoding="utf-8")
+    print("\n".join(outp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Latencia y rendimiento del camino de detección de la API.
+
+Ejecuta services/translate_service.translate_image_bytes (lo mismo que
+/api/braille-image) sobre páginas Braille sintéticas, o sobre las imágenes
+de --images reescaladas, para cada combinación de backend, motor, tamaño de
+lote y resolución. Cada combinación corre en un proceso nuevo, así que
+mide también el arranque en frío y el pico de memoria de ese proceso:
+
+- arranque: importar translate_service, cargar y calentar el modelo y
+  atender la primera petición
+- latencia p50/p95/p99 e imágenes por segundo con `--batch` peticiones
+  concurrentes (INFERENCE_MAX_BATCH = tamaño de lote, para que el
+  micro-batching las junte)
+- pico de RSS del proceso (ru_maxrss)
+
+Las cachés de resultados y de imágenes casi idénticas se desactivan en los
+procesos de medida y el pool de inferencia no se usa (INFERENCE_POOL=0).
+
+El informe es JSON (--save) con el commit y la máquina. Con --baseline se
+compara con un informe anterior y el comando sale con código 1 si alguna
+combinación empeora más de --threshold.
+
+Uso: python backend/benchmarks/bench_inference.py [--backends torch,onnxruntime-int8]
+     [--engines yolo,dots] [--batches 1,4,8] [--resolutions 640,1280,2480]
+     [--baseline runs/inference_bench.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services.model_registry import BACKENDS, DEFAULT_MODEL_PATH, artifact_path  # noqa: E402
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+# Métricas comparadas con --baseline: (clave, True si más alto es mejor)
+COMPARED = (("p50Ms", False), ("p95Ms", False), ("imagesPerSecond", True),
+            ("coldStartSeconds", False), ("peakRssMB", False))
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _parse_backend(name):
+    """"onnxruntime-int8" → ("onnxruntime", True)."""
+    backend, _, variant = name.partition("-")
+    if backend not in BACKENDS or variant not in ("", "int8"):
+        raise argparse.ArgumentTypeError(f"Backend no soportado: {name}")
+    return backend, variant == "int8"
+
+
+def synthetic_page(resolution, seed):
+    """Página Braille sintética (lado mayor = resolution) con celdas al azar, en JPEG."""
+    rng = np.random.default_rng(seed)
+    width, height = resolution, resolution * 3 // 4
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+    img += rng.integers(0, 12, size=img.shape, dtype=np.uint8)
+    # Proporciones Braille: puntos a 2,5 mm, celdas a 6 mm, líneas a 10 mm; ~38 celdas por línea
+    dot = max(3.0, width / 100)
+    radius = max(1, int(round(dot * 0.3)))
+    for top in np.arange(2 * dot, height - 4 * dot, 4 * dot):
+        for left in np.arange(2 * dot, width - 3 * dot, 2.4 * dot):
+            for k in np.flatnonzero(rng.random(6) < 0.4):
+                x, y = left + dot * (k // 3), top + dot * (k % 3)
+                cv2.circle(img, (int(round(x)), int(round(y))), radius, (40, 40, 40), -1, cv2.LINE_AA)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buf.tobytes()
+
+
+def fixture_pages(paths, resolution):
+    """Imágenes reales con el lado mayor reescalado a resolution, en JPEG."""
+    pages = []
+    for path in paths:
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        scale = resolution / max(img.shape[:2])
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        pages.append(cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+    return pages
+
+
+def measure(config):
+    """Una combinación, en este proceso (recién lanzado por run_config)."""
+    started = time.perf_counter()
+    from services import image_cache, result_cache, translate_service
+    from services.model_registry import preload
+    # Cada petición debe llegar al modelo
+    result_cache.result_cache = None
+    image_cache.image_cache = None
+    if not config["fallback"]:
+        # Sólo el detector clásico: se acepta cualquier ajuste de la rejilla
+        translate_service.DOT_MIN_CONFIDENCE = 0.0
+    imported = time.perf_counter()
+    model = preload() if config["engine"] == "yolo" or config["fallback"] else None
+    loaded = time.perf_counter()
+
+    if config["images"]:
+        paths = sorted(p for p in Path(config["images"]).glob("*")
+                       if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        pages = fixture_pages(paths[:config["requests"]], config["resolution"])
+    else:
+        pages = [synthetic_page(config["resolution"], seed) for seed in range(config["requests"] + 1)]
+    if not pages:
+        raise SystemExit(f"No hay imágenes en {config['images']}")
+
+    def run(data):
+        t0 = time.perf_counter()
+        translate_service.translate_image_bytes(data, tiled=config["tiled"], engine=config["engine"])
+        return (time.perf_counter() - t0) * 1000
+
+    # Primera petición: parte del arranque en frío (se descarta de las latencias)
+    first_ms = run(pages[-1])
+    requests = [pages[i % len(pages)] for i in range(config["requests"])]
+    with ThreadPoolExecutor(max_workers=config["batch"]) as executor:
+        list(executor.map(run, requests[:config["warmup"]]))
+        wall = time.perf_counter()
+        latencies = list(executor.map(run, requests))
+        wall = time.perf_counter() - wall
+
+    return {
+        "importSeconds": round(imported - started, 3),
+        "loadSeconds": round(loaded - imported, 3),
+        "firstRequestMs": round(first_ms, 1),
+        "coldStartSeconds": round(loaded - started + first_ms / 1000, 3),
+        "modelMemoryMB": model["memoryMB"] if model else None,
+        "meanMs": round(statistics.fmean(latencies), 1),
+        "p50Ms": round(_percentile(latencies, 0.5), 1),
+        "p95Ms": round(_percentile(latencies, 0.95), 1),
+        "p99Ms": round(_percentile(latencies, 0.99), 1),
+        "imagesPerSecond": round(len(latencies) / wall, 2),
+        "peakRssMB": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_config(config, args):
+    """Lanza un proceso nuevo para la combinación y devuelve su resultado."""
+    weights = artifact_path(os.path.abspath(args.weights), config["backend"], config["int8"])
+    if config["engine"] == "yolo" or config["fallback"]:
+        if not os.path.exists(weights):
+            return {**config, "status": "omitido", "error": f"no existe {weights} (yolov8_model/export.py)"}
+    env = {
+        **os.environ,
+        "INFERENCE_BACKEND": config["backend"],
+        "INFERENCE_INT8": "1" if config["int8"] else "0",
+        "INFERENCE_MAX_BATCH": str(config["batch"]),
+        "INFERENCE_POOL": "0",
+        "YOLO_MODEL_PATH": os.path.abspath(args.weights),
+    }
+    try:
+        proc = subprocess.run([sys.executable, __file__, "--child", json.dumps(config)], env=env,
+                              capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {**config, "status": "error", "error": f"más de {args.timeout}s"}
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if proc.returncode != 0 or not lines:
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-1:] or [f"código {proc.returncode}"]
+        return {**config, "status": "error", "error": tail[0]}
+    return {**config, "status": "ok", **json.loads(lines[-1][len(RESULT_PREFIX):])}
+
+
+def _key(result):
+    return (result["backendName"], result["engine"], result["tiled"], result["batch"], result["resolution"])
+
+
+def compare(results, baseline_path, threshold):
+    """Líneas de diferencias con el informe base y si hay alguna regresión."""
+    baseline = {_key(r): r for r in json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+                if r.get("status") == "ok"}
+    lines = [f"Comparación con {baseline_path} (umbral {threshold:.0%}):"]
+    regressed = False
+    for result in results:
+        base = baseline.get(_key(result))
+        if result["status"] != "ok" or base is None:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED:
+            if not base.get(metric):
+                continue
+            delta = result[metric] / base[metric] - 1
+            worse = -delta if higher_is_better else delta
+            mark = " ❌" if worse > threshold else ""
+            regressed |= worse > threshold
+            changes.append(f"{metric} {delta:+.1%}{mark}")
+        lines.append(f"  {'/'.join(map(str, _key(result)))}: " + ", ".join(changes))
+    return lines, regressed
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--backends", default="torch",
+                        help="lista separada por comas: torch, onnxruntime, openvino (sufijo -int8)")
+    parser.add_argument("--engines", default="yolo", help="yolo y/o dots")
+    parser.add_argument("--tiled", action="store_true", help="inferencia por mosaicos (páginas escaneadas)")
+    parser.add_argument("--no_fallback", action="store_true",
+                        help="con engine=dots no cargar YOLO (mide sólo el detector clásico)")
+    parser.add_argument("--batches", default="1,4,8", help="peticiones concurrentes / INFERENCE_MAX_BATCH")
+    parser.add_argument("--resolutions", default="640,1280,2480", help="lado mayor de las imágenes")
+    parser.add_argument("--images", default=None, help="carpeta de imágenes en vez de páginas sintéticas")
+    parser.add_argument("--requests", type=int, default=64, help="peticiones medidas por combinación")
+    parser.add_argument("--warmup", type=int, default=4)
+    parser.add_argument("--timeout", type=int, default=900, help="segundos por combinación")
+    parser.add_argument("--save", default="runs/inference_bench.json")
+    parser.add_argument("--baseline", default=None, help="informe JSON anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="empeoramiento tolerado frente a la base")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_PREFIX + json.dumps(measure(json.loads(args.child))), flush=True)
+        return
+
+    backends = [_parse_backend(name) for name in args.backends.split(",")]
+    configs = [
+        {"backendName": f"{backend}{'-int8' if int8 else ''}", "backend": backend, "int8": int8,
+         "engine": engine, "tiled": args.tiled, "fallback": not args.no_fallback,
+         "batch": batch, "resolution": resolution, "requests": args.requests,
+         "warmup": args.warmup, "images": args.images}
+        for backend, int8 in backends
+        for engine in args.engines.split(",")
+        for batch in map(int, args.batches.split(","))
+        for resolution in map(int, args.resolutions.split(","))
+    ]
+
+    results = []
+    for config in configs:
+        print(f"⏱  {config['backendName']} {config['engine']} lote={config['batch']} {config['resolution']}px …")
+        results.append(run_config(config, args))
+        if results[-1]["status"] != "ok":
+            print(f"⚠️ {results[-1]['status']}: {results[-1]['error']}")
+
+    report = {
+        "commit": _commit(),
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count(), "processor": platform.processor()},
+        "source": args.images or "synthetic",
+        "results": results,
+    }
+    Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.save).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    outp = [
+        f"Commit {report['commit']}  {report['source']}  {args.requests} peticiones por combinación",
+        f"{'backend':<16} {'motor':<5} {'lote':>4} {'px':>5} {'arranque s':>10} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'img/s':>7} {'RSS MB':>7}",
+    ]
+    for r in results:
+        if r["status"] != "ok":
+            outp.append(f"{r['backendName']:<16} {r['engine']:<5} {r['batch']:>4} {r['resolution']:>5} "
+                        f"{r['status']}")
+            continue
+        outp.append(
+            f"{r['backendName']:<16} {r['engine']:<5} {r['batch']:>4} {r['resolution']:>5} "
+            f"{r['coldStartSeconds']:10.2f} {r['p50Ms']:8.1f} {r['p95Ms']:8.1f} {r['p99Ms']:8.1f} "
+            f"{r['imagesPerSecond']:7.1f} {r['peakRssMB']:7.0f}"
+        )
+    regressed = False
+    if args.baseline:
+        lines, regressed = compare(results, args.baseline, args.threshold)
+        outp += [""] + lines
+    print("\n".join(outp))
+    print(f"✅ Informe JSON: {args.save}")
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compara los núcleos de puntuación de utils/scoring.py en páginas largas.
+
+Para cada longitud se genera una página de texto en español y una
+predicción con un porcentaje de errores (sustituciones, inserciones y
+borrados) y se mide:
+
+- completa: align_full, la matriz (n+1)×(m+1) que usaba eval_translation
+  (sólo hasta --max_full caracteres: a 5000 ya tarda ~16 s y ocupa ~0,9 GB)
+- distancia: levenshtein bit-paralelo (CER/WER sin pares de confusión)
+- alineamiento: align (Hirschberg) + confusion_pairs
+
+con el tiempo medio y el pico de memoria (tracemalloc) de cada uno.
+
+Uso: python backend/benchmarks/bench_scoring.py [--lengths 1000,2000,5000,20000] [--error 0.05]
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.scoring import align, align_full, confusion_pairs, levenshtein  # noqa: E402
+
+WORDS = ("el la de que y en un una los las por con para sistema braille lectura "
+         "texto página punto celda línea palabra escuela libro mano").split()
+
+
+def make_pair(length, error, rng):
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(WORDS))
+    gt = " ".join(words)[:length]
+    pred = list(gt)
+    for _ in range(int(length * error)):
+        k = rng.randrange(len(pred))
+        op = rng.random()
+        if op < 0.6:
+            pred[k] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+        elif op < 0.8:
+            pred.insert(k, rng.choice("aeiou"))
+        else:
+            del pred[k]
+    return gt, "".join(pred)
+
+
+def measure(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", default="1000,2000,5000,20000")
+    parser.add_argument("--error", type=float, default=0.05, help="fracción de caracteres con error")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max_full", type=int, default=2000, help="longitud máxima para la matriz completa")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    outp = [
+        f"Error: {args.error:.0%}  repeticiones: {args.repeat}",
+        f"{'chars':>6} {'método':<13} {'ms':>9} {'MiB':>8} {'acel.':>7} {'dist':>6}",
+    ]
+    for length in (int(v) for v in args.lengths.split(",")):
+        gt, pred = make_pair(length, args.error, rng)
+        rows = []
+        if length <= args.max_full:
+            rows.append(("completa",) + measure(lambda: align_full(gt, pred)[0], 1))
+        rows.append(("distancia",) + measure(lambda: levenshtein(gt, pred), args.repeat))
+
+        def full_alignment():
+            dist, ra, rb = align(gt, pred)
+            confusion_pairs(ra, rb)
+            return dist
+
+        rows.append(("alineamiento",) + measure(full_alignment, args.repeat))
+        # Sin la matriz completa la referencia es la distancia bit-paralela
+        base = rows[0][2]
+        distances = {dist for _, dist, _, _ in rows}
+        if len(distances) != 1:
+            sys.exit(f"Distancias distintas para {length} caracteres: {distances}")
+        for name, dist, ms, mib in rows:
+            outp.append(f"{length:6d} {name:<13} {ms:9.1f} {mib:8.2f} {base / ms:6.1f}x {dist:6d}")
+    print("\n".join(outp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Microbenchmark del traductor Braille.
+
+Compara el bucle original (``texto += ...`` por etiqueta) con el motor
+compilado de utils/braille_translator sobre entradas de ~100 KB.
+
+- prosa: frases en español con mayúscula inicial, números, nombres propios y ¿? / ¡!
+- denso: caso extremo, casi todas las palabras llevan indicadores
+
+Mínimos (TARGETS): aceleración de Braille → texto frente al bucle original
+para cada forma de entrada; si alguno no se alcanza, el comando sale con
+código 1. Son suelos contra regresiones, con margen para el ruido de la
+medida (medido: prosa en cadena 8-14x, denso 3-5x, listas de etiquetas
+1.6-3.5x). El orden de magnitud sólo se alcanza con prosa en cadena: el
+bucle original no resuelve indicadores (todo lo que no es a-z sale como
+"?"), así que cuanto más denso el texto menos trabajo hace, y con listas el
+propio "".join de las etiquetas cuesta ya una sexta parte de ese bucle.
+
+Uso: python backend/benchmarks/bench_translator.py [--size 100000] [--repeat 7]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils import braille_translator as bt  # noqa: E402
+
+TARGETS = {
+    "prosa": 5.0,
+    "denso": 2.5,
+    "etiquetas prosa": 1.2,
+    "etiquetas denso": 1.2,
+}
+
+_LEGACY_DICT = {
+    cell: ch for cell, ch in bt.braille_dict.items() if ch in "abcdefghijklmnopqrstuvwxyz "
+}
+
+_VOCABULARIO = (
+    "el la de que y en los se del las un por con no una su para es al lo como más "
+    "pero sus le ya o este sí porque esta entre cuando muy sin sobre también me hasta "
+    "hay donde quien desde todo nos durante todos uno les ni contra otros ese eso ante "
+    "ellos e esto mí antes algunos qué unos yo otro otras otra él tanto esa estos mucho "
+    "quienes nada muchos cual poco ella estar estas algunas algo nosotros niño canción "
+    "lectura escribir páginas sistema braille pingüino mañana años"
+).split()
+_NOMBRES = ["Madrid", "México", "Luis", "Ana"]
+_DENSO = ["hola", "braille", "niño", "canción", "Madrid", "ONU", "año", "2024",
+          "lectura", "está", "pingüino", "3,5", "¿qué?", "¡sí!", "texto"]
+
+
+def legacy_braille_to_text(labels):
+    """Implementación original, conservada sólo como referencia."""
+    texto = ""
+    for label in labels:
+        if label in _LEGACY_DICT:
+            texto += _LEGACY_DICT[label]
+        else:
+            texto += "?"
+    return texto
+
+
+def prose_text(size, seed=0):
+    rng = random.Random(seed)
+    frases, total = [], 0
+    while total < size:
+        palabras = [rng.choice(_VOCABULARIO) for _ in range(rng.randint(6, 18))]
+        if rng.random() < 0.15:
+            palabras[rng.randrange(len(palabras))] = str(rng.randint(1, 2030))
+        if rng.random() < 0.1:
+            palabras[rng.randrange(len(palabras))] = rng.choice(_NOMBRES)
+        frase = " ".join(palabras)
+        frase = frase[0].upper() + frase[1:]
+        r = rng.random()
+        frase = f"¿{frase}?" if r < 0.1 else (f"¡{frase}!" if r < 0.15 else frase + ".")
+        frases.append(frase)
+        total += len(frase) + 1
+    return " ".join(frases)[:size]
+
+
+def dense_text(size, seed=0):
+    rng = random.Random(seed)
+    out, total = [], 0
+    while total < size:
+        w = rng.choice(_DENSO)
+        out.append(w)
+        total += len(w) + 1
+    return " ".join(out)[:size]
+
+
+def best_of(fn, repeat, number=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def run(name, text, repeat):
+    cells = bt.text_to_braille(text)
+    labels = list(cells)
+    assert bt.braille_to_text(cells) == text, "la traducción de ida y vuelta no coincide"
+    assert bt.braille_to_text(labels) == text, "la traducción de ida y vuelta no coincide"
+
+    legacy = best_of(lambda: legacy_braille_to_text(cells), repeat)
+    back = best_of(lambda: bt.braille_to_text(cells), repeat)
+    legacy_labels = best_of(lambda: legacy_braille_to_text(labels), repeat)
+    back_labels = best_of(lambda: bt.braille_to_text(labels), repeat)
+    forward = best_of(lambda: bt.text_to_braille(text), repeat)
+    chunks = [text[i:i + 200] for i in range(0, len(text), 200)]
+    many = best_of(lambda: bt.translate_many(chunks), repeat)
+    one_by_one = best_of(lambda: [bt.text_to_braille(c) for c in chunks], repeat)
+
+    print(f"[{name}] {len(cells)} celdas / {len(text)} caracteres")
+    print(f"  Braille → texto (bucle original):  {legacy * 1000:8.2f} ms")
+    print(f"  Braille → texto (motor compilado): {back * 1000:8.2f} ms  ({legacy / back:.1f}x)")
+    print(f"  Lista de etiquetas (original):     {legacy_labels * 1000:8.2f} ms")
+    print(f"  Lista de etiquetas (compilado):    {back_labels * 1000:8.2f} ms  "
+          f"({legacy_labels / back_labels:.1f}x, incluye el join de la lista)")
+    print(f"  Texto → Braille:                   {forward * 1000:8.2f} ms")
+    print(f"  translate_many ({len(chunks)} textos):     {many * 1000:8.2f} ms "
+          f"(uno a uno: {one_by_one * 1000:.2f} ms)")
+
+    grade2 = bt.translate(text, bt.TEXT_TO_BRAILLE, bt.LANGUAGE_GRADE2)
+    assert bt.translate(grade2, bt.BRAILLE_TO_TEXT, bt.LANGUAGE_GRADE2) == text
+    g2_forward = best_of(lambda: bt.translate(text, bt.TEXT_TO_BRAILLE, bt.LANGUAGE_GRADE2), repeat)
+    g2_back = best_of(lambda: bt.translate(grade2, bt.BRAILLE_TO_TEXT, bt.LANGUAGE_GRADE2), repeat)
+    print(f"  Grado 2 ({len(grade2)} celdas):  texto → Braille {g2_forward * 1000:.2f} ms, "
+          f"Braille → texto {g2_back * 1000:.2f} ms")
+    return legacy / back, legacy_labels / back_labels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    prose, prose_labels = run("prosa", prose_text(args.size), args.repeat)
+    dense, dense_labels = run("denso", dense_text(args.size), args.repeat)
+
+    speedups = {"prosa": prose, "denso": dense,
+                 "etiquetas prosa": prose_labels, "etiquetas denso": dense_labels}
+    print("\nBraille → texto frente al bucle original (mínimo exigido):")
+    for name, speedup in speedups.items():
+        ok = speedup >= TARGETS[name]
+        print(f"  {name:16s} {speedup:5.1f}x  (≥{TARGETS[name]:.1f}x) {'✅' if ok else '❌'}")
+    if any(speedup < TARGETS[name] for name, speedup in speedups.items()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
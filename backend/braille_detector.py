@@ -1,29 +1,46 @@
 # backend/braille_detector.py
 
-from ultralytics import YOLO
-from utils.braille_translator import braille_to_text
 import os
 
-# Ruta del modelo entrenado
-MODEL_PATH = "yolov8_model/best.pt"  # relativa a backend/
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"No se encontró el modelo en {MODEL_PATH}")
+from utils.postprocess import VERSION as POSTPROCESS_VERSION, detections_to_text
+from services.result_cache import cached, file_signature
+from services.model_registry import resolve_path
+from services.inference_pool import detect
+from utils.image_utils import decode_image
+from services.image_cache import near_duplicate
+from utils.spell_index import spell_index
 
-model = YOLO(MODEL_PATH)
+# Corrección ortográfica del texto detectado (SPELL_CORRECTION=1 y el índice construido)
+SPELL_CORRECTION = os.environ.get("SPELL_CORRECTION") == "1" and spell_index is not None
+
+# Ruta del modelo entrenado (yolov8_model/best.pt, relativa a backend/)
+MODEL_PATH = resolve_path()
 
 def detectar_braille(imagen_path):
     """
     Detecta símbolos Braille en una imagen y devuelve el texto traducido.
+    Las imágenes con el mismo contenido se resuelven desde la caché compartida.
     """
-    results = model(imagen_path)
-
-    # Extraer etiquetas detectadas
-    labels = []
-    for r in results:
-        for box in r.boxes:
-            label_idx = int(box.cls[0])
-            label_name = r.names[label_idx]  # Nombre del símbolo detectado
-            labels.append(label_name)
-    
-    texto = braille_to_text(labels)
+    with open(imagen_path, "rb") as f:
+        data = f.read()
+    return detectar_braille_bytes(data)
+
+def detectar_braille_bytes(data):
+    """Igual que detectar_braille, con la imagen ya en memoria (bytes)."""
+    texto = cached("detect", [file_signature(MODEL_PATH), POSTPROCESS_VERSION, data], lambda: _detectar(data))
+    # Fuera de la caché: activar o desactivar la corrección no invalida resultados
+    return spell_index.correct_text(texto) if SPELL_CORRECTION else texto
+
+def _detectar(data):
+    # La imagen se decodifica aquí y se infiere en el pool de inferencia o en
+    # lote con otras peticiones concurrentes del proceso
+    img, _ = decode_image(data)
+    # Una imagen casi idéntica ya procesada reutiliza su texto
+    return near_duplicate(f"detect:{file_signature(MODEL_PATH)}:{POSTPROCESS_VERSION}", img, lambda: _texto(img))
+
+def _texto(img):
+    detections = detect(img)
+
+    # Etiquetas en orden de lectura (líneas y palabras) traducidas a texto
+    texto, _ = detections_to_text(detections)
     return texto
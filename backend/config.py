@@ -1,5 +1,5 @@
 """
-backend/config.py - Configuracin para produccin en Render
+backend/config.py - Configuración para producción en Render
 """
 
 import os
@@ -20,14 +20,15 @@ CORS_ORIGINS = [
     'https://easybraille-backend.onrender.com',   # Backend en Render
 ]
 
-# Si est en produccin, ser ms restrictivo
+# Si está en producción, ser más restrictivo
 if IS_PRODUCTION:
     CORS_ORIGINS = [
         'https://easybraille-frontend.onrender.com',
         'https://easybraille-backend.onrender.com',
     ]
 
-# Timeout para uploads (10 minutos)
+# Tamaño máximo de una petición (app.config["MAX_CONTENT_LENGTH"]); es el
+# límite de las imágenes subidas a /api/braille-image
 MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
 
 # Logging
@@ -36,9 +37,6 @@ LOG_LEVEL = 'INFO' if IS_PRODUCTION else 'DEBUG'
 # Modelo YOLO
 MODEL_PATH = 'backend/models/best.pt'
 
-# Directorio temporal
-TEMP_DIR = os.getenv('TEMP_DIR', 'temp')
-
 print(f'[CONFIG] Environment: {ENVIRONMENT}')
 print(f'[CONFIG] Port: {PORT}')
 print(f'[CONFIG] CORS Origins: {CORS_ORIGINS}')
@@ -1,56 +1,34 @@
 import os
 import sys
+import csv
+import time
 import yaml
+import hashlib
 import argparse
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import numpy as np
 from ultralytics import YOLO
-from collections import Counter, defaultdict
-import importlib.util
-from pathlib import Path as _Path
-
-# load translator module directly from backend/utils to avoid import path issues
-translator_path = _Path(__file__).resolve().parent / 'utils' / 'braille_translator.py'
-if translator_path.exists():
-    spec = importlib.util.spec_from_file_location('braille_translator', str(translator_path))
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    braille_to_text = getattr(mod, 'braille_to_text')
-else:
-    # fallback: simple identity translator
-    def braille_to_text(labels):
-        return ''.join(labels)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from services.inference_scheduler import Detections, to_detections  # noqa: E402
+from utils.postprocess import LINE_TOL, detections_to_text  # noqa: E402
+from utils.scoring import align, confusion_pairs, levenshtein  # noqa: E402
+from utils.spell_index import INDEX_PATH, open_index  # noqa: E402
 
 
 def levenshtein_alignment(a, b):
     # returns distance and aligned sequences with '-' for gaps
-    n, m = len(a), len(b)
-    dp = [[0] * (m + 1) for _ in range(n + 1)]
-    for i in range(n + 1):
-        dp[i][0] = i
-    for j in range(m + 1):
-        dp[0][j] = j
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            dp[i][j] = min(dp[i - 1][j] + 1, dp[i][j - 1] + 1, dp[i - 1][j - 1] + cost)
-    # backtrace
-    i, j = n, m
-    ra, rb = [], []
-    while i > 0 or j > 0:
-        if i > 0 and dp[i][j] == dp[i - 1][j] + 1:
-            ra.append(a[i - 1]); rb.append('-'); i -= 1
-        elif j > 0 and dp[i][j] == dp[i][j - 1] + 1:
-            ra.append('-'); rb.append(b[j - 1]); j -= 1
-        else:
-            ra.append(a[i - 1] if i > 0 else '-')
-            rb.append(b[j - 1] if j > 0 else '-')
-            i -= 1; j -= 1
-    return dp[n][m], ''.join(reversed(ra)), ''.join(reversed(rb))
+    # (Hirschberg with bit-parallel rows, linear memory; see utils/scoring.py)
+    dist, ra, rb = align(a, b)
+    return dist, ''.join(ra), ''.join(rb)
 
 
 def normalize_text(s):
-    # basic normalization for spanish: lowercase and strip
-    return s.strip().lower()
+    # basic normalization for spanish: lowercase, line breaks and runs of spaces as one space
+    return ' '.join(s.split()).lower()
 
 
 def load_data_yaml(yaml_path):
@@ -74,48 +52,263 @@ def read_yolo_label_txt(label_path):
     return items
 
 
-def labels_to_sequence(label_items, names):
-    # order by y (center) then x
-    boxes = []
-    for it in label_items:
-        cls = it[0]
-        x_center = it[1]
-        y_center = it[2]
-        boxes.append((y_center, x_center, cls))
-    boxes.sort(key=lambda t: (t[0], t[1]))
-    # return a list of token strings (don't join here so translator can map tokens)
-    seq = [names[c] if c < len(names) else str(c) for (_, _, c) in boxes]
-    return seq
+def labels_to_detections(label_items, names):
+    """Ground-truth YOLO labels [(cls, xc, yc, w, h)] as Detections, so they go through utils/postprocess."""
+    arr = np.asarray([it[:5] for it in label_items], dtype=np.float64).reshape(-1, 5)
+    centers, half = arr[:, 1:3], arr[:, 3:5] / 2
+    return Detections(
+        xyxy=np.hstack((centers - half, centers + half)),
+        conf=np.ones(len(arr), dtype=np.float32),
+        cls=arr[:, 0].astype(np.intp),
+        names=names,
+    )
+
+
+def detections_to_text_tokens(detections, line_tol=LINE_TOL):
+    """
+    Paragraph text and label tokens in reading order (utils/postprocess, the
+    same lines and words the API builds). Returns (text, tokens).
+    """
+    text, order = detections_to_text(detections, line_tol=line_tol)
+    names = detections.names
+    tokens = [names[c] for c in np.asarray(detections.cls, dtype=np.intp)[order].tolist()]
+    return text, tokens
+
+
+def predict_text(model, img_path, names, conf=0.25, line_tol=LINE_TOL):
+    """
+    Run the detector on one image and rebuild the paragraph text.
+    model: anything loaded with ultralytics.YOLO (.pt, .onnx or OpenVINO dir)
+    returns (pred_text, pred_tokens)
+    """
+    res = model.predict(source=str(img_path), conf=conf, device='cpu', verbose=False)
+    # ultralytics returns list of Results; use first
+    return detections_to_text_tokens(to_detections(res[0])._replace(names=names), line_tol)
+
+
+def checkpoint_hash(path):
+    """sha256 of the checkpoint contents (a file or an exported model directory)."""
+    digest = hashlib.sha256()
+    path = Path(path)
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(file.name.encode('utf-8'))
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# --- prediction stage (model) ------------------------------------------------
+
+_worker_model = None
+
+
+def _init_predict_worker(checkpoint, threads):
+    # One model per process, loaded once; threads split the cores between processes
+    global _worker_model
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    _worker_model = YOLO(checkpoint, task='detect')
+
+
+def _boxes_of(result):
+    """Raw boxes of one ultralytics result as (cls, xyxy, score) arrays, xyxy in pixels."""
+    boxes = result.boxes
+    return (
+        boxes.cls.cpu().numpy().astype(np.int16),
+        boxes.xyxy.cpu().numpy().reshape(-1, 4).astype(np.float32),
+        boxes.conf.cpu().numpy().astype(np.float32),
+    )
 
 
-def group_boxes_to_lines(boxes, line_tol=0.05):
+def _predict_shard(job):
+    paths, conf, batch = job
+    out = {}
+    for i in range(0, len(paths), batch):
+        chunk = paths[i:i + batch]
+        try:
+            results = _worker_model.predict(source=chunk, conf=conf, device='cpu', verbose=False)
+        except Exception as e:
+            print(f"Prediction failed for batch starting at {chunk[0]}: {e}")
+            continue
+        for path, result in zip(chunk, results):
+            out[path] = _boxes_of(result)
+    return out
+
+
+def predict_boxes(checkpoint, image_paths, conf, batch=8, workers=1):
+    """
+    Raw boxes for every image: {path: (cls, xyxy, score)}. Images go to the
+    model in batches of `batch`, spread over `workers` processes.
+    """
+    paths = [str(p) for p in image_paths]
+    if not paths:
+        return {}
+    workers = max(1, min(workers, len(paths)))
+    threads = max(1, (os.cpu_count() or 1) // workers) if workers > 1 else 0
+    # Contiguous shards of whole batches, one per worker
+    per_worker = -(-len(paths) // workers)
+    jobs = [(paths[i:i + per_worker], conf, batch) for i in range(0, len(paths), per_worker)]
+    if workers == 1:
+        _init_predict_worker(checkpoint, threads)
+        return _predict_shard(jobs[0])
+    preds = {}
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_predict_worker,
+                             initargs=(checkpoint, threads)) as pool:
+        for part in pool.map(_predict_shard, jobs):
+            preds.update(part)
+    return preds
+
+
+def prediction_cache_path(cache_dir, ckpt_hash, conf):
+    # v2: full xyxy boxes (v1 files only kept the centers)
+    return Path(cache_dir) / f"{ckpt_hash[:16]}_conf{conf:g}_v2.npz"
+
+
+def load_prediction_cache(path):
+    if not Path(path).exists():
+        return {}
+    with np.load(path, allow_pickle=False) as data:
+        offsets = data['offsets']
+        cols = [data[k] for k in ('cls', 'xyxy', 'score')]
+        return {
+            str(name): tuple(col[offsets[i]:offsets[i + 1]] for col in cols)
+            for i, name in enumerate(data['paths'])
+        }
+
+
+def save_prediction_cache(path, preds):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    names = sorted(preds)
+    counts = [len(preds[n][0]) for n in names]
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def column(k, dtype, shape=(0,)):
+        return np.concatenate([preds[n][k] for n in names]).astype(dtype) if names else np.zeros(shape, dtype)
+
+    tmp = path.with_suffix('.tmp.npz')
+    np.savez(tmp, paths=np.array(names, dtype=str), offsets=offsets,
+             cls=column(0, np.int16), xyxy=column(1, np.float32, (0, 4)), score=column(2, np.float32))
+    os.replace(tmp, path)
+
+
+def cached_predictions(checkpoint, image_paths, conf, cache_dir, batch=8, workers=1):
+    """
+    Boxes at `conf` from the on-disk cache (keyed by checkpoint hash and conf);
+    only images missing from it go through the model.
+    """
+    cache_path = prediction_cache_path(cache_dir, checkpoint_hash(checkpoint), conf) if cache_dir else None
+    preds = load_prediction_cache(cache_path) if cache_path else {}
+    missing = [p for p in image_paths if str(p) not in preds]
+    if missing:
+        print(f"Predicting {len(missing)} images (batch={batch}, workers={workers})")
+        preds.update(predict_boxes(checkpoint, missing, conf, batch, workers))
+        if cache_path:
+            save_prediction_cache(cache_path, preds)
+    else:
+        print(f"All {len(image_paths)} predictions loaded from {cache_path}")
+    return preds
+
+
+# --- scoring stage (no model) -------------------------------------------------
+
+def boxes_to_text(boxes, names, conf=0.25, line_tol=LINE_TOL):
+    """Paragraph text from cached boxes, keeping those with score >= conf. Returns (text, tokens)."""
+    cls, xyxy, score = boxes
+    keep = score >= conf
+    detections = Detections(xyxy=xyxy[keep], conf=score[keep], cls=cls[keep], names=names)
+    return detections_to_text_tokens(detections, line_tol)
+
+
+def make_speller(index_path=INDEX_PATH):
+    """Page-level corrector from the prebuilt SymSpell index (utils/spell_index.py), or None."""
+    index = open_index(index_path)
+    if index is None:
+        print(f"Spell index not found at {index_path} (build it with utils/spell_index.py), skipping --spell")
+        return None
+    return index.correct_text
+
+
+def score(samples, preds, names, conf, line_tol, speller=None, keep_rows=False):
     """
-    boxes: list of (cls, x_center, y_center)
-    line_tol: normalized y tolerance to cluster centers into the same line
-    returns list of lines, each line is list of (cls, x_center, y_center)
+    CER/WER over `samples` [(path, gt_tokens, gt_text, gt_norm)] using cached boxes.
+    Returns a dict with totals, confusion pairs, worst examples and optional CSV rows.
     """
-    if not boxes:
-        return []
-    # sort by y then x
-    boxes_sorted = sorted(boxes, key=lambda t: (t[2], t[1]))
-    lines = []
-    # use running mean of y to decide clustering into the same line
-    current_line = [boxes_sorted[0]]
-    current_mean_y = boxes_sorted[0][2]
-    for b in boxes_sorted[1:]:
-        by = b[2]
-        # if vertical distance from cluster mean small, same line
-        if abs(by - current_mean_y) <= line_tol:
-            current_line.append(b)
-            # update running mean
-            current_mean_y = (current_mean_y * (len(current_line) - 1) + by) / len(current_line)
-        else:
-            lines.append(sorted(current_line, key=lambda t: t[1]))
-            current_line = [b]
-            current_mean_y = by
-    if current_line:
-        lines.append(sorted(current_line, key=lambda t: t[1]))
-    return lines
+    total_chars = total_char_errors = total_words = total_word_errors = 0
+    confusion = Counter()
+    examples = []
+    rows = []
+    evaluated = 0
+    for img_path, gt_tokens, gt_text, gt_seq_norm in samples:
+        boxes = preds.get(str(img_path))
+        if boxes is None:
+            continue
+        evaluated += 1
+        pred_seq, pred_tokens_all = boxes_to_text(boxes, names, conf, line_tol)
+        pred_seq_norm = normalize_text(pred_seq)
+        if speller is not None:
+            pred_seq_norm = speller(pred_seq_norm)
+
+        # character-level alignment (needed for the confusion pairs)
+        dist, aligned_gt, aligned_pred = align(gt_seq_norm, pred_seq_norm)
+        total_chars += len(gt_seq_norm)
+        total_char_errors += dist
+        confusion.update(confusion_pairs(aligned_gt, aligned_pred))
+
+        # word-level: distance only, on word tokens
+        gt_words = gt_seq_norm.split()
+        total_words += max(1, len(gt_words))
+        total_word_errors += levenshtein(gt_words, pred_seq_norm.split())
+
+        cer = dist / max(1, len(gt_seq_norm)) if len(gt_seq_norm) > 0 else 0
+        examples.append((cer, str(img_path), gt_seq_norm, pred_seq_norm))
+        if keep_rows:
+            rows.append([str(img_path), ' '.join(gt_tokens), ' '.join(pred_tokens_all), gt_text, pred_seq, f"{cer:.6f}"])
+    return {
+        'conf': conf,
+        'line_tol': line_tol,
+        'images': evaluated,
+        'chars': total_chars,
+        'char_errors': total_char_errors,
+        'cer': total_char_errors / max(1, total_chars),
+        'wer': total_word_errors / max(1, total_words),
+        'confusion': confusion,
+        'examples': examples,
+        'rows': rows,
+    }
+
+
+_sweep_state = None
+
+
+def _init_sweep_worker(samples, preds, names, spell_index):
+    global _sweep_state
+    _sweep_state = (samples, preds, names, make_speller(spell_index) if spell_index else None)
+
+
+def _score_point(point):
+    samples, preds, names, speller = _sweep_state
+    result = score(samples, preds, names, point[0], point[1], speller)
+    return {k: result[k] for k in ('conf', 'line_tol', 'images', 'cer', 'wer')}
+
+
+def sweep(samples, preds, names, confs, line_tols, spell_index=None, workers=1):
+    """Scores every (conf, line_tol) pair from the same cached boxes (spell_index: path or None)."""
+    points = [(c, t) for c in confs for t in line_tols]
+    if workers <= 1:
+        _init_sweep_worker(samples, preds, names, spell_index)
+        return [_score_point(p) for p in points]
+    with ProcessPoolExecutor(max_workers=min(workers, len(points)), initializer=_init_sweep_worker,
+                             initargs=(samples, preds, names, spell_index)) as pool:
+        return list(pool.map(_score_point, points))
+
+
+def _floats(value):
+    return [float(v) for v in value.split(',') if v.strip()] if value else []
 
 
 def main():
@@ -125,150 +318,79 @@ def main():
     parser.add_argument('--images', type=str, default='backend/dataset/dataset7/valid/images')
     parser.add_argument('--labels', type=str, default='backend/dataset/dataset7/valid/labels')
     parser.add_argument('--conf', type=float, default=0.25)
-    parser.add_argument('--line_tol', type=float, default=0.05, help='normalized y tolerance for grouping boxes into lines')
-    parser.add_argument('--spell', action='store_true', help='apply simple spellchecker postprocess if available')
+    parser.add_argument('--line_tol', type=float, default=LINE_TOL,
+                        help='line break when the vertical gap between centers exceeds line_tol x median box height')
+    parser.add_argument('--spell', action='store_true', help='apply the SymSpell spelling corrector postprocess if its index is built')
+    parser.add_argument('--spell_index', type=str, default=INDEX_PATH, help='directory of the prebuilt spell index')
     parser.add_argument('--csv', type=str, default=None, help='optional CSV path to save per-image tokenized GT and predictions')
     parser.add_argument('--save', type=str, default='runs/eval_translation_report.txt')
+    parser.add_argument('--batch', type=int, default=8, help='images per model.predict call')
+    parser.add_argument('--workers', type=int, default=1, help='processes for prediction and sweeps')
+    parser.add_argument('--cache_dir', type=str, default='runs/pred_cache', help='prediction cache directory ("" disables it)')
+    parser.add_argument('--sweep_conf', type=str, default=None, help='comma-separated conf values to score from cached boxes')
+    parser.add_argument('--sweep_line_tol', type=str, default=None, help='comma-separated line_tol values to score from cached boxes')
     args = parser.parse_args()
 
     data_cfg = load_data_yaml(args.data)
     names = data_cfg.get('names', None) or []
 
-    model = YOLO(args.checkpoint)
-
     images_dir = Path(args.images)
     labels_dir = Path(args.labels)
     image_paths = sorted([p for p in images_dir.glob('*') if p.suffix.lower() in ('.jpg', '.jpeg', '.png')])
 
-    total_chars = 0
-    total_char_errors = 0
-    total_words = 0
-    total_word_errors = 0
-    confusion = Counter()
-    examples = []
-
+    # Ground truth once per image
+    samples = []
     for img_path in image_paths:
-        stem = img_path.stem
-        gt_label_path = labels_dir / (stem + '.txt')
-        gt_items = read_yolo_label_txt(str(gt_label_path))
-        gt_tokens = labels_to_sequence(gt_items, names)
-        gt_text = braille_to_text(gt_tokens)
-        gt_seq_norm = normalize_text(gt_text)
-
-        # predict
-        try:
-            res = model.predict(source=str(img_path), conf=args.conf, device='cpu')
-        except Exception as e:
-            print(f"Prediction failed for {img_path}: {e}")
-            continue
-        # ultralytics returns list of Results; use first
-        pred = res[0]
-        boxes = pred.boxes
-        pred_items = []
-        # boxes.cls may be a tensor
-        from PIL import Image
-        img = Image.open(str(img_path))
-        w, h = img.size
-        for i in range(len(boxes)):
-            try:
-                cls = int(boxes.cls[i].item())
-            except Exception:
-                cls = int(boxes.cls[i])
-            xyxy = boxes.xyxy[i].tolist() if hasattr(boxes.xyxy[i], 'tolist') else list(boxes.xyxy[i])
-            x1, y1, x2, y2 = xyxy[:4]
-            # convert to normalized center coords by dividing by image size
-            x_center = ((x1 + x2) / 2) / w
-            y_center = ((y1 + y2) / 2) / h
-            pred_items.append((cls, x_center, y_center))
-
-        # group into lines and order within lines
-        lines = group_boxes_to_lines(pred_items, line_tol=args.line_tol)
-        line_texts = []
-        pred_tokens_all = []
-        for ln in lines:
-            seq_tokens = [names[c] if c < len(names) else str(c) for (c, _, _) in ln]
-            pred_tokens_all.extend(seq_tokens)
-            line_text = braille_to_text(seq_tokens)
-            line_texts.append(line_text)
-        # join lines with a space to create paragraph-level prediction
-        pred_seq = ' '.join(line_texts)
-        pred_seq_norm = normalize_text(pred_seq)
-
-        # optional spellcheck / dictionary correction
-        if args.spell:
-            try:
-                from spellchecker import SpellChecker
-                spell = SpellChecker(language='es')
-                # naive token-level correction
-                toks = pred_seq_norm.split()
-                corrected = []
-                for t in toks:
-                    # check words of length >1
-                    if len(t) > 1:
-                        corr = spell.correction(t) or t
-                        corrected.append(corr)
-                    else:
-                        corrected.append(t)
-                pred_seq_norm = ' '.join(corrected)
-            except Exception:
-                # spellchecker not available or failed -> skip
-                pass
-
-        # compute character-level alignment
-        dist, aligned_gt, aligned_pred = levenshtein_alignment(list(gt_seq_norm), list(pred_seq_norm))
-        total_chars += len(gt_seq_norm)
-        total_char_errors += dist
-
-        # word-level: split by whitespace
-        gt_words = gt_seq_norm.split()
-        pred_words = pred_seq_norm.split()
-        # naive word distance: levenshtein on word tokens
-        wdist, _, _ = levenshtein_alignment(gt_words, pred_words)
-        total_words += max(1, len(gt_words))
-        total_word_errors += wdist
-
-        # build confusion pairs from aligned sequences
-        for gch, pch in zip(aligned_gt, aligned_pred):
-            if gch == '-' or pch == '-':
-                continue
-            if gch != pch:
-                confusion[(gch, pch)] += 1
+        gt_items = read_yolo_label_txt(str(labels_dir / (img_path.stem + '.txt')))
+        gt_text, gt_tokens = detections_to_text_tokens(labels_to_detections(gt_items, names), args.line_tol)
+        samples.append((img_path, gt_tokens, gt_text, normalize_text(gt_text)))
 
-        # save example with highest char error for reporting
-        cer = dist / max(1, len(gt_seq_norm)) if len(gt_seq_norm) > 0 else 0
-        examples.append((cer, str(img_path), gt_seq_norm, pred_seq_norm))
+    # Boxes are predicted once at the lowest conf; higher confs filter them by score
+    confs = _floats(args.sweep_conf) or [args.conf]
+    line_tols = _floats(args.sweep_line_tol) or [args.line_tol]
+    started = time.perf_counter()
+    preds = cached_predictions(args.checkpoint, image_paths, min(confs), args.cache_dir, args.batch, args.workers)
+    print(f"Predictions ready in {time.perf_counter() - started:.1f}s")
 
-        # optionally write CSV rows
+    outp = []
+    if len(confs) > 1 or len(line_tols) > 1:
+        started = time.perf_counter()
+        results = sweep(samples, preds, names, confs, line_tols, args.spell_index if args.spell else None,
+                        args.workers)
+        outp.append(f"Sweep: {len(results)} settings over {len(samples)} images "
+                    f"in {time.perf_counter() - started:.1f}s")
+        outp.append(f"{'conf':>6} {'line_tol':>9} {'CER':>8} {'WER':>8}")
+        for r in sorted(results, key=lambda r: (r['cer'], r['wer'])):
+            outp.append(f"{r['conf']:6g} {r['line_tol']:9g} {r['cer']:8.4f} {r['wer']:8.4f}")
+    else:
+        speller = make_speller(args.spell_index) if args.spell else None
+        result = score(samples, preds, names, args.conf, args.line_tol, speller, keep_rows=bool(args.csv))
+
+        # optionally write CSV rows (one writer for the whole run)
         if args.csv:
-            import csv
             csv_path = Path(args.csv)
             csv_path.parent.mkdir(parents=True, exist_ok=True)
-            # write header if file doesn't exist
             write_header = not csv_path.exists()
             with open(csv_path, 'a', encoding='utf-8', newline='') as cf:
                 writer = csv.writer(cf)
                 if write_header:
                     writer.writerow(['image', 'gt_tokens', 'pred_tokens', 'gt_text', 'pred_text', 'cer'])
-                writer.writerow([str(img_path), ' '.join(gt_tokens), ' '.join(pred_tokens_all), gt_text, pred_seq, f"{cer:.6f}"])
-
-    avg_cer = total_char_errors / max(1, total_chars)
-    avg_wer = total_word_errors / max(1, total_words)
-
-    # write report
-    outp = []
-    outp.append(f"Images evaluated: {len(image_paths)}")
-    outp.append(f"Total chars (GT): {total_chars}")
-    outp.append(f"Total char errors: {total_char_errors}")
-    outp.append(f"CER: {avg_cer:.4f}")
-    outp.append(f"WER: {avg_wer:.4f}")
-    outp.append("\nTop confusion pairs:")
-    for (g,p), c in confusion.most_common(30):
-        outp.append(f"  {g} -> {p}: {c}")
-
-    examples_sorted = sorted(examples, key=lambda t: t[0], reverse=True)
-    outp.append('\nWorst examples (CER, image, GT, PRED):')
-    for cer, img, gt, pred in examples_sorted[:20]:
-        outp.append(f"{cer:.3f}\t{img}\tGT:{gt}\tPRED:{pred}")
+                writer.writerows(result['rows'])
+
+        # write report
+        outp.append(f"Images evaluated: {result['images']}")
+        outp.append(f"Total chars (GT): {result['chars']}")
+        outp.append(f"Total char errors: {result['char_errors']}")
+        outp.append(f"CER: {result['cer']:.4f}")
+        outp.append(f"WER: {result['wer']:.4f}")
+        outp.append("\nTop confusion pairs:")
+        for (g, p), c in result['confusion'].most_common(30):
+            outp.append(f"  {g} -> {p}: {c}")
+
+        examples_sorted = sorted(result['examples'], key=lambda t: t[0], reverse=True)
+        outp.append('\nWorst examples (CER, image, GT, PRED):')
+        for cer, img, gt, pred in examples_sorted[:20]:
+            outp.append(f"{cer:.3f}\t{img}\tGT:{gt}\tPRED:{pred}")
 
     os.makedirs(Path(args.save).parent, exist_ok=True)
     with open(args.save, 'w', encoding='utf-8') as f:
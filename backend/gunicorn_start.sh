@@ -5,5 +5,31 @@ set -e
 : ${GUNICORN_WORKERS:=3}
 : ${GUNICORN_TIMEOUT:=120}
 
+# Pool de inferencia separado de los workers web (services/inference_pool.py),
+# relanzado si termina
+if [ "${INFERENCE_POOL:-0}" = "1" ]; then
+  echo "Starting inference pool with ${INFERENCE_POOL_WORKERS:-2} processes"
+  (
+    while true; do
+      python services/inference_pool.py || true
+      echo "Inference pool exited, restarting in 2s"
+      sleep 2
+    done
+  ) &
+fi
+
+# Runner de la API de trabajos asíncronos (services/job_queue.py)
+# (opcional: sólo con JOB_RUNNER=1; sin él la API de trabajos no avanza)
+if [ "${JOB_RUNNER:-0}" = "1" ]; then
+  echo "Starting job runner with ${JOB_WORKERS:-2} threads"
+  (
+    while true; do
+      python services/job_queue.py || true
+      echo "Job runner exited, restarting in 2s"
+      sleep 2
+    done
+  ) &
+fi
+
 echo "Starting gunicorn with ${GUNICORN_WORKERS} workers and timeout ${GUNICORN_TIMEOUT}"
 exec gunicorn app:app -b 0.0.0.0:5000 --workers ${GUNICORN_WORKERS} --timeout ${GUNICORN_TIMEOUT} --log-level info
@@ -0,0 +1,142 @@
+"""
+Traducción de documentos Braille de varias páginas (PDF, TIFF multipágina).
+
+Tubería por documento:
+
+1. un hilo de fondo rasteriza páginas (utils/document_utils) y las deja en
+   una cola acotada de DOCUMENT_PREFETCH páginas: mientras el detector
+   trabaja con unas páginas, las siguientes ya se están decodificando
+2. las páginas se envían al detector en lotes de DOCUMENT_BATCH, todas a la
+   vez, para que el micro-batching o el pool de inferencia las agrupen
+3. el resultado de cada página se entrega en cuanto termina su lote
+
+En memoria hay como mucho DOCUMENT_BATCH páginas en inferencia, las de la
+cola y la que se está rasterizando, sea cual sea la longitud del documento.
+Si el cliente se desconecta, el generador se cierra y el hilo de rasterizado
+se detiene.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.inference_pool import InferenceBusy
+from services.tiled_inference import TILE_MAX_PIXELS
+from services.translate_service import translate_page
+from utils.document_utils import Document
+
+DOCUMENT_DPI = int(os.environ.get("DOCUMENT_DPI", 200))
+DOCUMENT_MAX_PAGES = int(os.environ.get("DOCUMENT_MAX_PAGES", 500))
+DOCUMENT_MAX_PIXELS = int(os.environ.get("DOCUMENT_MAX_PIXELS", TILE_MAX_PIXELS))
+DOCUMENT_BATCH = int(os.environ.get("DOCUMENT_BATCH", 4))
+DOCUMENT_PREFETCH = int(os.environ.get("DOCUMENT_PREFETCH", DOCUMENT_BATCH))
+
+_DONE = object()
+
+
+def prefetch(items, depth, name="prefetch"):
+    """
+    Recorre `items` en un hilo de fondo con hasta `depth` elementos
+    adelantados. Las excepciones del hilo se relanzan en el consumidor.
+    """
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item):
+        # Con timeout para enterarse de que el consumidor se ha ido
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    break
+        except BaseException as e:
+            put((None, e))
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+            put((_DONE, None))
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def translate_document(document, tiled=False, engine="yolo", batch=DOCUMENT_BATCH, depth=DOCUMENT_PREFETCH):
+    """
+    Genera un dict por página en orden ({"pagina", "texto", ...} o
+    {"pagina", "error"}). Un error en una página no detiene el resto.
+    """
+    pages = prefetch(document.pages(), depth, name="document-pages")
+
+    def run(img, factor):
+        started = time.perf_counter()
+        result = translate_page(img, factor, tiled, engine)
+        result["tiempoMs"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def drain(pending):
+        for number, dpi, future in pending:
+            try:
+                result = future.result()
+            except InferenceBusy as e:
+                yield {"pagina": number, "error": str(e), "retryAfter": e.retry_after}
+                continue
+            except Exception as e:
+                print(f"❌ Error en la página {number}: {e}")
+                yield {"pagina": number, "error": "Error al procesar la página"}
+                continue
+            if dpi:
+                result["ppp"] = dpi
+            yield {"pagina": number, **result}
+        pending.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, batch), thread_name_prefix="document") as executor:
+        pending = []
+        try:
+            for number, (img, factor, dpi) in enumerate(pages, start=1):
+                pending.append((number, dpi, executor.submit(run, img, factor)))
+                if len(pending) >= batch:
+                    yield from drain(pending)
+            yield from drain(pending)
+        finally:
+            pages.close()
+            for _, _, future in pending:
+                future.cancel()
+
+
+def open_document(data, dpi=DOCUMENT_DPI, max_pixels=DOCUMENT_MAX_PIXELS, max_pages=DOCUMENT_MAX_PAGES):
+    """
+    Abre y valida un documento (incluida la primera página);
+    UnsupportedDocument/ValueError si no se puede procesar.
+    """
+    document = Document(data, dpi, max_pixels)
+    try:
+        if document.page_count > max_pages:
+            raise ValueError(f"El documento supera {max_pages} páginas")
+        if not document.page_count:
+            raise ValueError("El documento no tiene páginas")
+        document.read_first_page()
+    except BaseException:
+        document.close()
+        raise
+    return document
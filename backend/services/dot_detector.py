@@ -0,0 +1,178 @@
+"""
+Detector clásico de puntos Braille (sin red neuronal) para escaneos limpios.
+
+1. Puntos: umbral adaptativo + componentes conexas; se quedan los blobs
+   compactos de tamaño parecido a la mediana.
+2. Rejilla: con un KD-tree se busca el vecino más próximo de cada punto. La
+   mediana de esas distancias es el paso entre puntos (p) y la media circular
+   de 4·ángulo da la orientación de la rejilla.
+3. Celdas: en coordenadas alineadas los puntos se agrupan en filas, las filas
+   en líneas (hasta 3 filas separadas ~p) y las columnas de cada línea en
+   celdas de 2×3. Una columna suelta (p. ej. "⠁") se asigna a la izquierda o
+   a la derecha según la fase respecto al paso entre celdas de su línea.
+4. Confianza: fracción de vecinos alineados con la rejilla × fracción de
+   puntos que encajan en su posición; es 0 si el radio de los blobs no es
+   el de un punto Braille (≈0,3 del paso: 1,5 mm cada 2,5 mm). Por debajo de DOT_MIN_CONFIDENCE el
+   resultado no se usa y se recurre a YOLO.
+
+La salida es la misma tupla Detections que la de YOLO, con etiquetas Unicode
+(U+2800 + máscara de puntos), así que el post-procesado es el mismo.
+"""
+import os
+
+import cv2
+import numpy as np
+
+from services.inference_scheduler import Detections
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy viene con ultralytics; sin él el motor no está disponible
+    cKDTree = None
+
+MIN_CONFIDENCE = float(os.environ.get("DOT_MIN_CONFIDENCE", 0.75))
+MIN_DOTS = int(os.environ.get("DOT_MIN_DOTS", 6))
+
+# Clase = máscara de puntos (bit 0 = punto 1 … bit 5 = punto 6)
+CELL_NAMES = {mask: chr(0x2800 + mask) for mask in range(64)}
+
+
+def find_dots(gray):
+    """Centros (N, 2) y áreas de los blobs oscuros compactos de la imagen en gris."""
+    block = max(15, (min(gray.shape[:2]) // 40) | 1)
+    # El suavizado elimina el grano del papel y del sensor antes del umbral
+    binary = cv2.adaptiveThreshold(
+        cv2.GaussianBlur(gray, (5, 5), 0), 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block, 10
+    )
+    count, _, stats, centroids = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    w, h, area = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT], stats[1:, cv2.CC_STAT_AREA]
+    # Compactos: casi redondos y rellenando buena parte de su caja
+    compact = (area >= 3) & (np.maximum(w, h) <= 2 * np.minimum(w, h)) & (area >= 0.45 * w * h)
+    if not compact.any():
+        return np.zeros((0, 2)), np.zeros(0)
+    typical = np.median(area[compact])
+    keep = compact & (area >= 0.3 * typical) & (area <= 3 * typical)
+    return centroids[1:][keep], area[keep]
+
+
+def _groups(values, gap):
+    """Separa valores ordenados donde el salto supera `gap`: lista de arrays de índices."""
+    order = np.argsort(values, kind="stable")
+    cuts = np.flatnonzero(np.diff(values[order]) > gap) + 1
+    return np.split(order, cuts)
+
+
+def fit_grid(points):
+    """(paso, ángulo, alineados): paso entre puntos, orientación en radianes y fracción alineada."""
+    distances, neighbours = cKDTree(points).query(points, k=3)
+    vectors = points[neighbours[:, 1:]] - points[:, None, :]   # (N, 2 vecinos, xy)
+    pitch = float(np.median(distances[:, 1]))
+    nearest = vectors[:, 0]
+    phi = np.arctan2(nearest[:, 1], nearest[:, 0])
+    angle = float(np.angle(np.exp(4j * phi).mean()) / 4)
+
+    c, s = np.cos(angle), np.sin(angle)
+    du = np.abs(vectors[..., 0] * c + vectors[..., 1] * s)
+    dv = np.abs(-vectors[..., 0] * s + vectors[..., 1] * c)
+    # Alineado: alguno de los dos vecinos más próximos está sobre un eje de la
+    # rejilla (en la misma celda a ~p o en la contigua); en "⠑" el más
+    # próximo es la diagonal, pero el siguiente ya está alineado
+    on_axis = np.minimum(du, dv) < 0.2 * np.maximum(du, dv)
+    aligned = on_axis.any(axis=1)
+    return pitch, angle, float(aligned.mean())
+
+
+def detect_dots(img):
+    """
+    Devuelve (detecciones, ajuste): detecciones por celda (None si no hay
+    puntos suficientes) y {"confidence", "pitch", "angle"} de la rejilla.
+    El ángulo (radianes) sirve para ordenar la lectura en páginas torcidas.
+    """
+    fit = {"confidence": 0.0, "pitch": 0.0, "angle": 0.0}
+    if cKDTree is None:
+        return None, fit
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    points, areas = find_dots(gray)
+    if len(points) < MIN_DOTS:
+        return None, fit
+
+    p, angle, aligned = fit_grid(points)
+    c, s = np.cos(angle), np.sin(angle)
+    u = points[:, 0] * c + points[:, 1] * s
+    v = -points[:, 0] * s + points[:, 1] * c
+    radius = np.sqrt(np.median(areas) / np.pi)
+
+    cells = {}    # (u_izquierda, v_arriba) → máscara
+    fitted = 0
+    rows = [(v[idx].mean(), idx) for idx in _groups(v, 0.5 * p)]
+    line, lines = [], []
+    for row in rows:
+        # Una línea son hasta 3 filas a ~p; un hueco mayor o una 4ª fila abre otra
+        if line and (row[0] - line[-1][0] > 1.4 * p or row[0] - line[0][0] > 2.5 * p):
+            lines.append(line)
+            line = []
+        line.append(row)
+    if line:
+        lines.append(line)
+
+    for line in lines:
+        top = line[0][0]
+        dots = np.concatenate([idx for _, idx in line])
+        row_of = np.empty(len(u), dtype=np.intp)
+        for row_v, idx in line:
+            row_of[idx] = min(2, int(round((row_v - top) / p)))
+            fitted += int(np.sum(np.abs(v[idx] - (top + row_of[idx] * p)) < 0.35 * p))
+
+        columns = [(u[idx].mean(), idx) for idx in (dots[g] for g in _groups(u[dots], 0.5 * p))]
+        # Columnas a ~p forman una celda; el paso entre celdas sale de esos pares
+        pairs, i = [], 0
+        while i < len(columns):
+            if i + 1 < len(columns) and columns[i + 1][0] - columns[i][0] <= 1.3 * p:
+                pairs.append((columns[i], columns[i + 1]))
+                i += 2
+            else:
+                pairs.append((columns[i], None))
+                i += 1
+        lefts = np.array([left[0] for left, right in pairs if right is not None])
+        steps = np.diff(lefts)
+        cell_pitch = float(np.median(steps[steps < 3.5 * p])) if (steps < 3.5 * p).any() else 2.4 * p
+
+        for left, right in pairs:
+            origin = left[0]
+            col_of = {0: left[1]}
+            if right is not None:
+                col_of[1] = right[1]
+            elif len(lefts):
+                # Columna suelta: ¿cae en la fase de una columna izquierda o derecha?
+                ref = lefts[np.argmin(np.abs(lefts - left[0]))]
+                phase = (left[0] - ref) % cell_pitch
+                if abs(phase - p) < min(phase, cell_pitch - phase):
+                    origin = left[0] - p
+                    col_of = {1: left[1]}
+            mask = 0
+            for col, idx in col_of.items():
+                for row in row_of[idx]:
+                    mask |= 1 << (int(row) + 3 * col)
+            key = (origin, top)
+            cells[key] = cells.get(key, 0) | mask
+
+    # Blobs demasiado grandes o pequeños para el paso: no son puntos Braille
+    plausible = 0.1 <= radius / p <= 0.4
+    fit = {"confidence": aligned * fitted / len(points) if plausible else 0.0, "pitch": p, "angle": angle}
+    if not cells:
+        return None, fit
+
+    # Cajas de celda: rectángulo alineado con la rejilla, devuelto a la imagen
+    origins = np.array(list(cells.keys()))
+    corners_u = origins[:, :1] + np.array([-radius, p + radius, -radius, p + radius])
+    corners_v = origins[:, 1:] + np.array([-radius, -radius, 2 * p + radius, 2 * p + radius])
+    xs = corners_u * c - corners_v * s
+    ys = corners_u * s + corners_v * c
+    xyxy = np.stack([xs.min(1), ys.min(1), xs.max(1), ys.max(1)], axis=1).astype(np.float32)
+    masks = np.array(list(cells.values()), dtype=int)
+    return Detections(
+        xyxy=xyxy,
+        conf=np.full(len(masks), fit["confidence"], dtype=np.float32),
+        cls=masks,
+        names=CELL_NAMES,
+    ), fit
@@ -0,0 +1,255 @@
+"""
+Caché de detecciones para imágenes casi idénticas.
+
+La caché de resultados (services/result_cache) sólo acierta si los bytes son
+exactamente los mismos. Una página re-subida tras recomprimirla o
+redimensionarla da bytes distintos, aunque la imagen es la misma. Aquí cada
+resultado se guarda junto a dos hashes perceptuales (dHash) de la imagen:
+
+- grueso, 64 bits (9×8): se indexa por bandas. Si dos hashes difieren en
+  ≤ t bits y se parten en t+1 bandas, al menos una banda coincide entera,
+  así que basta buscar por igualdad de bandas y filtrar por distancia de
+  Hamming
+- fino, 256 bits (17×16): confirma el candidato, porque a 9×8 dos páginas
+  Braille distintas con la misma maquetación se parecen demasiado
+
+Tabla SQLite en el mismo archivo que la caché de resultados, con TTL, límite
+de entradas y de bytes (LRU) y contadores de aciertos y de tiempo de
+inferencia ahorrado. Si no se puede abrir, `image_cache` queda en None.
+
+Configuración: IMAGE_CACHE_THRESHOLD, IMAGE_CACHE_FINE_THRESHOLD,
+IMAGE_CACHE_MAX_ENTRIES, IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_TTL.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from services.result_cache import CACHE_PATH
+
+THRESHOLD = int(os.environ.get("IMAGE_CACHE_THRESHOLD", 4))  # bits de 64
+FINE_THRESHOLD = int(os.environ.get("IMAGE_CACHE_FINE_THRESHOLD", 12))  # bits de 256
+MAX_ENTRIES = int(os.environ.get("IMAGE_CACHE_MAX_ENTRIES", 20000))
+MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+TTL = int(os.environ.get("IMAGE_CACHE_TTL", 7 * 24 * 3600))  # segundos
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_entries (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    hash INTEGER NOT NULL,
+    fine BLOB NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    infer_ms REAL NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS image_entries_accessed ON image_entries (accessed);
+CREATE TABLE IF NOT EXISTS image_bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    entry INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS image_bands_lookup ON image_bands (band, value);
+CREATE INDEX IF NOT EXISTS image_bands_entry ON image_bands (entry);
+CREATE TABLE IF NOT EXISTS image_counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+COUNTERS = ("hits", "misses", "savedMs", "evictions")
+
+
+def dhash(img, width=8, height=8):
+    """dHash de width×height bits: si cada píxel es más claro que su vecino derecho."""
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (width + 1, height), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+
+
+def hamming(a, b):
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).bit_count()
+
+
+def _bands(value, count):
+    """Parte el hash de 64 bits en `count` bandas contiguas: [(banda, valor), ...]."""
+    bounds = [64 * i // count for i in range(count + 1)]
+    return [(i, (value >> lo) & ((1 << (hi - lo)) - 1))
+            for i, (lo, hi) in enumerate(zip(bounds, bounds[1:]))]
+
+
+def _signed(value):
+    # SQLite guarda enteros de 64 bits con signo
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class ImageCache:
+    """Resultados por imagen, recuperables con una imagen casi idéntica."""
+
+    def __init__(self, path=CACHE_PATH, threshold=THRESHOLD, fine_threshold=FINE_THRESHOLD,
+                 max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL):
+        self.path = path
+        self.threshold = threshold
+        self.fine_threshold = fine_threshold
+        self.band_count = threshold + 1
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._db().executescript(_SCHEMA)
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO image_counters (name, value) VALUES (?, 0)",
+                [(name,) for name in COUNTERS],
+            )
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None or getattr(self._local, "pid", None) != os.getpid():
+            # Una conexión por hilo y por proceso, como en result_cache
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _incr(db, name, amount=1):
+        db.execute("UPDATE image_counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def lookup(self, namespace, coarse, fine):
+        """Valor de la entrada más parecida dentro de los umbrales, o None."""
+        value = int.from_bytes(coarse, "big")
+        bands = _bands(value, self.band_count)
+        where = " OR ".join("(band = ? AND value = ?)" for _ in bands)
+        params = [p for band in bands for p in band]
+        now = time.time()
+        with self._transaction() as db:
+            rows = db.execute(
+                f"SELECT id, hash, fine, value, infer_ms FROM image_entries WHERE id IN "
+                f"(SELECT entry FROM image_bands WHERE {where}) AND namespace = ? AND expires > ?",
+                params + [namespace, now],
+            ).fetchall()
+            best = None
+            for entry_id, stored, stored_fine, data, infer_ms in rows:
+                distance = ((stored & ((1 << 64) - 1)) ^ value).bit_count()
+                if distance > self.threshold or hamming(stored_fine, fine) > self.fine_threshold:
+                    continue
+                if best is None or distance < best[0]:
+                    best = (distance, entry_id, data, infer_ms)
+            if best is None:
+                self._incr(db, "misses")
+                return None
+            db.execute("UPDATE image_entries SET accessed = ? WHERE id = ?", (now, best[1]))
+            self._incr(db, "hits")
+            self._incr(db, "savedMs", best[3])
+        return json.loads(best[2])
+
+    def store(self, namespace, coarse, fine, value, infer_ms):
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        hashed = int.from_bytes(coarse, "big")
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "INSERT INTO image_entries (namespace, hash, fine, value, size, infer_ms, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (namespace, _signed(hashed), fine, data, len(data), infer_ms, now + self.ttl, now),
+            )
+            db.executemany(
+                "INSERT INTO image_bands (band, value, entry) VALUES (?, ?, ?)",
+                [(band, band_value, cursor.lastrowid) for band, band_value in _bands(hashed, self.band_count)],
+            )
+            self._evict(db, now)
+
+    def _delete(self, db, where, params=()):
+        ids = [row[0] for row in db.execute(f"SELECT id FROM image_entries WHERE {where}", params)]
+        if ids:
+            marks = ",".join("?" * len(ids))
+            db.execute(f"DELETE FROM image_bands WHERE entry IN ({marks})", ids)
+            db.execute(f"DELETE FROM image_entries WHERE id IN ({marks})", ids)
+        return len(ids)
+
+    def _evict(self, db, now):
+        evicted = self._delete(db, "expires <= ?", (now,))
+        entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM image_entries").fetchone()
+        while entries > self.max_entries or size > self.max_bytes:
+            # LRU: las entradas usadas hace más tiempo, en bloques
+            batch = max(entries - self.max_entries, 1, entries // 100)
+            removed = self._delete(db, "id IN (SELECT id FROM image_entries ORDER BY accessed LIMIT ?)", (batch,))
+            if not removed:
+                break
+            evicted += removed
+            entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM image_entries").fetchone()
+        if evicted:
+            self._incr(db, "evictions", evicted)
+
+    def stats(self):
+        db = self._db()
+        stats = {name: value for name, value in db.execute("SELECT name, value FROM image_counters")}
+        for name in ("hits", "misses", "evictions"):
+            stats[name] = int(stats.get(name, 0))
+        stats["savedMs"] = round(stats.get("savedMs", 0.0), 1)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hitRate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["entries"] = db.execute("SELECT COUNT(*) FROM image_entries").fetchone()[0]
+        stats["threshold"] = self.threshold
+        stats["fineThreshold"] = self.fine_threshold
+        stats["maxEntries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        return stats
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM image_bands")
+            db.execute("DELETE FROM image_entries")
+            db.execute("UPDATE image_counters SET value = 0")
+
+
+try:
+    image_cache = ImageCache()
+except Exception as e:
+    print(f"⚠️ Caché de imágenes no disponible ({CACHE_PATH}): {e}")
+    image_cache = None
+
+
+def near_duplicate(namespace, img, compute):
+    """
+    Devuelve el resultado guardado para una imagen casi idéntica a `img` o
+    lo calcula con `compute()` y lo guarda junto a sus hashes.
+    """
+    if image_cache is None:
+        return compute()
+    coarse, fine = dhash(img, 8, 8), dhash(img, 16, 16)
+    try:
+        value = image_cache.lookup(namespace, coarse, fine)
+        if value is not None:
+            return value
+    except sqlite3.Error as e:
+        print(f"⚠️ Error en la caché de imágenes: {e}")
+
+    started = time.perf_counter()
+    value = compute()
+    try:
+        image_cache.store(namespace, coarse, fine, value, (time.perf_counter() - started) * 1000)
+    except sqlite3.Error as e:
+        print(f"⚠️ Error en la caché de imágenes: {e}")
+    return value
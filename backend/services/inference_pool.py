@@ -0,0 +1,416 @@
+"""
+Pool de procesos de inferencia separado de los workers de Flask.
+
+Con INFERENCE_POOL=1 los workers web no cargan el modelo: envían cada imagen
+a un servidor de inferencia local (socket Unix) que reparte el trabajo entre
+un número fijo de procesos, cada uno con su copia del modelo.
+
+- Los píxeles viajan en memoria compartida (multiprocessing.shared_memory):
+  por el socket sólo pasan el nombre del bloque, la forma y el dtype.
+- La cola es acotada (INFERENCE_POOL_QUEUE). Si está llena, o si ningún
+  proceso está listo, la petición se rechaza con InferenceBusy y la API
+  responde 503 con Retry-After.
+- El socket y la clave viven en un directorio privado (0700) del usuario.
+  Las conexiones se autentican con INFERENCE_POOL_AUTHKEY o, si no está
+  definida, con una clave aleatoria que el servidor escribe al arrancar en
+  ese directorio (archivo 0600) y que los clientes leen de allí.
+- Cada proceso fija sus hilos de torch/OpenMP (INFERENCE_THREADS) y, si hay
+  núcleos suficientes, su afinidad de CPU, para no competir entre sí.
+
+Arranque del servidor (start.sh lo lanza si INFERENCE_POOL=1):
+  python backend/services/inference_pool.py
+
+Sin INFERENCE_POOL, detect() infiere en el propio proceso con el
+micro-batching de services/inference_scheduler.
+"""
+import itertools
+import os
+import queue
+import secrets
+import stat
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    # Los procesos del pool se lanzan con spawn y vuelven a importar este módulo
+    sys.path.insert(0, _BACKEND_DIR)
+
+from services.inference_scheduler import MAX_BATCH, to_detections  # noqa: E402
+from services import inference_scheduler  # noqa: E402
+
+POOL_ENABLED = os.environ.get("INFERENCE_POOL") == "1"
+POOL_DIR = os.environ.get(
+    "INFERENCE_POOL_DIR", os.path.join(tempfile.gettempdir(), f"easybraille-{os.getuid()}")
+)
+POOL_ADDRESS = os.environ.get("INFERENCE_POOL_ADDRESS", os.path.join(POOL_DIR, "inference.sock"))
+POOL_AUTHKEY_FILE = os.path.join(os.path.dirname(POOL_ADDRESS), "inference.key")
+POOL_WORKERS = int(os.environ.get("INFERENCE_POOL_WORKERS", 2))
+POOL_QUEUE = int(os.environ.get("INFERENCE_POOL_QUEUE", 16))
+POOL_TIMEOUT = float(os.environ.get("INFERENCE_POOL_TIMEOUT", 60))
+POOL_THREADS = int(os.environ.get("INFERENCE_THREADS", 0))  # 0 = núcleos / procesos
+POOL_PIN_CPUS = os.environ.get("INFERENCE_PIN_CPUS", "1") == "1"
+RETRY_AFTER = int(os.environ.get("INFERENCE_RETRY_AFTER", 2))  # segundos
+
+
+class InferenceBusy(Exception):
+    """La cola de inferencia está llena o el servidor no responde."""
+
+    def __init__(self, retry_after=RETRY_AFTER, message="Servidor de inferencia ocupado"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _private_dir(path):
+    """Crea (o comprueba) un directorio sólo accesible para este usuario."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} debe ser un directorio propio con permisos 0700")
+    return path
+
+
+def _server_authkey():
+    """Clave del servidor: la de INFERENCE_POOL_AUTHKEY o una aleatoria escrita en un archivo 0600."""
+    key = os.environ.get("INFERENCE_POOL_AUTHKEY")
+    if key:
+        return key.encode("utf-8")
+    key = secrets.token_hex(32)
+    tmp = f"{POOL_AUTHKEY_FILE}.{os.getpid()}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    os.replace(tmp, POOL_AUTHKEY_FILE)
+    return key.encode("utf-8")
+
+
+def _client_authkey():
+    """Clave del cliente: INFERENCE_POOL_AUTHKEY o el archivo que dejó el servidor."""
+    key = os.environ.get("INFERENCE_POOL_AUTHKEY")
+    if key:
+        return key.encode("utf-8")
+    st = os.stat(POOL_AUTHKEY_FILE)
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{POOL_AUTHKEY_FILE} debe ser un archivo propio con permisos 0600")
+    with open(POOL_AUTHKEY_FILE) as f:
+        return f.read().strip().encode("utf-8")
+
+
+def _attach(name):
+    """Abre un bloque creado por otro proceso sin que este proceso lo borre al salir."""
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+# --- procesos de inferencia ------------------------------------------------
+
+def _pin_threads(threads, cpus):
+    # Antes de importar torch: OpenMP/MKL leen estas variables al iniciarse
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+
+def _worker_main(index, jobs, results, threads, cpus, max_batch):
+    _pin_threads(threads, cpus)
+    # Después de fijar los hilos: numpy carga OpenBLAS/MKL al importarse y
+    # lee entonces OPENBLAS_NUM_THREADS / MKL_NUM_THREADS
+    import numpy as np
+    from services.model_registry import get_model
+
+    model = get_model()
+    results.put((None, ("ready", index)))
+    print(f"✅ Proceso de inferencia {index} listo (pid {os.getpid()}, {threads} hilos"
+          + (f", CPUs {sorted(cpus)})" if cpus else ")"))
+
+    while True:
+        batch = [jobs.get()]
+        if batch[0] is None:
+            return
+        # Agrupa lo que ya esté en cola, sin esperar a que llegue más
+        while len(batch) < max_batch:
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                jobs.put(None)
+                break
+            batch.append(job)
+
+        blocks, images, live = [], [], []
+        for job_id, name, shape, dtype in batch:
+            try:
+                shm = _attach(name)
+            except FileNotFoundError:
+                # El cliente abandonó la petición (timeout) y liberó el bloque
+                results.put((job_id, ("error", "imagen no disponible")))
+                continue
+            blocks.append(shm)
+            images.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+            live.append(job_id)
+        try:
+            if images:
+                for job_id, result in zip(live, model(images, verbose=False)):
+                    results.put((job_id, ("ok", to_detections(result))))
+        except Exception as e:
+            for job_id in live:
+                results.put((job_id, ("error", str(e))))
+        finally:
+            # Las vistas numpy deben soltarse antes de cerrar la memoria compartida
+            del images[:]
+            for shm in blocks:
+                try:
+                    shm.close()
+                except BufferError:
+                    pass
+
+
+# --- servidor -------------------------------------------------------------
+
+class InferenceServer:
+    """Recibe imágenes por socket y las reparte entre los procesos de inferencia."""
+
+    def __init__(self, address=POOL_ADDRESS, workers=POOL_WORKERS, queue_size=POOL_QUEUE,
+                 threads=POOL_THREADS, pin_cpus=POOL_PIN_CPUS, max_batch=MAX_BATCH):
+        self.address = address
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        ncpu = len(cpus) or os.cpu_count() or 1
+        self.threads = threads or max(1, ncpu // self.workers)
+        # Núcleos disjuntos por proceso sólo si alcanzan para todos
+        if pin_cpus and cpus and len(cpus) >= self.workers * self.threads:
+            self.cpu_sets = [set(cpus[i * self.threads:(i + 1) * self.threads])
+                             for i in range(self.workers)]
+        else:
+            self.cpu_sets = [None] * self.workers
+        self.max_batch = max_batch
+        self._ctx = get_context("spawn")
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._processes = [None] * self.workers
+        self._slots = {}
+        # Trabajos cuyo cliente se cansó de esperar pero que siguen en la cola de los procesos
+        self._abandoned = {}
+        self._ready = set()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._served = 0
+        self._rejected = 0
+        self._restarts = 0
+
+    def _start_worker(self, index):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._jobs, self._results, self.threads, self.cpu_sets[index], self.max_batch),
+            name=f"inference-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _supervise(self):
+        while True:
+            time.sleep(1)
+            for index, process in enumerate(self._processes):
+                if not process.is_alive():
+                    print(f"⚠️ Proceso de inferencia {index} terminó (código {process.exitcode}), reiniciando")
+                    with self._lock:
+                        self._ready.discard(index)
+                        self._restarts += 1
+                    self._start_worker(index)
+            # Un trabajo abandonado cuyo proceso murió nunca tendrá respuesta
+            now = time.monotonic()
+            with self._lock:
+                for job_id, deadline in list(self._abandoned.items()):
+                    if deadline < now:
+                        del self._abandoned[job_id]
+                        self._pending -= 1
+
+    def _dispatch_results(self):
+        while True:
+            job_id, reply = self._results.get()
+            with self._lock:
+                if job_id is None:
+                    self._ready.add(reply[1])
+                    continue
+                if self._abandoned.pop(job_id, None) is not None:
+                    # Por fin terminó: deja libre su plaza en la cola
+                    self._pending -= 1
+                    continue
+                slot = self._slots.get(job_id)
+                if slot is not None:
+                    slot[1] = reply
+                    slot[0].set()
+
+    def _detect(self, name, shape, dtype):
+        with self._lock:
+            # Sin procesos listos (arrancando o caídos) no tiene sentido esperar POOL_TIMEOUT
+            if self._pending >= self.queue_size or not self._ready:
+                self._rejected += 1
+                return ("busy", RETRY_AFTER)
+            self._pending += 1
+            job_id = next(self._ids)
+            slot = self._slots[job_id] = [threading.Event(), None]
+        self._jobs.put((job_id, name, shape, dtype))
+        slot[0].wait(POOL_TIMEOUT)
+        with self._lock:
+            self._slots.pop(job_id, None)
+            self._served += 1
+            if slot[0].is_set():
+                self._pending -= 1
+            else:
+                # Sigue en la cola de los procesos: ocupa plaza hasta que termine
+                # (o hasta un segundo plazo, por si el proceso que lo tenía murió)
+                self._abandoned[job_id] = time.monotonic() + POOL_TIMEOUT
+        if slot[1] is None:
+            return ("error", "tiempo de inferencia agotado")
+        return slot[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "threadsPerWorker": self.threads,
+                "queueSize": self.queue_size,
+                "pending": self._pending,
+                "abandoned": len(self._abandoned),
+                "ready": len(self._ready),
+                "served": self._served,
+                "rejected": self._rejected,
+                "restarts": self._restarts,
+            }
+
+    def _serve(self, conn):
+        try:
+            while True:
+                message = conn.recv()
+                if message[0] == "detect":
+                    conn.send(self._detect(*message[1:]))
+                elif message[0] == "stats":
+                    conn.send(("ok", self.stats()))
+                else:
+                    conn.send(("error", f"mensaje desconocido: {message[0]}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        for index in range(self.workers):
+            self._start_worker(index)
+        threading.Thread(target=self._dispatch_results, daemon=True).start()
+        threading.Thread(target=self._supervise, daemon=True).start()
+
+        _private_dir(os.path.dirname(self.address))
+        authkey = _server_authkey()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        with Listener(self.address, family="AF_UNIX", authkey=authkey) as listener:
+            os.chmod(self.address, 0o600)
+            print(f"✅ Servidor de inferencia en {self.address}: {self.workers} procesos × "
+                  f"{self.threads} hilos, cola de {self.queue_size}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"⚠️ Conexión rechazada: {e}")
+                    continue
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+
+# --- cliente (workers de Flask) -----------------------------------------------
+
+class InferencePoolClient:
+    """Conexión por hilo al servidor de inferencia."""
+
+    def __init__(self, address=POOL_ADDRESS, timeout=POOL_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # La clave se lee en cada conexión: el servidor genera otra al reiniciarse
+            conn = Client(self.address, family="AF_UNIX", authkey=_client_authkey())
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, message):
+        try:
+            conn = self._conn()
+            conn.send(message)
+            if not conn.poll(self.timeout):
+                raise TimeoutError("sin respuesta del servidor de inferencia")
+            return conn.recv()
+        except (OSError, EOFError, AuthenticationError) as e:
+            # Incluye TimeoutError: la conexión queda en estado desconocido
+            self._drop()
+            print(f"⚠️ Servidor de inferencia no disponible ({self.address}): {e}")
+            raise InferenceBusy(message="Servidor de inferencia no disponible") from e
+
+    def detect(self, image):
+        import numpy as np
+
+        shm = SharedMemory(create=True, size=max(1, image.nbytes))
+        try:
+            view = np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)
+            view[...] = image
+            del view
+            status, payload = self._call(("detect", shm.name, image.shape, image.dtype.str))
+        finally:
+            shm.close()
+            shm.unlink()
+        if status == "busy":
+            raise InferenceBusy(payload)
+        if status != "ok":
+            raise RuntimeError(f"Error en el servidor de inferencia: {payload}")
+        return payload
+
+    def stats(self):
+        return self._call(("stats",))[1]
+
+
+pool_client = InferencePoolClient() if POOL_ENABLED else None
+
+
+def detect(image):
+    """Detecciones de una imagen BGR: en el pool si está activo, si no en este proceso."""
+    if pool_client is not None:
+        return pool_client.detect(image)
+    return inference_scheduler.detect(image)
+
+
+if __name__ == "__main__":
+    InferenceServer().serve_forever()
@@ -0,0 +1,163 @@
+"""
+Micro-batching de inferencias YOLO.
+
+Las peticiones de detección dejan su imagen en una cola y esperan un
+Future. Un hilo de fondo junta las imágenes y llama al modelo con un lote
+cuando hay `max_batch` imágenes o cuando la más antigua lleva `max_wait_ms`
+esperando, y después reparte cada resultado a quien lo pidió.
+
+Agrupar sólo sirve si hay peticiones concurrentes dentro del mismo proceso
+(gunicorn con --threads o --worker-class gthread); con workers sync el lote
+es de una imagen y el coste añadido es un cambio de hilo.
+
+Configuración: INFERENCE_MAX_BATCH e INFERENCE_MAX_WAIT_MS.
+"""
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from concurrent.futures import Future
+
+from services.model_registry import get_model
+
+MAX_BATCH = int(os.environ.get("INFERENCE_MAX_BATCH", 8))
+MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", 10))
+
+# Salida compacta de una detección: arrays numpy (xyxy en píxeles, confianza,
+# índice de clase) y nombres de las clases. Se puede enviar entre procesos
+# sin arrastrar la imagen original que guardan los Results de ultralytics.
+Detections = namedtuple("Detections", "xyxy conf cls names")
+
+
+def to_detections(result):
+    boxes = result.boxes
+    return Detections(
+        xyxy=boxes.xyxy.cpu().numpy(),
+        conf=boxes.conf.cpu().numpy(),
+        cls=boxes.cls.cpu().numpy().astype(int),
+        names=result.names,
+    )
+
+
+class Histogram:
+    """Histograma acumulativo con límites fijos (el último cubo es +inf)."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            buckets = {f"le_{bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+            buckets["inf"] = self.counts[-1]
+            return {
+                "buckets": buckets,
+                "count": self.count,
+                "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            }
+
+
+class _Request:
+    __slots__ = ("image", "future", "enqueued")
+
+    def __init__(self, image):
+        self.image = image
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class BatchScheduler:
+    """Cola de imágenes que se envían al modelo por lotes."""
+
+    def __init__(self, predict, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.predict = predict
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.queue_wait_ms = Histogram([1, 2, 5, 10, 20, 50, 100, 250, 500, 1000])
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # El hilo no sobrevive a un fork: se arranca en el proceso que lo usa
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="yolo-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, image):
+        """Encola una imagen y devuelve un Future con su resultado."""
+        self._ensure_thread()
+        request = _Request(image)
+        self._queue.put(request)
+        return request.future
+
+    def infer(self, image, timeout=None):
+        """Inferencia de una imagen (bloquea hasta que su lote se procesa)."""
+        return self.submit(image).result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0].enqueued + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        now = time.monotonic()
+        for request in batch:
+            self.queue_wait_ms.observe((now - request.enqueued) * 1000)
+        self.batch_sizes.observe(len(batch))
+        try:
+            results = self.predict([request.image for request in batch])
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    def stats(self):
+        return {
+            "maxBatch": self.max_batch,
+            "maxWaitMs": self.max_wait * 1000,
+            "queued": self._queue.qsize(),
+            "batchSize": self.batch_sizes.snapshot(),
+            "queueWaitMs": self.queue_wait_ms.snapshot(),
+        }
+
+
+def _predict(images):
+    """Un lote de imágenes (arrays BGR) → lista de resultados de YOLO, en el mismo orden."""
+    return get_model()(images, verbose=False)
+
+
+scheduler = BatchScheduler(_predict)
+
+
+def detect(image):
+    """Detecciones de una imagen, pasando por el micro-batching en este proceso."""
+    return to_detections(scheduler.infer(image))
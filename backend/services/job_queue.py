@@ -0,0 +1,437 @@
+"""
+Cola persistente de trabajos de traducción de imágenes.
+
+Una petición síncrona a /api/braille-image ocupa un worker de gunicorn
+durante toda la inferencia y con imágenes grandes choca con su --timeout.
+Con la API de trabajos la petición sólo guarda la imagen en la cola y
+devuelve un id; un proceso aparte (JobRunner) la procesa y el cliente
+consulta el estado hasta que el resultado está listo.
+
+Colas (JOB_QUEUE):
+- "sqlite" (por defecto): tabla en un archivo local compartido por los
+  workers web y el proceso de trabajos (JOB_QUEUE_PATH, por defecto
+  backend/data/; no en /tmp, que se vacía al reiniciar con trabajos pendientes)
+- "mongo": colección image_jobs de MONGO_URI, con índice TTL
+
+Cada trabajo pasa por pendiente → procesando → completado | error. Al
+tomarlo, el runner lo reserva durante JOB_LEASE segundos; si el proceso
+muere, otro runner lo retoma al vencer la reserva (hasta JOB_MAX_ATTEMPTS
+intentos). Los resultados caducan JOB_RESULT_TTL segundos después de
+terminar.
+
+Arranque del runner (start.sh y gunicorn_start.sh lo lanzan con JOB_RUNNER=1;
+si corre en otra máquina o contenedor, JOB_RUNNER=1 también en los workers
+web: sin él la API de trabajos responde 503 en vez de encolar trabajos que
+nadie procesaría):
+  python backend/services/job_queue.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    # El runner se lanza como script desde la raíz del repositorio
+    sys.path.insert(0, _BACKEND_DIR)
+
+JOB_QUEUE = os.environ.get("JOB_QUEUE", "sqlite")
+JOB_RUNNER = os.environ.get("JOB_RUNNER", "0") == "1"
+JOB_QUEUE_PATH = os.environ.get(
+    "JOB_QUEUE_PATH", os.path.join(_BACKEND_DIR, "data", "easybraille_jobs.sqlite3")
+)
+JOB_MAX_QUEUE = int(os.environ.get("JOB_MAX_QUEUE", 1000))
+JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", 3600))  # segundos
+JOB_LEASE = int(os.environ.get("JOB_LEASE", 600))  # segundos
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 0.2))
+JOB_RETRY_AFTER = int(os.environ.get("JOB_RETRY_AFTER", 2))  # segundos
+
+PENDING, RUNNING, DONE, FAILED = "pendiente", "procesando", "completado", "error"
+
+# Latencias sobre los trabajos terminados en la última hora
+STATS_WINDOW = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload BLOB,
+    options TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    lease REAL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);
+"""
+
+
+class QueueFull(Exception):
+    """Hay demasiados trabajos pendientes."""
+
+    def __init__(self, retry_after=JOB_RETRY_AFTER):
+        super().__init__("Cola de trabajos llena")
+        self.retry_after = retry_after
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def _latency(waits, runs):
+    return {
+        "count": len(runs),
+        "queueWaitMs": {"avg": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                        "p95": round(_percentile(waits, 0.95), 1)},
+        "processingMs": {"avg": round(sum(runs) / len(runs), 1) if runs else 0.0,
+                         "p95": round(_percentile(runs, 0.95), 1)},
+    }
+
+
+class SQLiteJobQueue:
+    """Cola en un archivo SQLite compartido entre procesos."""
+
+    backend = "sqlite"
+
+    def __init__(self, path=JOB_QUEUE_PATH, max_queue=JOB_MAX_QUEUE, result_ttl=JOB_RESULT_TTL,
+                 lease=JOB_LEASE, max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db().executescript(_SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None or getattr(self._local, "pid", None) != os.getpid():
+            # Una conexión por hilo y por proceso, como en result_cache
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def enqueue(self, payload, options):
+        """Guarda la imagen y sus opciones; devuelve el id del trabajo."""
+        job_id = uuid.uuid4().hex
+        with self._transaction() as db:
+            depth = db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)).fetchone()[0]
+            if depth >= self.max_queue:
+                raise QueueFull()
+            db.execute(
+                "INSERT INTO jobs (id, status, payload, options, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, PENDING, bytes(payload), json.dumps(options), time.time()),
+            )
+        return job_id
+
+    def claim(self):
+        """Reserva el trabajo pendiente más antiguo (o uno con la reserva vencida)."""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT id, payload, options, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease < ?) ORDER BY created LIMIT 1",
+                (PENDING, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, payload, options, attempts = row
+            if attempts >= self.max_attempts:
+                self._finish(db, job_id, FAILED, error="Demasiados intentos")
+                return None
+            db.execute(
+                "UPDATE jobs SET status = ?, started = ?, lease = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, now, now + self.lease, job_id),
+            )
+        return job_id, payload, json.loads(options)
+
+    def _finish(self, db, job_id, status, result=None, error=None):
+        now = time.time()
+        # La imagen ya no hace falta: sólo se guarda el resultado hasta que caduque
+        db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, payload = NULL, finished = ?, "
+            "lease = NULL, expires = ? WHERE id = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+             error, now, now + self.result_ttl, job_id),
+        )
+
+    def complete(self, job_id, result):
+        with self._transaction() as db:
+            self._finish(db, job_id, DONE, result=result)
+
+    def fail(self, job_id, error):
+        with self._transaction() as db:
+            self._finish(db, job_id, FAILED, error=error)
+
+    def release(self, job_id):
+        """Devuelve un trabajo a la cola sin gastar el intento (p. ej. inferencia ocupada)."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, started = NULL, lease = NULL, attempts = attempts - 1 WHERE id = ?",
+                (PENDING, job_id),
+            )
+
+    def get(self, job_id):
+        row = self._db().execute(
+            "SELECT status, result, error, created, started, finished, expires FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None or (row[6] is not None and row[6] <= time.time()):
+            return None
+        status, result, error, created, started, finished, _ = row
+        return {
+            "estado": status,
+            "resultado": json.loads(result) if result is not None else None,
+            "error": error,
+            "creado": created,
+            "iniciado": started,
+            "terminado": finished,
+        }
+
+    def purge(self):
+        """Borra los trabajos caducados; devuelve cuántos."""
+        with self._transaction() as db:
+            return db.execute("DELETE FROM jobs WHERE expires <= ?", (time.time(),)).rowcount
+
+    def stats(self):
+        db = self._db()
+        counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        rows = db.execute(
+            "SELECT started - created, finished - started FROM jobs WHERE status = ? AND finished > ?",
+            (DONE, time.time() - STATS_WINDOW),
+        ).fetchall()
+        stats = {
+            "backend": self.backend,
+            "depth": counts.get(PENDING, 0),
+            "running": counts.get(RUNNING, 0),
+            "done": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "maxQueue": self.max_queue,
+            "resultTtl": self.result_ttl,
+        }
+        stats["latency"] = _latency([w * 1000 for w, _ in rows], [r * 1000 for _, r in rows])
+        return stats
+
+
+class MongoJobQueue:
+    """Cola en la colección image_jobs; Mongo borra los resultados caducados (índice TTL)."""
+
+    backend = "mongo"
+
+    def __init__(self, collection, max_queue=JOB_MAX_QUEUE, result_ttl=JOB_RESULT_TTL,
+                 lease=JOB_LEASE, max_attempts=JOB_MAX_ATTEMPTS):
+        self.jobs = collection
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.jobs.create_index([("status", 1), ("createdAt", 1)])
+        self.jobs.create_index("expiresAt", expireAfterSeconds=0)
+        self.jobs.create_index("finishedAt")
+
+    def enqueue(self, payload, options):
+        if self.jobs.count_documents({"status": PENDING}, limit=self.max_queue) >= self.max_queue:
+            raise QueueFull()
+        job_id = uuid.uuid4().hex
+        self.jobs.insert_one({
+            "_id": job_id,
+            "status": PENDING,
+            "payload": bytes(payload),
+            "options": options,
+            "attempts": 0,
+            "createdAt": datetime.utcnow(),
+        })
+        return job_id
+
+    def claim(self):
+        now = datetime.utcnow()
+        while True:
+            # find_one_and_update es atómico: dos runners no toman el mismo trabajo
+            doc = self.jobs.find_one_and_update(
+                {"$or": [{"status": PENDING}, {"status": RUNNING, "leaseUntil": {"$lt": now}}]},
+                {"$set": {"status": RUNNING, "startedAt": now,
+                          "leaseUntil": now + timedelta(seconds=self.lease)},
+                 "$inc": {"attempts": 1}},
+                sort=[("createdAt", 1)],
+            )
+            if doc is None:
+                return None
+            if doc["attempts"] >= self.max_attempts:
+                self._finish(doc["_id"], FAILED, error="Demasiados intentos")
+                continue
+            return doc["_id"], doc["payload"], doc["options"]
+
+    def _finish(self, job_id, status, result=None, error=None):
+        now = datetime.utcnow()
+        self.jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": status, "result": result, "error": error, "finishedAt": now,
+                      "expiresAt": now + timedelta(seconds=self.result_ttl)},
+             "$unset": {"payload": "", "leaseUntil": ""}},
+        )
+
+    def complete(self, job_id, result):
+        self._finish(job_id, DONE, result=result)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, FAILED, error=error)
+
+    def release(self, job_id):
+        self.jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": PENDING}, "$unset": {"startedAt": "", "leaseUntil": ""},
+             "$inc": {"attempts": -1}},
+        )
+
+    def get(self, job_id):
+        doc = self.jobs.find_one({"_id": job_id}, {"payload": 0})
+        # El monitor TTL de Mongo pasa cada minuto: se comprueba también aquí
+        if doc is None or (doc.get("expiresAt") and doc["expiresAt"] <= datetime.utcnow()):
+            return None
+
+        def ts(value):
+            return (value - datetime(1970, 1, 1)).total_seconds() if value else None
+
+        return {
+            "estado": doc["status"],
+            "resultado": doc.get("result"),
+            "error": doc.get("error"),
+            "creado": ts(doc.get("createdAt")),
+            "iniciado": ts(doc.get("startedAt")),
+            "terminado": ts(doc.get("finishedAt")),
+        }
+
+    def purge(self):
+        return 0  # lo hace el índice TTL
+
+    def stats(self):
+        counts = {row["_id"]: row["count"] for row in self.jobs.aggregate(
+            [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        )}
+        rows = list(self.jobs.aggregate([
+            {"$match": {"status": DONE,
+                        "finishedAt": {"$gt": datetime.utcnow() - timedelta(seconds=STATS_WINDOW)}}},
+            {"$project": {"_id": 0,
+                          "wait": {"$subtract": ["$startedAt", "$createdAt"]},
+                          "run": {"$subtract": ["$finishedAt", "$startedAt"]}}},
+        ]))
+        stats = {
+            "backend": self.backend,
+            "depth": counts.get(PENDING, 0),
+            "running": counts.get(RUNNING, 0),
+            "done": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "maxQueue": self.max_queue,
+            "resultTtl": self.result_ttl,
+        }
+        stats["latency"] = _latency([row["wait"] for row in rows], [row["run"] for row in rows])
+        return stats
+
+
+def _open_queue():
+    if JOB_QUEUE == "mongo":
+        from pymongo import MongoClient
+
+        uri = os.environ.get("MONGO_URI")
+        if not uri:
+            raise RuntimeError("MONGO_URI no está definido")
+        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+        return MongoJobQueue(client["easybraille"]["image_jobs"])
+    return SQLiteJobQueue()
+
+
+try:
+    job_queue = _open_queue()
+except Exception as e:
+    print(f"⚠️ Cola de trabajos no disponible ({JOB_QUEUE}): {e}")
+    job_queue = None
+
+
+class JobRunner:
+    """Hilos que toman trabajos de la cola y los traducen."""
+
+    def __init__(self, queue, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+
+    def _process(self, job_id, payload, options):
+        from services.inference_pool import InferenceBusy
+        from services.translate_service import translate_image_bytes
+
+        try:
+            result = translate_image_bytes(payload, tiled=options.get("tiled", False),
+                                           engine=options.get("engine", "yolo"))
+        except InferenceBusy as e:
+            self.queue.release(job_id)
+            time.sleep(e.retry_after)
+            return
+        except ValueError as e:
+            self.queue.fail(job_id, str(e))
+            return
+        except Exception as e:
+            print(f"❌ Error en el trabajo {job_id}: {e}")
+            self.queue.fail(job_id, "Error al procesar la imagen")
+            return
+        self.queue.complete(job_id, result)
+
+    def _loop(self, index):
+        last_purge = 0.0
+        while True:
+            try:
+                if index == 0 and time.monotonic() - last_purge > 60:
+                    self.queue.purge()
+                    last_purge = time.monotonic()
+                job = self.queue.claim()
+            except Exception as e:
+                print(f"⚠️ Error al leer la cola de trabajos: {e}")
+                time.sleep(1)
+                continue
+            if job is None:
+                time.sleep(self.poll_interval)
+                continue
+            self._process(*job)
+
+    def serve_forever(self):
+        threads = [threading.Thread(target=self._loop, args=(i,), name=f"job-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        print(f"✅ Runner de trabajos ({self.queue.backend}) con {self.workers} hilos")
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == "__main__":
+    if job_queue is None:
+        sys.exit(1)
+    JobRunner(job_queue).serve_forever()
@@ -0,0 +1,149 @@
+"""
+Registro único del modelo YOLO para todos los puntos de detección.
+
+El modelo se carga una sola vez por proceso, la primera vez que se pide
+(o al llamar a preload()), y se hace una inferencia de calentamiento para
+que la primera petición real no pague la inicialización. La carga está
+protegida con un lock para que varios hilos no carguen el mismo modelo a
+la vez. info() devuelve el tiempo de carga y la memoria usada.
+
+El backend de inferencia se elige con INFERENCE_BACKEND (torch, onnxruntime
+u openvino) e INFERENCE_INT8=1; para los dos últimos se carga el artefacto
+exportado junto a best.pt con yolov8_model/export.py.
+"""
+import os
+import resource
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL_PATH = os.environ.get(
+    "YOLO_MODEL_PATH", os.path.join(BACKEND_DIR, "yolov8_model", "best.pt")
+)
+WARMUP_SIZE = int(os.environ.get("YOLO_WARMUP_SIZE", 640))
+
+BACKENDS = ("torch", "onnxruntime", "openvino")
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+INFERENCE_INT8 = os.environ.get("INFERENCE_INT8") == "1"
+
+
+def _rss_bytes():
+    """Memoria residente actual del proceso (pico si /proc no está disponible)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def artifact_path(weights, backend=INFERENCE_BACKEND, int8=INFERENCE_INT8):
+    """
+    Ruta del modelo exportado a partir de los pesos .pt:
+    best.pt → best.onnx / best_int8.onnx / best_openvino_model / best_int8_openvino_model
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de inferencia no soportado: {backend}")
+    if backend == "torch":
+        return weights
+    stem = os.path.splitext(weights)[0] + ("_int8" if int8 else "")
+    return stem + ".onnx" if backend == "onnxruntime" else stem + "_openvino_model"
+
+
+def backend_of(path):
+    if path.endswith(".onnx"):
+        return "onnxruntime"
+    if path.rstrip(os.sep).endswith("_openvino_model"):
+        return "openvino"
+    return "torch"
+
+
+def resolve_path(path=None):
+    """
+    Ruta absoluta del modelo; las relativas se interpretan desde backend/.
+    Sin ruta explícita se usa el artefacto del backend configurado.
+    """
+    path = path or artifact_path(DEFAULT_MODEL_PATH)
+    if not os.path.isabs(path):
+        path = os.path.join(BACKEND_DIR, path)
+    return os.path.normpath(path)
+
+
+class ModelRegistry:
+    """Modelos YOLO cargados en este proceso, indexados por ruta."""
+
+    def __init__(self):
+        self._models = {}
+        self._info = {}
+        self._lock = threading.Lock()
+
+    def get(self, path=None):
+        """Devuelve el modelo, cargándolo y calentándolo la primera vez."""
+        path = resolve_path(path)
+        model = self._models.get(path)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(path)
+            if model is None:
+                model = self._load(path)
+                self._models[path] = model
+        return model
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No se encontró el modelo en {path}")
+
+        from ultralytics import YOLO  # importación diferida: tarda segundos
+
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        model = YOLO(path, task="detect")
+        loaded = time.perf_counter()
+        self._warm_up(model)
+        warmed = time.perf_counter()
+
+        self._info[path] = {
+            "path": path,
+            "backend": backend_of(path),
+            "loadSeconds": round(loaded - started, 3),
+            "warmupSeconds": round(warmed - loaded, 3),
+            "memoryMB": round((_rss_bytes() - rss_before) / (1024 * 1024), 1),
+            "loadedAt": time.time(),
+            "pid": os.getpid(),
+        }
+        print(f"✅ Modelo YOLO ({backend_of(path)}) cargado en {loaded - started:.2f}s "
+              f"(calentamiento {warmed - loaded:.2f}s): {path}")
+        return model
+
+    @staticmethod
+    def _warm_up(model):
+        """Inferencia sobre una imagen vacía para inicializar pesos y buffers."""
+        try:
+            import numpy as np
+            model(np.zeros((WARMUP_SIZE, WARMUP_SIZE, 3), dtype=np.uint8), verbose=False)
+        except Exception as e:
+            print(f"⚠️ Calentamiento del modelo fallido: {e}")
+
+    def preload(self, path=None):
+        """Carga explícita (p. ej. al arrancar el worker); devuelve su info."""
+        path = resolve_path(path)
+        self.get(path)
+        return self._info.get(path)
+
+    def info(self):
+        """Tiempo de carga y memoria de cada modelo cargado en este proceso."""
+        return list(self._info.values())
+
+    def is_loaded(self, path=None):
+        return resolve_path(path) in self._models
+
+
+registry = ModelRegistry()
+
+
+def get_model(path=None):
+    return registry.get(path)
+
+
+def preload(path=None):
+    return registry.preload(path)
@@ -0,0 +1,379 @@
+"""
+Caché de resultados compartida entre los workers de gunicorn.
+
+Los workers son procesos independientes, así que la caché vive en un
+archivo SQLite local (modo WAL) que todos abren a la vez:
+
+- clave: hash SHA-256 del contenido (texto traducido o bytes de la imagen)
+- LRU con TTL y límite de entradas y de bytes
+- single-flight: si varias peticiones piden la misma clave a la vez, sólo
+  una calcula el resultado y el resto espera a que aparezca en la caché
+- contadores de aciertos, fallos, desalojos y peticiones agrupadas
+
+Las lecturas son un SELECT sin bloqueo de escritura: los contadores y la
+hora de último acceso (que ordena el LRU) se acumulan en memoria y se
+escriben en una sola transacción cada FLUSH_EVERY lecturas o
+FLUSH_INTERVAL segundos. La hora de acceso sólo se actualiza si la
+guardada tiene más de ACCESS_RESOLUTION segundos.
+
+Si la caché no se puede abrir, `result_cache` queda en None y `cached()`
+calcula siempre el resultado.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+CACHE_PATH = os.environ.get(
+    "RESULT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "easybraille_cache.sqlite3")
+)
+CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 50000))
+CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 24 * 3600))  # segundos
+INFLIGHT_TIMEOUT = float(os.environ.get("RESULT_CACHE_INFLIGHT_TIMEOUT", 60))
+POLL_INTERVAL = 0.02
+FLUSH_EVERY = int(os.environ.get("RESULT_CACHE_FLUSH_EVERY", 100))  # lecturas
+FLUSH_INTERVAL = float(os.environ.get("RESULT_CACHE_FLUSH_INTERVAL", 5))  # segundos
+ACCESS_RESOLUTION = float(os.environ.get("RESULT_CACHE_ACCESS_RESOLUTION", 60))  # segundos
+
+COUNTERS = ("hits", "misses", "evictions", "coalesced", "entries", "bytes")
+
+_MISSING = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS inflight (
+    key TEXT PRIMARY KEY,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_key(namespace, *parts):
+    """Clave de caché: hash SHA-256 del espacio de nombres y del contenido."""
+    digest = hashlib.sha256(namespace.encode("utf-8"))
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+def file_signature(path):
+    """Identifica la versión de un archivo (p. ej. el modelo) para invalidar la caché al cambiarlo."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    return f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+
+
+class ResultCache:
+    """LRU con TTL sobre SQLite, compartida entre procesos."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 ttl=CACHE_TTL, inflight_timeout=INFLIGHT_TIMEOUT):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.inflight_timeout = inflight_timeout
+        self._local = threading.local()
+        # Agrupación entre hilos del mismo proceso (entre procesos: tabla inflight)
+        self._waiting = {}
+        self._waiting_lock = threading.Lock()
+        # Contadores y horas de acceso pendientes de escribir (por proceso)
+        self._pending = Counter()
+        self._touched = {}
+        self._pending_lock = threading.Lock()
+        self._flush_at = time.monotonic() + FLUSH_INTERVAL
+        self._db().executescript(_SCHEMA)
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                [(name,) for name in COUNTERS],
+            )
+
+    # --- conexión ----------------------------------------------------------
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None or getattr(self._local, "pid", None) != os.getpid():
+            # Una conexión por hilo y por proceso (gunicorn hace fork tras importar)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _incr(db, name, amount=1):
+        db.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    # --- lectura y escritura -----------------------------------------------
+
+    def _lookup(self, key, count):
+        """Lee la clave y suma 1 al contador `count` si está; un fallo sólo cuenta en las lecturas normales."""
+        now = time.time()
+        row = self._db().execute(
+            "SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            # Las entradas caducadas se borran al reescribirlas o al desalojar
+            if count == "hits":
+                self._note("misses")
+            return _MISSING
+        self._note(count, key if row[2] < now - ACCESS_RESOLUTION else None, now)
+        return json.loads(row[0])
+
+    def _note(self, count, key=None, now=None):
+        """Acumula un contador (y la hora de acceso de `key`) para la próxima escritura."""
+        with self._pending_lock:
+            self._pending[count] += 1
+            if key is not None:
+                self._touched[key] = now
+            due = (sum(self._pending.values()) >= FLUSH_EVERY
+                   or time.monotonic() >= self._flush_at)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Escribe en una transacción los contadores y horas de acceso acumulados."""
+        with self._pending_lock:
+            pending, touched = self._pending, self._touched
+            self._pending, self._touched = Counter(), {}
+            self._flush_at = time.monotonic() + FLUSH_INTERVAL
+        if not pending and not touched:
+            return
+        try:
+            with self._transaction() as db:
+                db.executemany(
+                    "UPDATE entries SET accessed = MAX(accessed, ?) WHERE key = ?",
+                    [(accessed, key) for key, accessed in touched.items()],
+                )
+                db.executemany(
+                    "UPDATE counters SET value = value + ? WHERE name = ?",
+                    [(amount, name) for name, amount in pending.items()],
+                )
+        except sqlite3.Error as e:
+            # Sólo son métricas y el orden del LRU: se pierden, la lectura ya se sirvió
+            print(f"⚠️ Error guardando los contadores de la caché: {e}")
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado o `default` (cuenta acierto o fallo)."""
+        value = self._lookup(key, "hits")
+        return default if value is _MISSING else value
+
+    def set(self, key, value):
+        """Guarda un valor serializable en JSON y desaloja lo más antiguo si hace falta."""
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        now = time.time()
+        with self._transaction() as db:
+            self._delete(db, "key = ?", (key,))
+            db.execute(
+                "INSERT INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now + self.ttl, now),
+            )
+            self._incr(db, "entries")
+            self._incr(db, "bytes", len(data))
+            self._evict(db, now)
+
+    @classmethod
+    def _delete(cls, db, where, params=()):
+        """Borra entradas y descuenta su tamaño; devuelve cuántas se borraron."""
+        count, size = db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE {where}", params
+        ).fetchone()
+        if count:
+            db.execute(f"DELETE FROM entries WHERE {where}", params)
+            cls._incr(db, "entries", -count)
+            cls._incr(db, "bytes", -size)
+        return count
+
+    @staticmethod
+    def _totals(db):
+        return db.execute(
+            "SELECT (SELECT value FROM counters WHERE name = 'entries'), "
+            "(SELECT value FROM counters WHERE name = 'bytes')"
+        ).fetchone()
+
+    def _evict(self, db, now):
+        entries, size = self._totals(db)
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        evicted = self._delete(db, "expires <= ?", (now,))
+        entries, size = self._totals(db)
+        while entries > self.max_entries or size > self.max_bytes:
+            # Desaloja en bloques las entradas usadas hace más tiempo
+            batch = max(entries - self.max_entries, 1, entries // 100)
+            removed = self._delete(
+                db, "key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)", (batch,)
+            )
+            if not removed:
+                break
+            evicted += removed
+            entries, size = self._totals(db)
+        if evicted:
+            self._incr(db, "evictions", evicted)
+
+    # --- single-flight -----------------------------------------------------
+
+    def _claim(self, key):
+        """Marca la clave como en cálculo; False si otro proceso ya la está calculando."""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM inflight WHERE key = ? AND started < ?",
+                (key, now - self.inflight_timeout),
+            )
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO inflight (key, started) VALUES (?, ?)", (key, now)
+            )
+            return cursor.rowcount == 1
+
+    def _release(self, key):
+        self._db().execute("DELETE FROM inflight WHERE key = ?", (key,))
+
+    def _in_flight(self, key):
+        row = self._db().execute("SELECT started FROM inflight WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] >= time.time() - self.inflight_timeout
+
+    def _wait_for(self, key):
+        """Espera a que otro proceso termine de calcular la clave."""
+        deadline = time.monotonic() + self.inflight_timeout
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = self._lookup(key, "coalesced")
+            if value is not _MISSING:
+                return value
+            if not self._in_flight(key):
+                break  # el otro proceso falló: se calcula aquí
+        return _MISSING
+
+    def get_or_compute(self, key, compute):
+        """
+        Devuelve el valor de la clave; si no está, lo calcula una sola vez
+        aunque lleguen peticiones iguales a la vez desde otros hilos o workers.
+        """
+        value = self._lookup(key, "hits")
+        if value is not _MISSING:
+            return value
+
+        with self._waiting_lock:
+            event = self._waiting.get(key)
+            leader = event is None
+            if leader:
+                event = self._waiting[key] = threading.Event()
+        if not leader:
+            event.wait(self.inflight_timeout)
+            value = self._lookup(key, "coalesced")
+            if value is not _MISSING:
+                return value
+            return compute()
+
+        try:
+            if not self._claim(key):
+                value = self._wait_for(key)
+                if value is not _MISSING:
+                    return value
+                self._claim(key)
+            try:
+                value = compute()
+                try:
+                    self.set(key, value)
+                except sqlite3.Error as e:
+                    # El resultado ya está calculado: se devuelve aunque no se guarde
+                    print(f"⚠️ Error guardando en la caché de resultados: {e}")
+                return value
+            finally:
+                try:
+                    self._release(key)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Error liberando la clave en la caché de resultados: {e}")
+        finally:
+            with self._waiting_lock:
+                self._waiting.pop(key, None)
+            event.set()
+
+    # --- métricas ----------------------------------------------------------
+
+    def stats(self):
+        """Contadores compartidos por todos los workers (lo pendiente de otros workers aún no cuenta)."""
+        self.flush()
+        rows = self._db().execute("SELECT name, value FROM counters").fetchall()
+        stats = dict(rows)
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hitRate"] = round(stats.get("hits", 0) / lookups, 4) if lookups else 0.0
+        stats["maxEntries"] = self.max_entries
+        stats["maxBytes"] = self.max_bytes
+        stats["ttl"] = self.ttl
+        return stats
+
+    def clear(self):
+        with self._pending_lock:
+            self._pending, self._touched = Counter(), {}
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM inflight")
+            db.execute("UPDATE counters SET value = 0")
+
+
+try:
+    result_cache = ResultCache()
+except Exception as e:
+    print(f"⚠️ Caché de resultados no disponible ({CACHE_PATH}): {e}")
+    result_cache = None
+
+
+def cached(namespace, parts, compute):
+    """
+    Atajo para los servicios: calcula `compute()` a través de la caché
+    compartida, o directamente si la caché no está disponible o falla antes
+    de calcular (un error de `compute()` se propaga, no se repite).
+    """
+    if result_cache is None:
+        return compute()
+    key = make_key(namespace, *parts)
+    started = False
+
+    def run():
+        nonlocal started
+        started = True
+        return compute()
+
+    try:
+        return result_cache.get_or_compute(key, run)
+    except sqlite3.Error as e:
+        if started:
+            raise
+        print(f"⚠️ Error en la caché de resultados: {e}")
+        return compute()
@@ -1,19 +1,330 @@
-import json
+"""
+Estadísticas del panel de administración, materializadas en MongoDB.
+
+En vez de contar las colecciones users y translations en cada carga del
+panel, cada alta de usuario y cada traducción guardada suma 1 con $inc a
+unos contadores de la colección stats (un documento por contador):
+
+- total:users, total:users-active, total:translations
+- role:<rol> y type:<tipo de traducción>
+- users-month:AAAA-MM y translations-month:AAAA-MM (gráficas de 6 meses)
+- translations-hour:AAAA-MM-DDTHH para "esta semana" (caducan a los 8
+  días con un índice TTL)
+
+admin_stats() lee esos documentos con una sola consulta acotada (no
+depende del tamaño de las colecciones) y guarda la respuesta
+STATS_CACHE_TTL segundos en memoria del proceso.
+
+Los contadores pueden desviarse (escrituras que fallan a medias, cambios
+de rol o de isActive hechos directamente en la base de datos). Un hilo los
+recalcula desde las colecciones cada STATS_RECONCILE_INTERVAL segundos; un
+documento de bloqueo evita que varios workers lo hagan a la vez y guarda
+cuándo terminó la última reconciliación. El bloqueo se libera al terminar
+o fallar y vence solo a los STATS_RECONCILE_LOCK_TIMEOUT segundos si el
+worker muere a medias. Si la colección stats está vacía (primer arranque)
+se recalcula antes de responder; si no se puede, admin_stats() devuelve
+None y el endpoint calcula directamente sobre las colecciones.
+"""
 import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", 10))  # segundos
+STATS_RECONCILE_INTERVAL = int(os.environ.get("STATS_RECONCILE_INTERVAL", 3600))  # segundos
+STATS_RECONCILE_LOCK_TIMEOUT = int(os.environ.get("STATS_RECONCILE_LOCK_TIMEOUT", 600))  # segundos
+MONTHS = 6
+HOUR_BUCKET_TTL = timedelta(days=8)
+
+_LOCK_ID = "reconcile-lock"
+
+
+def _month(dt):
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+
+def _hour(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _months_back(now, count=MONTHS):
+    """Claves AAAA-MM de los últimos `count` meses anteriores al actual y del actual."""
+    year, month = now.year, now.month
+    keys = []
+    for _ in range(count + 1):
+        keys.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return keys[::-1]
+
+
+def _month_series(counts, keys):
+    """Mismo formato que el $group por año y mes que devolvía la agregación."""
+    return [{"_id": {"year": int(key[:4]), "month": int(key[5:])}, "count": counts[key]}
+            for key in keys if counts.get(key)]
+
+
+class AdminStats:
+    """Contadores materializados de usuarios y traducciones."""
+
+    def __init__(self, collection, users, translations, cache_ttl=STATS_CACHE_TTL):
+        self.stats = collection
+        self.users = users
+        self.translations = translations
+        self.cache_ttl = cache_ttl
+        self._cached = None
+        self._cached_until = 0.0
+        self._cache_lock = threading.Lock()
+        self._thread = None
+        self.stats.create_index("expireAt", expireAfterSeconds=0)
+        self.stats.create_index("kind")
+
+    # Escrituras incrementales
+
+    def _apply(self, increments, now):
+        ops = []
+        for (kind, key), count in increments.items():
+            fields = {"kind": kind, "key": key}
+            if kind == "translations-hour":
+                fields["expireAt"] = key + HOUR_BUCKET_TTL
+                key = key.strftime("%Y-%m-%dT%H")
+            ops.append(UpdateOne({"_id": f"{kind}:{key}"},
+                                 {"$inc": {"count": count}, "$set": {"updatedAt": now},
+                                  "$setOnInsert": fields},
+                                 upsert=True))
+        if ops:
+            self.stats.bulk_write(ops, ordered=False)
+
+    def record_user(self, user):
+        """Suma un usuario recién registrado (el documento insertado en users)."""
+        created = user.get("createdAt") or datetime.utcnow()
+        increments = Counter({("total", "users"): 1, ("role", user.get("role", "user")): 1,
+                              ("users-month", _month(created)): 1})
+        if user.get("isActive", True):
+            increments[("total", "users-active")] += 1
+        try:
+            self._apply(increments, datetime.utcnow())
+        except Exception as e:
+            # El registro ya está guardado; el reconciliador corregirá el contador
+            print(f"⚠️ Error actualizando estadísticas de usuarios: {e}")
+
+    def record_translations(self, docs):
+        """Suma las traducciones insertadas (una o un lote) en una sola escritura."""
+        increments = Counter()
+        for doc in docs:
+            created = doc.get("createdAt") or datetime.utcnow()
+            increments[("total", "translations")] += 1
+            increments[("type", doc.get("translationType"))] += 1
+            increments[("translations-month", _month(created))] += 1
+            increments[("translations-hour", _hour(created))] += 1
+        try:
+            self._apply(increments, datetime.utcnow())
+        except Exception as e:
+            print(f"⚠️ Error actualizando estadísticas de traducciones: {e}")
+
+    # Lectura
+
+    def admin_stats(self):
+        """
+        Estadísticas del panel (mismo formato que /api/admin/stats), con caché
+        en memoria; None si los contadores aún no existen y no se pudieron
+        materializar (otro worker los está calculando o la reconciliación falló).
+        """
+        with self._cache_lock:
+            if self._cached is not None and time.monotonic() < self._cached_until:
+                return self._cached
+        value = self._read()
+        if value is None:
+            # Colección stats vacía: se materializa antes de responder
+            try:
+                if self.reconcile():
+                    value = self._read()
+            except Exception as e:
+                print(f"⚠️ Error reconciliando estadísticas: {e}")
+            if value is None:
+                return None
+        with self._cache_lock:
+            self._cached, self._cached_until = value, time.monotonic() + self.cache_ttl
+        return value
+
+    def _read(self):
+        now = datetime.utcnow()
+        months = _months_back(now)
+        week_start = _hour(now - timedelta(days=7))
+        docs = list(self.stats.find(
+            {"$or": [
+                {"kind": {"$in": ["total", "role", "type"]}},
+                {"_id": {"$in": [f"users-month:{m}" for m in months] +
+                                [f"translations-month:{m}" for m in months]}},
+                {"kind": "translations-hour", "key": {"$gte": week_start}},
+            ]},
+            {"kind": 1, "key": 1, "count": 1},
+        ))
+        counts = {}
+        for doc in docs:
+            counts.setdefault(doc["kind"], Counter())[doc["key"]] += doc.get("count", 0)
+        totals = counts.get("total", Counter())
+        if "users" not in totals:
+            return None
+        roles = counts.get("role", Counter())
+        return self._format(
+            totals, roles, counts.get("type", Counter()),
+            _month_series(counts.get("users-month", {}), months),
+            _month_series(counts.get("translations-month", {}), months),
+            sum(counts.get("translations-hour", Counter()).values()),
+        )
+
+    @staticmethod
+    def _format(totals, roles, types, users_months, translations_months, this_week):
+        total_translations = totals["translations"]
+        return {
+            "users": {
+                "total": totals["users"],
+                "active": totals["users-active"],
+                "admins": roles["admin"],
+                "regular": roles["user"],
+                "last6Months": users_months,
+            },
+            "translations": {
+                "total": total_translations,
+                "thisWeek": this_week,
+                "byType": [{"_id": t, "count": c} for t, c in types.items() if c],
+                "last6Months": translations_months,
+            },
+            "ai": {
+                "totalInteractions": total_translations,
+                # Valores de ejemplo (aún no se miden)
+                "avgAccuracy": 95.5,
+                "avgResponseTime": 1.2,
+                "successRate": 98.0,
+            },
+        }
+
+    # Reconciliación
+
+    def _acquire(self, now, min_age):
+        """
+        Bloqueo entre workers: sólo uno recalcula a la vez y, con `min_age`,
+        sólo si la última reconciliación terminó hace más de `min_age` segundos.
+        """
+        # $lte: las fechas BSON tienen resolución de milisegundos y un bloqueo
+        # liberado en el mismo milisegundo también tiene que poder tomarse
+        query = {"_id": _LOCK_ID, "until": {"$lte": now}}
+        if min_age:
+            query["done"] = {"$not": {"$gte": now - timedelta(seconds=min_age)}}
+        try:
+            self.stats.find_one_and_update(
+                query,
+                {"$set": {"until": now + timedelta(seconds=STATS_RECONCILE_LOCK_TIMEOUT)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # El documento existe y no cumple la condición: otro worker tiene el
+            # bloqueo o la última reconciliación es reciente
+            return False
+
+    def _release(self, started, done=False):
+        # Vence en el momento en que se tomó: cualquier intento posterior lo consigue
+        fields = {"until": started}
+        if done:
+            fields["done"] = started
+        try:
+            self.stats.update_one({"_id": _LOCK_ID}, {"$set": fields})
+        except Exception as e:
+            # El bloqueo vencerá solo a los STATS_RECONCILE_LOCK_TIMEOUT segundos
+            print(f"⚠️ Error liberando el bloqueo de estadísticas: {e}")
+
+    def reconcile(self, min_age=0):
+        """Recalcula todos los contadores desde users y translations. Devuelve si lo hizo."""
+        now = datetime.utcnow()
+        if not self._acquire(now, min_age):
+            return False
+        try:
+            self._reconcile(now)
+        except BaseException:
+            self._release(now)
+            raise
+        self._release(now, done=True)
+        return True
+
+    def _reconcile(self, now):
+        started = time.perf_counter()
+        months = _months_back(now)
+        since = datetime(int(months[0][:4]), int(months[0][5:]), 1)
+        week_start = _hour(now - timedelta(days=7))
+
+        def by_month(collection):
+            return collection.aggregate([
+                {"$match": {"createdAt": {"$gte": since}}},
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$createdAt"}},
+                            "count": {"$sum": 1}}},
+            ])
+
+        values = {
+            ("total", "users"): self.users.count_documents({}),
+            ("total", "users-active"): self.users.count_documents({"isActive": True}),
+            ("total", "translations"): self.translations.count_documents({}),
+        }
+        for doc in self.users.aggregate([{"$group": {"_id": "$role", "count": {"$sum": 1}}}]):
+            values[("role", doc["_id"])] = doc["count"]
+        for doc in self.translations.aggregate([{"$group": {"_id": "$translationType",
+                                                            "count": {"$sum": 1}}}]):
+            values[("type", doc["_id"])] = doc["count"]
+        for doc in by_month(self.users):
+            values[("users-month", doc["_id"])] = doc["count"]
+        for doc in by_month(self.translations):
+            values[("translations-month", doc["_id"])] = doc["count"]
+        for doc in self.translations.aggregate([
+            {"$match": {"createdAt": {"$gte": week_start}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$createdAt"}},
+                        "count": {"$sum": 1}}},
+        ]):
+            values[("translations-hour", datetime.strptime(doc["_id"], "%Y-%m-%dT%H"))] = doc["count"]
 
-STATS_FILE = "backend/stats.json"
+        ops = []
+        for (kind, key), count in values.items():
+            fields = {"kind": kind, "key": key, "count": count, "updatedAt": now}
+            if kind == "translations-hour":
+                fields["expireAt"] = key + HOUR_BUCKET_TTL
+                key = key.strftime("%Y-%m-%dT%H")
+            ops.append(UpdateOne({"_id": f"{kind}:{key}"}, {"$set": fields}, upsert=True))
+        # Contadores que ya no tienen documentos (p. ej. un rol que nadie usa) vuelven a 0
+        fresh = [f"{kind}:{key.strftime('%Y-%m-%dT%H') if kind == 'translations-hour' else key}"
+                 for kind, key in values]
+        stale = {"kind": {"$in": ["total", "role", "type"]}, "_id": {"$nin": fresh}}
+        self.stats.bulk_write(ops, ordered=False)
+        self.stats.update_many(stale, {"$set": {"count": 0, "updatedAt": now}})
+        self.stats.update_many(
+            {"kind": {"$in": ["users-month", "translations-month"]},
+             "key": {"$in": months}, "_id": {"$nin": fresh}},
+            {"$set": {"count": 0, "updatedAt": now}},
+        )
+        self.stats.update_many(
+            {"kind": "translations-hour", "key": {"$gte": week_start}, "_id": {"$nin": fresh}},
+            {"$set": {"count": 0, "updatedAt": now}},
+        )
+        with self._cache_lock:
+            self._cached = None
+        print(f"✅ Estadísticas reconciliadas en {time.perf_counter() - started:.2f}s")
 
-def load_stats():
-    if not os.path.exists(STATS_FILE):
-        return {"total_translations": 0}
-    with open(STATS_FILE, "r") as f:
-        return json.load(f)
+    def start_reconciler(self, interval=STATS_RECONCILE_INTERVAL):
+        """Hilo de fondo que reconcilia cada `interval` segundos (si no lo ha hecho otro worker)."""
+        if self._thread is not None or interval <= 0:
+            return
 
-def save_stats(stats):
-    with open(STATS_FILE, "w") as f:
-        json.dump(stats, f)
+        def loop():
+            while True:
+                try:
+                    self.reconcile(min_age=interval)
+                except Exception as e:
+                    print(f"⚠️ Error reconciliando estadísticas: {e}")
+                # Se comprueba más a menudo que el intervalo: si falla, otro
+                # worker (o este) lo reintenta sin esperar un intervalo entero
+                time.sleep(min(interval, 300))
 
-def increment_translations():
-    stats = load_stats()
-    stats["total_translations"] = stats.get("total_translations", 0) + 1
-    save_stats(stats)
+        self._thread = threading.Thread(target=loop, name="stats-reconciler", daemon=True)
+        self._thread.start()
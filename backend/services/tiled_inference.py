@@ -0,0 +1,89 @@
+"""
+Inferencia por mosaicos para páginas escaneadas en alta resolución.
+
+Reducir un A4 a 300 ppp (≈2480×3508) a 640 px hace desaparecer los puntos,
+y pasarlo entero por el modelo es lento y consume mucha memoria. Aquí la
+página se corta en mosaicos de TILE_SIZE px que se solapan TILE_OVERLAP px.
+Los mosaicos se envían en paralelo (TILE_PARALLEL a la vez) para que el
+micro-batching o el pool de inferencia los agrupen en lotes. Las cajas
+repetidas en las costuras se fusionan con NMS.
+
+Memoria: los mosaicos son vistas de la página (no se copian) y sólo hay
+TILE_PARALLEL en vuelo; la página decodificada se limita a TILE_MAX_PIXELS.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.inference_pool import detect
+from services.inference_scheduler import MAX_BATCH, Detections
+
+TILE_SIZE = int(os.environ.get("TILE_SIZE", 640))
+TILE_OVERLAP = int(os.environ.get("TILE_OVERLAP", 128))
+TILE_PARALLEL = int(os.environ.get("TILE_PARALLEL", MAX_BATCH))
+TILE_MERGE_THRESHOLD = float(os.environ.get("TILE_MERGE_THRESHOLD", 0.5))
+TILE_MAX_PIXELS = int(os.environ.get("TILE_MAX_PIXELS", 40_000_000))
+
+
+def tile_origins(length, size, overlap):
+    """Inicios de los mosaicos en un eje; el último queda pegado al borde."""
+    if length <= size:
+        return [0]
+    stride = max(1, size - overlap)
+    origins = list(range(0, length - size, stride))
+    origins.append(length - size)
+    return origins
+
+
+def tile_grid(height, width, size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """(x, y) de la esquina superior izquierda de cada mosaico, por filas."""
+    return [(x, y)
+            for y in tile_origins(height, size, overlap)
+            for x in tile_origins(width, size, overlap)]
+
+
+def merge_detections(xyxy, conf, threshold=TILE_MERGE_THRESHOLD):
+    """
+    NMS sin distinguir clases: dos celdas Braille no pueden ocupar el mismo
+    sitio. Se usa intersección sobre la caja menor (no IoU) porque en una
+    costura uno de los mosaicos sólo ve la celda cortada. Devuelve los
+    índices conservados, de mayor a menor confianza.
+    """
+    x1, y1, x2, y2 = xyxy.T
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.argsort(-conf, kind="stable")
+    keep = []
+    while order.size:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        w = np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])
+        h = np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])
+        inter = np.maximum(w, 0) * np.maximum(h, 0)
+        smaller = np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+        order = rest[inter / smaller <= threshold]
+    return np.asarray(keep, dtype=int)
+
+
+def detect_tiled(image, size=TILE_SIZE, overlap=TILE_OVERLAP, parallel=TILE_PARALLEL,
+                 threshold=TILE_MERGE_THRESHOLD):
+    """Detecciones de una página completa, en coordenadas de `image`."""
+    height, width = image.shape[:2]
+    origins = tile_grid(height, width, size, overlap)
+
+    def run(origin):
+        x, y = origin
+        return detect(image[y:y + size, x:x + size])
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="tile") as executor:
+        results = list(executor.map(run, origins))
+
+    offsets = np.repeat(
+        np.asarray(origins, dtype=np.float32)[:, [0, 1, 0, 1]],
+        [len(r.cls) for r in results], axis=0,
+    )
+    xyxy = np.concatenate([r.xyxy.reshape(-1, 4) for r in results]) + offsets
+    conf = np.concatenate([r.conf for r in results])
+    cls = np.concatenate([r.cls for r in results]).astype(int)
+    keep = merge_detections(xyxy, conf, threshold)
+    return Detections(xyxy=xyxy[keep], conf=conf[keep], cls=cls[keep], names=results[0].names)
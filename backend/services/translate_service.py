@@ -1,26 +1,126 @@
-from ultralytics import YOLO
-import cv2
-import numpy as np
-from utils.braille_translator import braille_to_text
+from utils.postprocess import VERSION as POSTPROCESS_VERSION, detections_to_text
+from utils.image_utils import decode_full, decode_image, letterbox
+from services.result_cache import cached, file_signature
+from services.model_registry import resolve_path
+from services.inference_pool import detect
+from services.tiled_inference import TILE_MAX_PIXELS, detect_tiled
+from services.image_cache import near_duplicate
+from services.dot_detector import MIN_CONFIDENCE as DOT_MIN_CONFIDENCE, detect_dots
 
-# Cargar modelo YOLOv8 entrenado
-model = YOLO("backend/yolov8_model/best.pt")
+# Modelo YOLOv8 entrenado (se carga una vez por proceso en el registro)
+MODEL_PATH = resolve_path()
+
+# Lado de la entrada del modelo (imgsz del entrenamiento)
+MODEL_INPUT = 640
+
+# Motores de detección: YOLO o el detector clásico de puntos (con vuelta a YOLO)
+ENGINES = ("yolo", "dots")
 
 def translate_image(image_file):
     # Leer imagen desde archivo en memoria
-    img_array = np.frombuffer(image_file.read(), np.uint8)
-    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-
-    # Ejecutar detección
-    results = model(img)
-
-    # Extraer las clases detectadas
-    labels = []
-    for r in results:
-        for box in r.boxes:
-            cls = int(box.cls)
-            labels.append(model.names[cls])  # Obtener nombre de la clase
-
-    # Traducir Braille a texto
-    texto = braille_to_text(labels)
-    return texto
+    data = image_file.read()
+    return translate_image_bytes(data)["texto"]
+
+def translate_image_bytes(data, tiled=False, engine="yolo"):
+    """
+    Texto y detecciones de una imagen (bytes o memoryview, sin copiarla).
+    Con `tiled` la imagen se procesa a resolución completa por mosaicos
+    (páginas escaneadas). Con engine="dots" se prueba antes el detector
+    clásico de puntos. Imágenes idénticas comparten resultado a través de la caché.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de detección no soportado: {engine}")
+    if engine == "dots":
+        return cached("image-dots", [file_signature(MODEL_PATH), POSTPROCESS_VERSION, str(tiled), data],
+                      lambda: _detect_dots(data, tiled))
+    if tiled:
+        return cached("image-tiled", [file_signature(MODEL_PATH), POSTPROCESS_VERSION, data], lambda: _detect_tiled(data))
+    return cached("image", [file_signature(MODEL_PATH), POSTPROCESS_VERSION, data], lambda: _detect(data))
+
+def _detect(data):
+    # Una sola decodificación (reducida si la foto es muy grande)
+    img, factor = decode_image(data, MODEL_INPUT)
+    return _yolo(img, factor)
+
+def _yolo(img, factor):
+    def compute():
+        canvas, scale, (left, top) = letterbox(img, MODEL_INPUT)
+        # Ejecutar detección (en el pool de inferencia o en lote dentro del proceso)
+        detections = detect(canvas)
+        return _response(detections, factor / scale, left, top, img.shape, factor)
+
+    # Una imagen casi idéntica ya procesada (recomprimida, redimensionada) se reutiliza
+    return _fit(near_duplicate(_namespace("image"), img, compute), img.shape, factor)
+
+def _detect_tiled(data):
+    # Resolución completa (con tope de píxeles) y mosaicos solapados
+    img, factor = decode_full(data, TILE_MAX_PIXELS)
+    return _yolo_tiled(img, factor)
+
+def _yolo_tiled(img, factor):
+    def compute():
+        return _response(detect_tiled(img), factor, 0, 0, img.shape, factor)
+
+    return _fit(near_duplicate(_namespace("image-tiled"), img, compute), img.shape, factor)
+
+def _detect_dots(data, tiled):
+    # Los puntos necesitan resolución: se decodifica como para los mosaicos
+    img, factor = decode_full(data, TILE_MAX_PIXELS)
+    return translate_page(img, factor, tiled, "dots")
+
+def translate_page(img, factor=1, tiled=False, engine="yolo"):
+    """
+    Texto y detecciones de una imagen ya decodificada (p. ej. una página de
+    un documento). `factor` es la reducción aplicada al decodificarla.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de detección no soportado: {engine}")
+    if engine == "yolo":
+        return _yolo_tiled(img, factor) if tiled else _yolo(img, factor)
+    detections, fit = detect_dots(img)
+    if detections is None or fit["confidence"] < DOT_MIN_CONFIDENCE:
+        # Rejilla poco fiable (foto, papel sucio, no es Braille): se usa YOLO
+        result = _yolo_tiled(img, factor) if tiled else _yolo(img, factor)
+    else:
+        result = _response(detections, factor, 0, 0, img.shape, factor, angle=fit["angle"], engine="dots")
+    result["ajusteRejilla"] = round(fit["confidence"], 3)
+    return result
+
+def _namespace(mode):
+    return f"{mode}:{file_signature(MODEL_PATH)}:{POSTPROCESS_VERSION}"
+
+def _fit(result, shape, factor):
+    """Reescala las cajas de un resultado reutilizado al tamaño de esta imagen."""
+    width, height = shape[1] * factor, shape[0] * factor
+    if (result["ancho"], result["alto"]) == (width, height):
+        return result
+    sx, sy = width / result["ancho"], height / result["alto"]
+    for det in result["detecciones"]:
+        x1, y1, x2, y2 = det["caja"]
+        det["caja"] = [round(x1 * sx, 1), round(y1 * sy, 1), round(x2 * sx, 1), round(y2 * sy, 1)]
+    result["ancho"], result["alto"] = width, height
+    return result
+
+def _response(detections, ratio, left, top, shape, factor, angle=0.0, engine="yolo"):
+    # Orden de lectura (líneas y palabras) y traducción a texto
+    texto, order = detections_to_text(detections, angle=angle)
+
+    # Cajas en orden de lectura y en coordenadas de la imagen original
+    detecciones = [
+        {
+            "clase": detections.names[int(cls)],
+            "confianza": round(float(conf), 4),
+            "caja": [round((x1 - left) * ratio, 1), round((y1 - top) * ratio, 1),
+                     round((x2 - left) * ratio, 1), round((y2 - top) * ratio, 1)],
+        }
+        for (x1, y1, x2, y2), conf, cls in zip(
+            detections.xyxy[order].tolist(), detections.conf[order], detections.cls[order]
+        )
+    ]
+    return {
+        "texto": texto,
+        "detecciones": detecciones,
+        "ancho": shape[1] * factor,
+        "alto": shape[0] * factor,
+        "motor": engine,
+    }
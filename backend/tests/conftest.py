@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Los módulos del backend se importan como en app.py (utils.…, services.…)
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
@@ -0,0 +1,136 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import ai_client
+
+
+class StubService:
+    """Servidor HTTP local que responde con la lista de respuestas dada, una por petición."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.requests.append((self.path, body))
+                status, headers = stub.responses.pop(0) if stub.responses else (200, {})
+                payload = json.dumps({"texto": "hola"} if status == 200 else {"error": status}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Esperas entre reintentos, registradas en vez de dormir."""
+    delays = []
+    monkeypatch.setattr(ai_client.time, "sleep", delays.append)
+    return delays
+
+
+def make_client(url, **kwargs):
+    return ai_client.AIClient(url, timeout=5, **kwargs)
+
+
+def test_endpoint_appends_path():
+    assert ai_client._endpoint("http://x/") == "http://x/api/braille-image"
+    assert ai_client._endpoint("http://x/api/braille-image") == "http://x/api/braille-image"
+    with pytest.raises(ValueError):
+        ai_client._endpoint("")
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504, 429])
+def test_retries_5xx_and_429(status, sleeps):
+    with StubService([(status, {}), (status, {})]) as stub:
+        client = make_client(stub.url, retries=3)
+        assert client.send_image(b"jpeg") == {"texto": "hola"}
+        client.close()
+    assert len(stub.requests) == 3
+    assert len(sleeps) == 2
+    # Cada reintento envía la misma imagen al mismo endpoint
+    assert {path for path, _ in stub.requests} == {"/api/braille-image"}
+    assert all(b'filename="image.jpg"' in body and b"jpeg" in body for _, body in stub.requests)
+
+
+def test_gives_up_after_retries(sleeps):
+    with StubService([(503, {})] * 5) as stub:
+        client = make_client(stub.url, retries=2)
+        with pytest.raises(requests.HTTPError) as info:
+            client.send_image(b"jpeg")
+        client.close()
+    assert info.value.response.status_code == 503
+    assert len(stub.requests) == 3
+    assert len(sleeps) == 2
+
+
+def test_honours_retry_after(sleeps):
+    with StubService([(429, {"Retry-After": "3"}), (503, {"Retry-After": "1"})]) as stub:
+        client = make_client(stub.url, retries=3, backoff=0.01)
+        assert client.send_image(b"jpeg") == {"texto": "hola"}
+        client.close()
+    assert sleeps == [3.0, 1.0]
+
+
+def test_retry_after_is_capped(sleeps):
+    with StubService([(503, {"Retry-After": "3600"})]) as stub:
+        client = make_client(stub.url, retries=1)
+        client.send_image(b"jpeg")
+        client.close()
+    assert sleeps == [ai_client.MAX_BACKOFF]
+
+
+def test_backoff_without_retry_after_is_bounded(sleeps):
+    with StubService([(502, {})] * 3) as stub:
+        client = make_client(stub.url, retries=3, backoff=0.5)
+        client.send_image(b"jpeg")
+        client.close()
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(ai_client.MAX_BACKOFF, 0.5 * 2 ** attempt)
+
+
+@pytest.mark.parametrize("status", [400, 401, 404, 413, 422])
+def test_no_retry_on_4xx(status, sleeps):
+    with StubService([(status, {})]) as stub:
+        client = make_client(stub.url, retries=3)
+        with pytest.raises(requests.HTTPError) as info:
+            client.send_image(b"jpeg")
+        client.close()
+    assert info.value.response.status_code == status
+    assert len(stub.requests) == 1
+    assert sleeps == []
+
+
+def test_send_many_keeps_order_and_returns_exceptions(sleeps):
+    with StubService([(200, {}), (404, {}), (200, {})]) as stub:
+        client = make_client(stub.url, retries=0)
+        results = client.send_many([b"a", b"b", b"c"], max_workers=1, return_exceptions=True)
+        client.close()
+    assert results[0] == results[2] == {"texto": "hola"}
+    assert isinstance(results[1], requests.HTTPError)
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+import ai_client_async  # noqa: E402
+from ai_client_async import AsyncAIClient, CircuitBreaker, CircuitOpen  # noqa: E402
+
+
+class StubService:
+    """Servidor HTTP local: cada petición toma la siguiente respuesta (estado, retardo en s)."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                with stub._lock:
+                    stub.requests += 1
+                    status, delay = stub.responses.pop(0) if stub.responses else (200, 0)
+                time.sleep(delay)
+                payload = json.dumps({"texto": "hola"} if status == 200 else {"error": status}).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass  # el cliente canceló la petición (cobertura o wait_for)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj monotónico del módulo, avanzado a mano."""
+    now = [1000.0]
+    monkeypatch.setattr(ai_client_async.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_client(url, failures=2, reset=30.0, **kwargs):
+    client = AsyncAIClient(url, timeout=5, **kwargs)
+    # Estado propio de cada prueba, no el compartido por endpoint
+    client.latency = ai_client_async.LatencyTracker()
+    client.breaker = CircuitBreaker(failures=failures, reset=reset)
+    return client
+
+
+# --- CircuitBreaker -----------------------------------------------------------
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failures=3, reset=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # un éxito reinicia la cuenta
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.trips == 1
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_one_trial(clock):
+    breaker = CircuitBreaker(failures=1, reset=30)
+    breaker.record_failure()
+    clock[0] += 29.9
+    assert not breaker.allow()
+    clock[0] += 0.1
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    # Sólo una prueba a la vez
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_breaker_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(failures=3, reset=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    # En half-open basta un fallo, aunque no llegue a `failures` seguidos
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+    assert not breaker.allow()
+    clock[0] += 30
+    assert breaker.allow()
+
+
+def test_breaker_abandoned_trial_reopens(clock):
+    breaker = CircuitBreaker(failures=1, reset=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == "open"
+    # La siguiente prueba espera otro `reset` entero desde el abandono
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+
+
+def test_breaker_abandon_while_closed_is_ignored():
+    breaker = CircuitBreaker(failures=1, reset=30)
+    breaker.abandon()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+# --- AsyncAIClient: disyuntor -------------------------------------------------
+
+def test_client_4xx_does_not_trip_breaker():
+    async def run(url):
+        async with make_client(url, failures=2, hedge=False) as client:
+            for _ in range(4):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await client.send_image(b"jpeg")
+            return client.breaker.stats()
+
+    with StubService([(400, 0)] * 4) as stub:
+        stats = asyncio.run(run(stub.url))
+    assert stats == {"state": "closed", "consecutiveFailures": 0, "trips": 0}
+    assert stub.requests == 4
+
+
+def test_client_5xx_opens_breaker_and_fails_fast():
+    async def run(url):
+        async with make_client(url, failures=2, hedge=False) as client:
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await client.send_image(b"jpeg")
+            with pytest.raises(CircuitOpen):
+                await client.send_image(b"jpeg")
+            return client.breaker.state
+
+    with StubService([(503, 0), (500, 0)]) as stub:
+        state = asyncio.run(run(stub.url))
+    assert state == "open"
+    # La tercera llamada no llegó al servicio
+    assert stub.requests == 2
+
+
+def test_client_recovers_through_half_open():
+    async def run(url):
+        async with make_client(url, failures=1, reset=0.05, hedge=False) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.send_image(b"jpeg")
+            assert client.breaker.state == "open"
+            await asyncio.sleep(0.06)
+            result = await client.send_image(b"jpeg")
+            return result, client.breaker.state
+
+    with StubService([(500, 0), (200, 0)]) as stub:
+        result, state = asyncio.run(run(stub.url))
+    assert result == {"texto": "hola"}
+    assert state == "closed"
+
+
+def test_client_cancelled_trial_reopens_breaker():
+    async def run(url):
+        async with make_client(url, failures=1, reset=0.05, hedge=False) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.send_image(b"jpeg")
+            await asyncio.sleep(0.06)
+            # La prueba en half-open se cancela desde fuera antes de responder
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.send_image(b"jpeg"), timeout=0.1)
+            state = client.breaker.state
+            with pytest.raises(CircuitOpen):
+                await client.send_image(b"jpeg")
+            return state
+
+    with StubService([(500, 0), (200, 1.0)]) as stub:
+        state = asyncio.run(run(stub.url))
+    assert state == "open"
+    assert stub.requests == 2
+
+
+# --- AsyncAIClient: cobertura (hedging) ---------------------------------------
+
+def _warm(latency, seconds, samples=ai_client_async.MIN_SAMPLES):
+    for _ in range(samples):
+        latency.observe(seconds)
+
+
+def test_hedge_fires_after_p95():
+    async def run(url):
+        async with make_client(url) as client:
+            _warm(client.latency, 0.05)
+            assert client.latency.hedge_delay() == pytest.approx(0.05)
+            started = time.perf_counter()
+            result = await client.send_image(b"jpeg")
+            return result, time.perf_counter() - started, client.latency
+
+    # La primera petición se queda en la cola lenta; la de cobertura responde al momento
+    with StubService([(200, 2.0), (200, 0)]) as stub:
+        result, elapsed, latency = asyncio.run(run(stub.url))
+    assert result == {"texto": "hola"}
+    assert elapsed < 1.0
+    assert stub.requests == 2
+    assert latency.hedges == 1
+    assert latency.hedge_wins == 1
+
+
+def test_no_hedge_before_p95():
+    async def run(url):
+        async with make_client(url) as client:
+            _warm(client.latency, 1.0)
+            await client.send_image(b"jpeg")
+            return client.latency
+
+    with StubService([(200, 0)]) as stub:
+        latency = asyncio.run(run(stub.url))
+    assert stub.requests == 1
+    assert latency.hedges == 0
+
+
+def test_half_open_trial_is_not_hedged():
+    async def run(url):
+        async with make_client(url, failures=1, reset=0.05) as client:
+            _warm(client.latency, 0.05)
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.send_image(b"jpeg")
+            await asyncio.sleep(0.06)
+            result = await client.send_image(b"jpeg")
+            return result, client.latency
+
+    with StubService([(500, 0), (200, 0.3)]) as stub:
+        result, latency = asyncio.run(run(stub.url))
+    assert result == {"texto": "hola"}
+    assert stub.requests == 2
+    assert latency.hedges == 0
+
+
+def test_hedge_delay_defaults_until_enough_samples():
+    latency = ai_client_async.LatencyTracker()
+    _warm(latency, 0.01, samples=ai_client_async.MIN_SAMPLES - 1)
+    assert latency.hedge_delay() == ai_client_async.HEDGE_DELAY
+    latency.observe(0.01)
+    # Nunca por debajo del mínimo, aunque el p95 sea menor
+    assert latency.hedge_delay() == max(ai_client_async.MIN_HEDGE_DELAY, 0.01)
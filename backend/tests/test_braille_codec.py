@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from utils import braille_codec as bc
+from utils.braille_translator import braille_to_text, text_to_braille
+
+CELLS = {i: chr(0x2800 + i) for i in range(64)}
+
+
+def test_masks_round_trip():
+    cells = "".join(chr(0x2800 + mask) for mask in range(256))
+    masks, is_cell = bc.cells_to_masks(cells)
+    assert masks.tolist() == list(range(256))
+    assert is_cell.all()
+    assert bc.masks_to_cells(masks) == cells
+
+
+def test_non_cells_are_flagged():
+    masks, is_cell = bc.cells_to_masks("⠁ a⠃")
+    assert is_cell.tolist() == [True, False, False, True]
+    assert masks.tolist() == [1, 0, 0, 3]
+
+
+def test_dots():
+    # ⠓ = puntos 1-2-5
+    assert np.flatnonzero(bc.dots("⠓")[0]).tolist() == [0, 1, 4]
+
+
+def test_mirror_swaps_columns_and_reverses_lines():
+    # ⠁ (punto 1) ↔ ⠈ (punto 4); ⠇ (1-2-3) ↔ ⠸ (4-5-6)
+    assert bc.mirror("⠁⠇", reverse_lines=False) == "⠈⠸"
+    assert bc.mirror("⠁⠇\n⠃") == "⠸⠈\n⠘"
+    cells = text_to_braille("Hola, mundo 123")
+    assert bc.mirror(bc.mirror(cells)) == cells
+
+
+def _python_join(ids, names, line_start, word_start):
+    seps = np.where(line_start, "\n", np.where(word_start, " ", ""))
+    seps[0] = ""
+    return "".join(sep + names[i] for sep, i in zip(seps.tolist(), ids))
+
+
+@pytest.mark.parametrize("names", [CELLS, list(CELLS.values()), {**CELLS, 5: "xx"}])
+def test_labels_to_cells_matches_python_join(names):
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, 64, 500)
+    line_start = rng.random(500) < 0.05
+    word_start = rng.random(500) < 0.2
+    lookup = names if isinstance(names, dict) else dict(enumerate(names))
+    expected = _python_join(ids.tolist(), lookup, line_start, word_start)
+    assert bc.labels_to_cells(ids.astype(float), names, line_start, word_start) == expected
+
+
+def test_labels_to_cells_without_separators():
+    cells = text_to_braille("hola")
+    ids = [ord(c) - 0x2800 for c in cells]
+    assert bc.labels_to_cells(ids, CELLS) == cells
+    assert braille_to_text(bc.labels_to_cells(ids, CELLS)) == "hola"
+    assert bc.labels_to_cells([], CELLS) == ""
@@ -0,0 +1,42 @@
+import pytest
+
+from utils import braille_translator as bt
+
+
+def g2(text):
+    return bt.translate(text, bt.TEXT_TO_BRAILLE, bt.LANGUAGE_GRADE2)
+
+
+def g2_back(cells):
+    return bt.translate(cells, bt.BRAILLE_TO_TEXT, bt.LANGUAGE_GRADE2)
+
+
+@pytest.mark.parametrize("text, cells", [
+    ("de", "⠙"),
+    ("porque", "⠏⠟"),
+    ("también", "⠞⠃"),
+    ("la casa", "⠇ ⠉⠴⠁"),
+    ("nación", "⠝⠁⠡"),
+    ("Colección", "⠨⠉⠕⠇⠑⠉⠡"),
+    ("HOLA mundo", "⠨⠨⠓⠕⠇⠁ ⠍⠥⠝⠙⠕"),
+])
+def test_known_answers(text, cells):
+    assert g2(text) == cells
+    assert g2_back(cells) == text
+
+
+@pytest.mark.parametrize("text", [
+    "bien como de fue gran hay la más no para que por se todo vez",
+    "Siempre hay tiempo para la educación y la información.",
+    "Desde entre los árboles, el cantante cantaba lentamente.",
+    "El 12 de octubre, QUE BIEN, 3,5 kilos.",
+    "d l q",  # letras sueltas que en Grado 2 serían abreviaturas
+    "chorizo, calle, queso, transporte, presente",
+])
+def test_round_trip(text):
+    assert g2_back(g2(text)) == text
+
+
+def test_grade2_is_shorter_than_grade1():
+    text = "Para que todo se entienda, la comunicación entre las personas es importante."
+    assert len(g2(text)) < len(bt.text_to_braille(text))
@@ -0,0 +1,72 @@
+import pytest
+
+from utils import braille_translator as bt
+
+SENTENCES = [
+    "hola mundo",
+    "Hola Mundo",
+    "HOLA mundo",
+    "El año 2024 tuvo 366 días.",
+    "Cuesta 3,50 o 1.000 euros",
+    "1a y 2b",
+    "¿Qué tal? ¡Muy bien!",
+    "niño, pingüino, acción",
+    "línea uno\nlínea dos\ttabulada",
+    "",
+]
+
+
+@pytest.mark.parametrize("text, cells", [
+    ("hola", "⠓⠕⠇⠁"),
+    ("Hola", "⠨⠓⠕⠇⠁"),
+    ("HOLA", "⠨⠨⠓⠕⠇⠁"),
+    ("123", "⠼⠁⠃⠉"),
+    ("3,5", "⠼⠉⠂⠑"),
+    ("1a", "⠼⠁⠐⠁"),
+    ("¡Hola!", "⠖⠨⠓⠕⠇⠁⠖"),
+    ("niño", "⠝⠊⠻⠕"),
+])
+def test_known_answers(text, cells):
+    assert bt.text_to_braille(text) == cells
+    assert bt.braille_to_text(cells) == text
+
+
+@pytest.mark.parametrize("text", SENTENCES)
+def test_round_trip(text):
+    cells = bt.translate(text, bt.TEXT_TO_BRAILLE)
+    assert bt.translate(cells, bt.BRAILLE_TO_TEXT) == text
+
+
+def test_label_list_matches_string():
+    cells = bt.text_to_braille("¿Cuántos? 42 ÁRBOLES")
+    assert bt.braille_to_text(list(cells)) == bt.braille_to_text(cells)
+
+
+def test_unknown_cells_and_loose_indicators():
+    assert bt.braille_to_text("⣿") == bt.UNKNOWN
+    # Indicadores sin letra o cifra detrás
+    assert bt.braille_to_text("⠨ ⠼") == "? ?"
+    assert bt.braille_to_text(["⠓", "xx", "⠁"]) == "h?a"
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        bt.translate("hola", "TEXT_TO_MORSE")
+    with pytest.raises(ValueError):
+        bt.translate("hola", bt.TEXT_TO_BRAILLE, "en")
+
+
+@pytest.mark.parametrize("translation_type", [bt.TEXT_TO_BRAILLE, bt.BRAILLE_TO_TEXT])
+@pytest.mark.parametrize("language", bt.LANGUAGES)
+def test_translate_many_matches_one_by_one(translation_type, language):
+    items = SENTENCES
+    if translation_type == bt.BRAILLE_TO_TEXT:
+        items = [bt.translate(s, bt.TEXT_TO_BRAILLE, language) for s in SENTENCES]
+    expected = [bt.translate(item, translation_type, language) for item in items]
+    assert bt.translate_many(items, translation_type, language) == expected
+
+
+def test_translate_many_with_separator_in_item():
+    items = ["a\x00b", "c"]
+    assert bt.translate_many(items) == [bt.translate(item) for item in items]
+    assert bt.translate_many([]) == []
@@ -0,0 +1,96 @@
+import pytest
+
+from utils.braille_translator import BLANK_CELL, text_to_braille
+from utils.brf import brf_stream, cells_to_brf, paginate
+
+A = "⠁"  # BRF "A"
+B = "⠃"  # BRF "B"
+
+
+def word(n, cell=A):
+    return cell * n
+
+
+def test_cells_to_brf():
+    assert cells_to_brf("⠁⠃⠉ ⠼⠁") == "ABC #A"
+    # Sin celda: se deja igual; los puntos 7 y 8 se descartan
+    assert cells_to_brf("⠁\n⡁⣿") == "A\nA="
+    assert cells_to_brf(BLANK_CELL) == " "
+
+
+def test_wraps_without_splitting_words():
+    text = " ".join(word(n) for n in (4, 3, 5, 2, 6, 1, 4))
+    pages = list(paginate([text], cells_per_line=10, lines_per_page=25, page_numbers=False))
+    assert len(pages) == 1
+    lines = pages[0]
+    assert all(len(line) <= 10 for line in lines)
+    assert lines[:2] == [word(4) + " " + word(3), word(5) + " " + word(2)]
+    # Las palabras llegan enteras y en orden
+    assert " ".join(lines).split() == text.split()
+
+
+def test_word_longer_than_line_is_cut():
+    pages = list(paginate([word(4, B) + " " + word(25)], cells_per_line=10, page_numbers=False))
+    assert pages == [[word(4, B), word(10), word(10), word(5)]]
+
+
+def test_words_split_across_chunks_stay_whole():
+    chunks = [word(3), word(3) + " " + B, B + "\n" + word(2)]
+    assert list(paginate(chunks, cells_per_line=10, page_numbers=False)) == [
+        [word(6) + " " + B + B, word(2)]]
+
+
+def test_blank_cells_and_newlines():
+    text = word(2) + BLANK_CELL + word(2) + "\r\n\n" + word(3)
+    assert list(paginate([text], cells_per_line=10, page_numbers=False)) == [
+        [word(2) + " " + word(2), "", word(3)]]
+
+
+def test_page_break():
+    text = "\n".join(word(i + 1) for i in range(5))
+    pages = list(paginate([text], cells_per_line=10, lines_per_page=2, page_numbers=False))
+    assert pages == [[word(1), word(2)], [word(3), word(4)], [word(5)]]
+
+
+def test_page_numbers_on_first_line():
+    text = " ".join([word(4)] * 9)
+    pages = list(paginate([text], cells_per_line=12, lines_per_page=2))
+    assert len(pages) == 3
+    for number, lines in enumerate(pages, start=1):
+        cells = text_to_braille(str(number))
+        # Alineado a la derecha, separado del texto por al menos una celda
+        assert lines[0].endswith(" " + cells)
+        assert len(lines[0]) == 12
+    # La primera línea deja sitio al número: sólo caben 9 celdas de texto
+    assert pages[0] == [word(4) + " " + word(4) + " " + text_to_braille("1"), word(4) + " " + word(4)]
+    assert pages[2] == [word(4) + " " * 6 + text_to_braille("3")]
+
+
+def test_page_numbers_with_more_digits():
+    pages = list(paginate(["\n" * 11], cells_per_line=10, lines_per_page=1))
+    assert len(pages) == 11
+    assert pages[9] == [" " * 7 + text_to_braille("10")]
+    assert pages[10] == [" " * 7 + text_to_braille("11")]
+
+
+def test_rejects_tiny_pages():
+    with pytest.raises(ValueError):
+        list(paginate(["⠁"], cells_per_line=9))
+    with pytest.raises(ValueError):
+        list(paginate(["⠁"], lines_per_page=0))
+
+
+def test_brf_stream_format():
+    text = "\n".join(word(i + 1) for i in range(3))
+    out = "".join(brf_stream([text], cells_per_line=10, lines_per_page=2, page_numbers=False))
+    assert out == "A\r\nAA\r\n\fAAA\r\n\f"
+
+
+def test_brf_stream_is_lazy():
+    def chunks():
+        while True:
+            yield word(9) + " "
+
+    pages = brf_stream(chunks(), cells_per_line=10, lines_per_page=3, page_numbers=False)
+    first = next(pages)
+    assert first == "\r\n".join(["A" * 9] * 3) + "\r\n\f"
@@ -0,0 +1,245 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services import result_cache as rc
+from services.result_cache import ResultCache, make_key
+
+
+class Clock:
+    """Sustituye a time.time en el módulo de la caché (TTL y orden del LRU)."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rc.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_cache(tmp_path, monkeypatch):
+    # Sin escrituras por tiempo: sólo por número de lecturas o con flush()/stats()
+    monkeypatch.setattr(rc, "FLUSH_INTERVAL", 3600)
+
+    def make(**kwargs):
+        return ResultCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+    return make
+
+
+def stored_counters(cache):
+    """Contadores tal como están en SQLite (sin escribir lo pendiente)."""
+    db = sqlite3.connect(cache.path)
+    try:
+        return dict(db.execute("SELECT name, value FROM counters").fetchall())
+    finally:
+        db.close()
+
+
+def test_make_key_separates_parts():
+    assert make_key("t", "ab", "c") != make_key("t", "a", "bc")
+    assert make_key("t", "ab") != make_key("u", "ab")
+    assert make_key("t", "ñ") == make_key("t", "ñ".encode("utf-8"))
+    assert make_key("t", "x").startswith("t:")
+
+
+def test_get_set_roundtrip(make_cache):
+    cache = make_cache()
+    assert cache.get("k") is None
+    assert cache.get("k", "nada") == "nada"
+    cache.set("k", {"texto": "hola", "n": [1, 2]})
+    assert cache.get("k") == {"texto": "hola", "n": [1, 2]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hitRate"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+def test_ttl_expiry(make_cache, clock):
+    cache = make_cache(ttl=10)
+    cache.set("k", "v")
+    clock.now += 9.9
+    assert cache.get("k") == "v"
+    clock.now += 0.2
+    assert cache.get("k") is None
+    # Reescribirla sustituye la entrada caducada sin duplicar tamaños
+    cache.set("k", "w")
+    assert cache.get("k") == "w"
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] == len('"w"')
+
+
+def test_lru_eviction_by_entries(make_cache, clock, monkeypatch):
+    monkeypatch.setattr(rc, "ACCESS_RESOLUTION", 0)
+    cache = make_cache(max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+        clock.now += 1
+    # "a" se lee: pasa a ser la más reciente cuando se escribe la hora de acceso
+    assert cache.get("a") == "a"
+    cache.flush()
+    clock.now += 1
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes(make_cache, clock):
+    value = "x" * 98  # 100 bytes en JSON
+    cache = make_cache(max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+        clock.now += 1
+    assert cache.get("a") is None
+    assert cache.get("b") == value and cache.get("c") == value
+    stats = cache.stats()
+    assert stats["bytes"] == 200
+    assert stats["evictions"] == 1
+
+
+def test_expired_entries_are_evicted_first(make_cache, clock):
+    cache = make_cache(max_entries=2, ttl=10)
+    cache.set("old", 1)
+    clock.now += 5
+    cache.set("recent", 2)
+    clock.now += 6  # "old" caduca; "recent" no
+    cache.set("new", 3)
+    assert cache.get("recent") == 2
+    assert cache.get("new") == 3
+    assert cache.stats()["entries"] == 2
+
+
+def test_counters_are_flushed_in_batches(make_cache, monkeypatch):
+    monkeypatch.setattr(rc, "FLUSH_EVERY", 5)
+    cache = make_cache()
+    cache.set("k", "v")
+    for _ in range(4):
+        assert cache.get("k") == "v"
+    # Las lecturas no escriben: los contadores esperan en memoria
+    assert stored_counters(cache)["hits"] == 0
+    cache.get("k")
+    assert stored_counters(cache)["hits"] == 5
+    cache.get("k")
+    cache.get("otra")
+    assert stored_counters(cache)["hits"] == 5
+    # stats() escribe lo pendiente antes de leer
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (6, 1)
+
+
+def test_counters_are_flushed_after_interval(make_cache, monkeypatch):
+    cache = make_cache()
+    cache.set("k", "v")
+    cache.get("k")
+    assert stored_counters(cache)["hits"] == 0
+    cache._flush_at = time.monotonic() - 1
+    cache.get("k")
+    assert stored_counters(cache)["hits"] == 2
+
+
+def test_access_time_is_written_only_when_stale(make_cache, clock):
+    cache = make_cache()
+    cache.set("k", "v")
+    clock.now += rc.ACCESS_RESOLUTION / 2
+    cache.get("k")
+    assert cache._touched == {}
+    clock.now += rc.ACCESS_RESOLUTION
+    cache.get("k")
+    assert cache._touched == {"k": clock.now}
+    cache.flush()
+    row = cache._db().execute("SELECT accessed FROM entries WHERE key = 'k'").fetchone()
+    assert row[0] == clock.now
+
+
+def test_single_flight_across_threads(make_cache):
+    cache = make_cache()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"texto": "hola"}
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_compute("k", compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"texto": "hola"}] * 8
+    stats = cache.stats()
+    assert stats["coalesced"] == 7
+    assert stats["misses"] == 8
+
+
+def test_single_flight_across_processes(make_cache):
+    # Dos instancias sobre el mismo archivo se comportan como dos workers
+    leader, follower = make_cache(), make_cache()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append("leader")
+        started.set()
+        time.sleep(0.2)
+        return 42
+
+    thread = threading.Thread(target=lambda: leader.get_or_compute("k", slow))
+    thread.start()
+    started.wait(5)
+    assert follower.get_or_compute("k", lambda: calls.append("follower") or 0) == 42
+    thread.join()
+    assert calls == ["leader"]
+    assert follower.stats()["coalesced"] == 1
+
+
+def test_failed_compute_releases_key(make_cache):
+    cache = make_cache()
+
+    def fail():
+        raise RuntimeError("modelo caído")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", fail)
+    assert not cache._in_flight("k")
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
+
+
+def test_cached_propagates_compute_errors(monkeypatch, make_cache):
+    monkeypatch.setattr(rc, "result_cache", make_cache())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        raise ValueError("tipo de traducción no soportado")
+
+    with pytest.raises(ValueError):
+        rc.cached("translate", ["x"], compute)
+    # El error no se repite llamando otra vez a compute() fuera de la caché
+    assert len(calls) == 1
+    assert rc.cached("translate", ["y"], lambda: "hola") == "hola"
+    assert rc.cached("translate", ["y"], lambda: "otro") == "hola"
+
+
+def test_cached_without_cache_computes(monkeypatch):
+    monkeypatch.setattr(rc, "result_cache", None)
+    assert rc.cached("translate", ["x"], lambda: "directo") == "directo"
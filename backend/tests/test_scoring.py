@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from utils import scoring
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("", "", 0),
+    ("", "abc", 3),
+    ("kitten", "sitting", 3),
+    ("flaw", "lawn", 2),
+    ("braille", "braille", 0),
+    (["la", "casa", "azul"], ["la", "casa", "roja"], 1),
+])
+def test_levenshtein_known_answers(a, b, distance):
+    assert scoring.levenshtein(a, b) == distance
+    assert scoring.levenshtein(b, a) == distance
+
+
+def _random_pair(rng, alphabet="abcd", max_len=200):
+    a = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len)))
+    b = list(a)
+    for _ in range(rng.randint(0, 30)):
+        op = rng.randrange(3)
+        pos = rng.randint(0, len(b))
+        if op == 0:
+            b.insert(pos, rng.choice(alphabet))
+        elif b and pos < len(b):
+            if op == 1:
+                del b[pos]
+            else:
+                b[pos] = rng.choice(alphabet)
+    return a, "".join(b)
+
+
+def _check_alignment(a, b, distance, ra, rb):
+    assert len(ra) == len(rb)
+    assert ra.replace(scoring.GAP, "") == a
+    assert rb.replace(scoring.GAP, "") == b
+    assert sum(x != y for x, y in zip(ra, rb)) == distance
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_hirschberg_matches_full_matrix(seed):
+    # Más de FULL_DP_CELLS celdas: se ejercita la división de Hirschberg
+    a, b = _random_pair(random.Random(seed))
+    full_distance, _, _ = scoring.align_full(a, b)
+    distance, ra, rb = scoring.align(a, b)
+    assert distance == full_distance == scoring.levenshtein(a, b)
+    _check_alignment(a, b, distance, ra, rb)
+
+
+def test_align_word_lists():
+    a = "el perro come pan".split()
+    b = "el gato come mucho pan".split()
+    distance, ra, rb = scoring.align(a, b)
+    assert distance == 2
+    assert [x for x in ra if x != scoring.GAP] == a
+    assert [x for x in rb if x != scoring.GAP] == b
+
+
+def test_confusion_pairs():
+    _, ra, rb = scoring.align("braille", "brajlle")
+    assert scoring.confusion_pairs(ra, rb) == {("i", "j"): 1}
+    assert scoring.confusion_pairs("abc", "abc") == {}
@@ -0,0 +1,65 @@
+import pytest
+
+from utils import spell_index as si
+
+FREQUENCIES = {
+    "casa": 500, "cosa": 800, "caso": 300, "braille": 50, "lectura": 120,
+    "escritura": 90, "puntos": 200, "celda": 40, "mundo": 700, "niño": 150,
+}
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    path = tmp_path_factory.mktemp("spell_index")
+    words, keys = si.build_index(FREQUENCIES, str(path))
+    assert words == len(FREQUENCIES)
+    assert keys > words
+    return si.SpellIndex(str(path))
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("casa", "casa", 0),
+    ("casa", "cas", 1),
+    ("casa", "csaa", 1),  # transposición
+    ("braile", "braille", 1),
+    ("lectura", "lctra", 2),
+])
+def test_osa_distance(a, b, distance):
+    assert si.osa_distance(a, b, 2) == distance
+
+
+def test_osa_distance_over_limit():
+    assert si.osa_distance("casa", "puntos", 2) > 2
+
+
+def test_contains(index):
+    for word in FREQUENCIES:
+        assert index.contains(word)
+    assert not index.contains("casas")
+    assert not index.contains("")
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("braile", "braille"),
+    ("lectrua", "lectura"),
+    ("escritra", "escritura"),
+    ("nino", "niño"),
+    ("mundo", "mundo"),
+    ("xyzxyz", "xyzxyz"),  # sin candidatos: se deja igual
+])
+def test_correct_word(index, typo, expected):
+    assert index.correct_word(typo) == expected
+
+
+def test_tie_goes_to_most_frequent(index):
+    # "cesa" está a 1 de "casa" (500) y de "cosa" (800)
+    assert index.correct_word("cesa") == "cosa"
+
+
+def test_correct_text_keeps_case_and_punctuation(index):
+    assert index.correct_text("La Lectrua en BRAILE, 3 puntos!") == "La Lectura en BRAILLE, 3 puntos!"
+
+
+def test_candidates_share_a_delete(index):
+    words = {index.word(i) for i in index.candidates("caza")}
+    assert {"casa", "caso"} <= words
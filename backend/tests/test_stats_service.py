@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from services import stats_service  # noqa: E402
+from services.stats_service import AdminStats  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().easybraille
+
+
+def make_stats(db, **kwargs):
+    return AdminStats(db.stats, db.users, db.translations, **kwargs)
+
+
+def lock(db):
+    return db.stats.find_one({"_id": stats_service._LOCK_ID})
+
+
+def count(db, _id):
+    doc = db.stats.find_one({"_id": _id})
+    return doc["count"] if doc else None
+
+
+def add_user(db, stats, role="user", active=True):
+    user = {"role": role, "isActive": active, "createdAt": datetime.utcnow()}
+    db.users.insert_one(user)
+    stats.record_user(user)
+
+
+def add_translations(db, stats, kinds):
+    docs = [{"translationType": kind, "createdAt": datetime.utcnow()} for kind in kinds]
+    db.translations.insert_many(docs)
+    stats.record_translations(docs)
+
+
+def test_records_increment_counters(db):
+    stats = make_stats(db)
+    add_user(db, stats)
+    add_user(db, stats, role="admin", active=False)
+    add_translations(db, stats, ["TEXT_TO_BRAILLE", "TEXT_TO_BRAILLE", "BRAILLE_TO_TEXT"])
+    add_translations(db, stats, ["TEXT_TO_BRAILLE"])
+
+    month = stats_service._month(datetime.utcnow())
+    assert count(db, "total:users") == 2
+    assert count(db, "total:users-active") == 1
+    assert count(db, "role:admin") == 1
+    assert count(db, f"users-month:{month}") == 2
+    assert count(db, "total:translations") == 4
+    assert count(db, "type:TEXT_TO_BRAILLE") == 3
+    assert count(db, f"translations-month:{month}") == 4
+
+    # Con los contadores ya creados, la lectura no reconcilia
+    value = stats.admin_stats()
+    assert lock(db) is None
+    assert value["users"] == {
+        "total": 2, "active": 1, "admins": 1, "regular": 1,
+        "last6Months": [{"_id": {"year": int(month[:4]), "month": int(month[5:])}, "count": 2}],
+    }
+    assert value["translations"]["total"] == 4
+    assert value["translations"]["thisWeek"] == 4
+    assert sorted((t["_id"], t["count"]) for t in value["translations"]["byType"]) == [
+        ("BRAILLE_TO_TEXT", 1), ("TEXT_TO_BRAILLE", 3)]
+
+
+def test_hour_buckets_expire_after_eight_days(db):
+    stats = make_stats(db)
+    add_translations(db, stats, ["TEXT_TO_BRAILLE"])
+    bucket = db.stats.find_one({"kind": "translations-hour"})
+    assert bucket["expireAt"] == bucket["key"] + timedelta(days=8)
+
+
+def test_empty_stats_reconcile_before_answering(db):
+    db.users.insert_many([{"role": "user", "isActive": True, "createdAt": datetime.utcnow()},
+                          {"role": "admin", "isActive": True, "createdAt": datetime.utcnow()}])
+    db.translations.insert_one({"translationType": "TEXT_TO_BRAILLE", "createdAt": datetime.utcnow()})
+    stats = make_stats(db)
+
+    value = stats.admin_stats()
+    assert value["users"]["total"] == 2
+    assert value["users"]["admins"] == 1
+    assert value["translations"]["total"] == 1
+    assert value["translations"]["thisWeek"] == 1
+    # Bloqueo liberado (vence cuando se tomó) y fin de la reconciliación anotado
+    held = lock(db)
+    assert held["until"] == held["done"]
+    assert held["until"] <= datetime.utcnow()
+
+
+def test_reconcile_fixes_drifted_counters(db):
+    stats = make_stats(db)
+    add_user(db, stats)
+    add_user(db, stats, role="admin")
+    # Cambios hechos directamente en la base de datos
+    db.users.update_many({"role": "admin"}, {"$set": {"role": "user", "isActive": False}})
+
+    assert stats.reconcile()
+    assert count(db, "total:users") == 2
+    assert count(db, "total:users-active") == 1
+    assert count(db, "role:user") == 2
+    assert count(db, "role:admin") == 0
+
+
+def test_held_lock_blocks_reconcile(db):
+    db.users.insert_one({"role": "user", "isActive": True, "createdAt": datetime.utcnow()})
+    db.stats.insert_one({"_id": stats_service._LOCK_ID,
+                         "until": datetime.utcnow() + timedelta(minutes=5)})
+    stats = make_stats(db)
+
+    assert not stats.reconcile()
+    # Sin contadores y con otro worker recalculando: el endpoint consulta directamente
+    assert stats.admin_stats() is None
+    assert count(db, "total:users") is None
+
+
+def test_expired_lock_is_taken_over(db):
+    db.users.insert_one({"role": "user", "isActive": True, "createdAt": datetime.utcnow()})
+    # Worker muerto a medias: su bloqueo ya venció
+    db.stats.insert_one({"_id": stats_service._LOCK_ID,
+                         "until": datetime.utcnow() - timedelta(seconds=1)})
+    stats = make_stats(db)
+    assert stats.reconcile()
+    assert count(db, "total:users") == 1
+
+
+def test_failed_reconcile_releases_lock(db, monkeypatch):
+    db.users.insert_one({"role": "user", "isActive": True, "createdAt": datetime.utcnow()})
+    stats = make_stats(db)
+
+    def fail(now):
+        raise RuntimeError("mongo caído")
+
+    monkeypatch.setattr(stats, "_reconcile", fail)
+    with pytest.raises(RuntimeError):
+        stats.reconcile()
+    held = lock(db)
+    assert held["until"] <= datetime.utcnow()
+    assert "done" not in held
+    # admin_stats no propaga el error: devuelve None
+    assert stats.admin_stats() is None
+
+    # El siguiente intento consigue el bloqueo sin esperar al vencimiento
+    monkeypatch.undo()
+    assert stats.reconcile()
+    assert count(db, "total:users") == 1
+
+
+def test_recent_reconcile_is_skipped_with_min_age(db):
+    stats = make_stats(db)
+    assert stats.reconcile()
+    assert not stats.reconcile(min_age=3600)
+    # Sin min_age (o pasado el intervalo) se vuelve a recalcular
+    assert stats.reconcile()
+
+
+def test_cache_expires_after_ttl(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(stats_service.time, "monotonic", lambda: clock[0])
+    stats = make_stats(db, cache_ttl=10)
+    add_user(db, stats)
+    assert stats.admin_stats()["users"]["total"] == 1
+
+    add_user(db, stats)
+    clock[0] += 9
+    assert stats.admin_stats()["users"]["total"] == 1
+    clock[0] += 2
+    assert stats.admin_stats()["users"]["total"] == 2
+
+
+def test_reconcile_invalidates_cache(db):
+    stats = make_stats(db, cache_ttl=3600)
+    add_user(db, stats)
+    assert stats.admin_stats()["users"]["total"] == 1
+    db.users.insert_one({"role": "user", "isActive": True, "createdAt": datetime.utcnow()})
+    assert stats.reconcile()
+    assert stats.admin_stats()["users"]["total"] == 2
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from utils import braille_translator as bt
+
+SENTENCES = [
+    "hola mundo",
+    "Hola Mundo",
+    "HOLA mundo",
+    "El año 2024 tuvo 366 días.",
+    "Cuesta 3,50 o 1.000 euros",
+    "1a y 2b",
+    "¿Qué tal? ¡Muy bien!",
+    "niño, pingüino, acción",
+    "línea uno\nlínea dos\ttabulada",
+]
+
+
+def _chunks(text, rng):
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 40)
+        yield text[pos:pos + size]
+        pos += size
+
+
+@pytest.mark.parametrize("language", bt.LANGUAGES)
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_matches_translate(language, seed):
+    rng = random.Random(seed)
+    text = " ".join(rng.choice(SENTENCES) for _ in range(60))
+    forward = "".join(bt.translate_stream(_chunks(text, rng), bt.TEXT_TO_BRAILLE, language))
+    assert forward == bt.translate(text, bt.TEXT_TO_BRAILLE, language)
+    back = "".join(bt.translate_stream(_chunks(forward, rng), bt.BRAILLE_TO_TEXT, language))
+    assert back == text
+
+
+@pytest.mark.parametrize("text", [
+    "SUPERCALIFRAGILISTICO" * 3,
+    "1234567890" * 5,
+    "palabra,sin,espacios,pero,con,comas" * 2,
+])
+def test_stream_forced_cuts_round_trip(text):
+    # Sin separadores y con un búfer pequeño el corte se fuerza dentro de la palabra
+    cells = "".join(bt.translate_stream(_chunks(text, random.Random(0)), max_buffer=8))
+    back = "".join(bt.translate_stream(_chunks(cells, random.Random(1)), bt.BRAILLE_TO_TEXT, max_buffer=8))
+    assert back == text
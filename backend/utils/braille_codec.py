@@ -0,0 +1,151 @@
+# backend/utils/braille_codec.py
+"""
+Códec Braille vectorizado con NumPy.
+
+Una celda Unicode es 0x2800 + máscara de puntos (bit 0 = punto 1 ... bit 7 =
+punto 8), así que las celdas se manejan como arrays de code points (vista
+UTF-32 de la cadena) indexados con tablas de 256 entradas, sin búsquedas en
+diccionarios por celda.
+
+Uso en producción: utils/postprocess convierte los índices de clase de YOLO,
+ya en orden de lectura, en la cadena de celdas con labels_to_cells (una
+indexación y un np.insert para los espacios y saltos de línea). La lectura
+de esa cadena la hace braille_translator.cells_to_text, cuyo códec charmap
+es más rápido que cualquier tabla en NumPy; lo que depende del contexto
+(indicadores de número y mayúscula, ¿ / ¡) sólo lo resuelve ese motor.
+
+También sirve para operaciones a nivel de punto, como las celdas en espejo
+para escribir con pauta y punzón.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+BRAILLE_BASE = 0x2800
+
+_SPACE = ord(" ")
+_NEWLINE = ord("\n")
+
+
+def _mirror_mask(mask):
+    """Intercambia las columnas de la celda: 1↔4, 2↔5, 3↔6 y 7↔8."""
+    return (
+        ((mask & 0b111) << 3)
+        | ((mask >> 3) & 0b111)
+        | ((mask & 0x40) << 1)
+        | ((mask & 0x80) >> 1)
+    )
+
+
+_MIRROR_LUT = np.array([_mirror_mask(mask) for mask in range(256)], dtype=np.uint32)
+
+
+# --- vistas UTF-32 -----------------------------------------------------------
+
+def to_codepoints(text):
+    """Vista UTF-32 de una cadena como array uint32 (sin bucle en Python)."""
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+def from_codepoints(codepoints):
+    """Array de code points → cadena."""
+    return np.ascontiguousarray(codepoints, dtype="<u4").tobytes().decode("utf-32-le")
+
+
+def cells_to_masks(cells):
+    """
+    Máscaras de puntos de cada celda (uint8) y un array booleano con las
+    posiciones que sí son celdas Braille.
+    """
+    offsets = to_codepoints(cells) - np.uint32(BRAILLE_BASE)  # lo que no es celda da la vuelta
+    is_cell = offsets < 256
+    return np.where(is_cell, offsets, 0).astype(np.uint8), is_cell
+
+
+def masks_to_cells(masks):
+    """Máscaras de puntos → cadena de celdas."""
+    return from_codepoints(np.asarray(masks, dtype=np.uint32) + np.uint32(BRAILLE_BASE))
+
+
+def dots(cells):
+    """Matriz (n, 8) de booleanos: columna i = punto i + 1 de cada celda."""
+    masks, _ = cells_to_masks(cells)
+    return np.unpackbits(masks[:, None], axis=1, bitorder="little").astype(bool)
+
+
+# --- índices de clase de YOLO ------------------------------------------------
+
+@lru_cache(maxsize=16)
+def _class_lut(names):
+    """
+    Tabla índice de clase → code point de la etiqueta, o None si alguna
+    etiqueta no es un solo carácter (entonces no cabe en un array de code points).
+    """
+    if not names or any(len(label) != 1 for _, label in names):
+        return None
+    lut = np.zeros(max(index for index, _ in names) + 1, dtype=np.uint32)
+    for index, label in names:
+        lut[index] = ord(label)
+    return lut
+
+
+def _names_key(names):
+    """`names` de YOLO (dict o lista) como tupla ordenada, clave de _class_lut."""
+    items = names.items() if isinstance(names, dict) else enumerate(names)
+    return tuple(sorted((int(index), label) for index, label in items))
+
+
+def labels_to_cells(class_ids, names, line_start=None, word_start=None):
+    """
+    Índices de clase (p. ej. `boxes.cls` ya ordenado) → cadena de celdas,
+    con "\\n" delante de cada posición de `line_start` y " " delante de cada
+    posición de `word_start` (salvo la primera). `names` es {índice: etiqueta}
+    o una lista, como `model.names`.
+    """
+    ids = np.asarray(class_ids).astype(np.intp, copy=False).ravel()
+    names = _names_key(names)
+    lut = _class_lut(names)
+    if lut is None:
+        # Etiquetas de varios caracteres: se unen tal cual, celda a celda
+        labels = dict(names)
+        seps = _separators(len(ids), line_start, word_start)
+        return "".join(sep + labels[i] for sep, i in zip(seps, ids.tolist()))
+    codepoints = lut[ids]
+    if (line_start is None and word_start is None) or len(ids) < 2:
+        return from_codepoints(codepoints)
+    breaks = np.zeros(len(ids), dtype=np.uint32)
+    if word_start is not None:
+        breaks[np.asarray(word_start, dtype=bool)] = _SPACE
+    if line_start is not None:
+        breaks[np.asarray(line_start, dtype=bool)] = _NEWLINE
+    breaks[0] = 0
+    at = np.flatnonzero(breaks)
+    return from_codepoints(np.insert(codepoints, at, breaks[at]))
+
+
+def _separators(n, line_start, word_start):
+    seps = [""] * n
+    for flags, sep in ((word_start, " "), (line_start, "\n")):
+        if flags is not None:
+            for i in np.flatnonzero(np.asarray(flags, dtype=bool)[1:]).tolist():
+                seps[i + 1] = sep
+    return seps
+
+
+# --- operaciones por punto ---------------------------------------------------
+
+def mirror(cells, reverse_lines=True):
+    """
+    Celdas en espejo para escribir con pauta y punzón (por el reverso del
+    papel): se intercambian las columnas de puntos y, con `reverse_lines`,
+    cada línea se escribe de derecha a izquierda.
+    """
+    codepoints = to_codepoints(cells)
+    offsets = codepoints - np.uint32(BRAILLE_BASE)
+    is_cell = offsets < 256
+    out = codepoints.copy()
+    out[is_cell] = _MIRROR_LUT[offsets[is_cell]] + np.uint32(BRAILLE_BASE)
+    mirrored = from_codepoints(out)
+    if reverse_lines:
+        mirrored = "\n".join(line[::-1] for line in mirrored.split("\n"))
+    return mirrored
@@ -0,0 +1,257 @@
+# backend/utils/braille_grade2.py
+"""
+Braille español Grado 2 (estenográfico) sobre el motor de Grado 1.
+
+La contracción trabaja sobre celdas: el texto se traduce primero a Grado 1
+y después se sustituyen las secuencias de celdas por sus contracciones; la
+lectura hace lo inverso (expande a Grado 1 y traduce). Así mayúsculas,
+números y signos siguen las mismas reglas que en Grado 1.
+
+Las reglas se compilan al importar en dos estructuras:
+- abreviaturas de palabra completa: diccionario celdas → celdas
+- contracciones dentro de palabra: trie de celdas con coincidencia más larga
+
+Cada posición del texto se recorre como mucho tantas veces como la regla
+más larga, de modo que el coste es lineal en el tamaño del texto y no
+depende del número de reglas. Las palabras ya traducidas se memorizan.
+"""
+import re
+
+from utils.braille_translator import (
+    CAPITAL_SIGN,
+    NUMBER_SIGN,
+    braille_dict,
+    numeros_dict,
+    signos_dict,
+    text_to_braille,
+)
+
+GRADE1_SIGN = "⠰"  # puntos 5-6: la palabra siguiente está en Grado 1
+
+# Abreviaturas: palabras completas que se escriben con una o dos celdas
+abreviaturas_dict = {
+    "bien": "⠃", "como": "⠉", "de": "⠙", "fue": "⠋", "gran": "⠛",
+    "hay": "⠓", "la": "⠇", "más": "⠍", "no": "⠝", "para": "⠏",
+    "que": "⠟", "por": "⠗", "se": "⠎", "todo": "⠞", "vez": "⠧",
+    "porque": "⠏⠟", "siempre": "⠎⠏", "entre": "⠑⠞", "también": "⠞⠃",
+}
+
+# Contracciones dentro de palabra: (letras, celdas, posición)
+# posición: "parte" en cualquier lugar, "inicio" al principio, "final" al final
+contracciones = [
+    ("ción", "⠡", "final"),
+    ("ar", "⠩", "parte"),
+    ("er", "⠹", "parte"),
+    ("ir", "⠱", "parte"),
+    ("or", "⠫", "parte"),
+    ("es", "⠯", "parte"),
+    ("en", "⠿", "parte"),
+    ("an", "⠪", "parte"),
+    ("os", "⠲", "parte"),
+    ("as", "⠴", "parte"),
+    ("ue", "⠶", "parte"),
+    ("ll", "⠔", "parte"),
+    ("ch", "⠠", "parte"),
+    ("qu", "⠸", "parte"),
+    ("mente", "⠈⠍", "final"),
+    ("ente", "⠈⠑", "parte"),
+    ("des", "⠈⠙", "inicio"),
+    ("con", "⠈⠉", "inicio"),
+    ("tra", "⠘⠞", "parte"),
+    ("pre", "⠘⠏", "inicio"),
+]
+
+_RULE = object()  # clave de fin de regla en los nodos del trie
+_CACHE_LIMIT = 65536
+
+_LETTER_CELLS = frozenset(cell for cell in braille_dict if cell != " ")
+_DIGIT_CELLS = "".join(numeros_dict)
+_NUMBER_RE = re.compile(f"{NUMBER_SIGN}[{_DIGIT_CELLS}]+(?:[⠄⠂][{_DIGIT_CELLS}]+)*")
+_BOUNDARIES = frozenset(signos_dict) | frozenset(" \n\r\t\x00⠀")
+
+
+def _build_trie(pairs):
+    """Trie de celdas: cada nodo es un dict celda → nodo; _RULE guarda (salida, posición)."""
+    trie = {}
+    for source, target, position in pairs:
+        node = trie
+        for cell in source:
+            node = node.setdefault(cell, {})
+        node[_RULE] = (target, position)
+    return trie
+
+
+def _longest(trie, text, start, at_start, at_end):
+    """Coincidencia más larga desde `start` que respeta la posición de la regla."""
+    node = trie
+    best = None
+    size = len(text)
+    pos = start
+    while pos < size:
+        node = node.get(text[pos])
+        if node is None:
+            break
+        pos += 1
+        rule = node.get(_RULE)
+        if rule is not None:
+            target, position = rule
+            if (
+                position == "parte"
+                or (position == "inicio" and at_start and start == 0)
+                or (position == "final" and at_end and pos == size)
+            ):
+                best = (target, pos)
+    return best
+
+
+class Grade2Engine:
+    """Tablas compiladas de Grado 2 y traducción palabra a palabra con memoria."""
+
+    def __init__(self, abreviaturas, contracciones):
+        def cells(text):
+            return text_to_braille(text)
+
+        rules = [(cells(letters), target, position) for letters, target, position in contracciones]
+        targets = [target for _, target, _ in rules]
+        if len(set(targets)) != len(targets) or any(c in _LETTER_CELLS for t in targets for c in t[:1]):
+            raise ValueError("Las contracciones deben usar celdas únicas que no sean letras")
+
+        self.words = {cells(word): target for word, target in abreviaturas.items()}
+        self.words_back = {target: word for word, target in self.words.items()}
+        if len(self.words_back) != len(self.words):
+            raise ValueError("Dos abreviaturas comparten las mismas celdas")
+
+        self.forward_trie = _build_trie(rules)
+        self.back_trie = _build_trie((target, source, "parte") for source, target, _ in rules)
+        contraction_cells = {cell for target in targets for cell in target}
+        self.word_cells = _LETTER_CELLS | {CAPITAL_SIGN}
+        self.word_cells_back = self.word_cells | contraction_cells
+        self._contracted = {}
+        self._expanded = {}
+
+    # --- recorrido común ---------------------------------------------------
+
+    def _scan(self, token, word_cells, translate_word):
+        """Separa números, palabras y signos; `translate_word(run, whole, grade1)` traduce cada palabra."""
+        out = []
+        size = len(token)
+        pos = 0
+        grade1 = False
+        while pos < size:
+            cell = token[pos]
+            if cell == NUMBER_SIGN:
+                m = _NUMBER_RE.match(token, pos)
+                end = m.end() if m else pos + 1
+                out.append(token[pos:end])
+                pos = end
+            elif cell == GRADE1_SIGN:
+                grade1 = True
+                pos += 1
+            elif cell in word_cells:
+                end = pos + 1
+                while end < size and token[end] in word_cells:
+                    end += 1
+                whole = (pos == 0 or token[pos - 1] in _BOUNDARIES) and (
+                    end == size or token[end] in _BOUNDARIES
+                )
+                out.append(translate_word(token[pos:end], whole, grade1))
+                grade1 = False
+                pos = end
+            else:
+                out.append(cell)
+                pos += 1
+        return "".join(out)
+
+    @staticmethod
+    def _split_caps(run):
+        body = run.lstrip(CAPITAL_SIGN)
+        return run[:len(run) - len(body)], body
+
+    # --- texto → Grado 2 ---------------------------------------------------
+
+    def _contract_segment(self, segment, at_start, at_end):
+        out = []
+        pos = 0
+        size = len(segment)
+        while pos < size:
+            match = _longest(self.forward_trie, segment, pos, at_start, at_end)
+            if match is None:
+                out.append(segment[pos])
+                pos += 1
+            else:
+                out.append(match[0])
+                pos = match[1]
+        return "".join(out)
+
+    def _contract_word(self, run, whole, grade1):
+        prefix, body = self._split_caps(run)
+        if whole and body in self.words:
+            return prefix + self.words[body]
+        # Mayúsculas dentro de la palabra: cada tramo se contrae por separado
+        segments = body.split(CAPITAL_SIGN)
+        last = len(segments) - 1
+        body = CAPITAL_SIGN.join(
+            self._contract_segment(segment, i == 0, i == last) for i, segment in enumerate(segments)
+        )
+        if whole and body in self.words_back:
+            return GRADE1_SIGN + prefix + body  # se leería como abreviatura
+        return prefix + body
+
+    def _contract_token(self, token):
+        result = self._contracted.get(token)
+        if result is None:
+            result = self._scan(token, self.word_cells, self._contract_word)
+            if len(self._contracted) >= _CACHE_LIMIT:
+                self._contracted.clear()
+            self._contracted[token] = result
+        return result
+
+    def contract(self, cells):
+        """Celdas de Grado 1 → celdas de Grado 2."""
+        return " ".join(map(self._contract_token, cells.split(" ")))
+
+    # --- Grado 2 → Grado 1 -------------------------------------------------
+
+    def _expand_word(self, run, whole, grade1):
+        prefix, body = self._split_caps(run)
+        if whole and not grade1 and body in self.words_back:
+            return prefix + self.words_back[body]
+        out = []
+        pos = 0
+        size = len(body)
+        while pos < size:
+            match = _longest(self.back_trie, body, pos, False, False)
+            if match is None:
+                out.append(body[pos])
+                pos += 1
+            else:
+                out.append(match[0])
+                pos = match[1]
+        return prefix + "".join(out)
+
+    def _expand_token(self, token):
+        result = self._expanded.get(token)
+        if result is None:
+            result = self._scan(token, self.word_cells_back, self._expand_word)
+            if len(self._expanded) >= _CACHE_LIMIT:
+                self._expanded.clear()
+            self._expanded[token] = result
+        return result
+
+    def expand(self, cells):
+        """Celdas de Grado 2 → celdas de Grado 1."""
+        return " ".join(map(self._expand_token, cells.split(" ")))
+
+
+# Tablas por defecto (una sola vez por proceso)
+engine = Grade2Engine(abreviaturas_dict, contracciones)
+
+
+def text_to_braille_g2(text):
+    """Convierte texto en español a Braille Grado 2."""
+    return engine.contract(text_to_braille(text))
+
+
+def cells_to_grade1(cells):
+    """Expande una cadena de celdas de Grado 2 a Grado 1."""
+    return engine.expand(cells)
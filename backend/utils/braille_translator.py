@@ -1,4 +1,37 @@
 # backend/utils/braille_translator.py
+"""
+Motor de traducción Braille español (Grado 1) en ambos sentidos.
+
+Todas las tablas se compilan una sola vez al importar el módulo. Cada
+traducción es un único recorrido en C con un códec charmap (una celda por
+byte latin-1). Los indicadores que dependen del contexto (número,
+interruptor, mayúsculas y signos de apertura) se localizan sobre esos bytes
+con búsquedas en C (bytes.split, bytes.find, re.finditer), de modo que el
+trabajo en Python depende del número de indicadores y no del tamaño del
+texto.
+"""
+import codecs
+import re
+from itertools import accumulate, repeat
+
+# Tipos de traducción (mismos valores que guarda /api/translations)
+TEXT_TO_BRAILLE = "TEXT_TO_BRAILLE"
+BRAILLE_TO_TEXT = "BRAILLE_TO_TEXT"
+
+# Idiomas (campo "language" de /api/translations): Grado 1 y Grado 2 (estenográfico)
+LANGUAGE_GRADE1 = "es"
+LANGUAGE_GRADE2 = "es-g2"
+LANGUAGES = (LANGUAGE_GRADE1, LANGUAGE_GRADE2)
+
+# Indicadores
+CAPITAL_SIGN = "⠨"   # puntos 4-6: mayúscula (doble: palabra en mayúsculas)
+NUMBER_SIGN = "⠼"    # puntos 3-4-5-6: inicio de número
+LETTER_SIGN = "⠐"    # punto 5: interruptor, letra a-j justo después de un número
+UNKNOWN = "?"        # símbolo desconocido
+BLANK_CELL = "\u2800"  # celda vacía
+
+# Separador interno para traducir lotes en una sola pasada
+_BATCH_SEP = "\x00"
 
 # Diccionario Braille → Letras
 braille_dict = {
@@ -8,19 +41,439 @@ braille_dict = {
     "⠏": "p", "⠟": "q", "⠗": "r", "⠎": "s", "⠞": "t",
     "⠥": "u", "⠧": "v", "⠺": "w", "⠭": "x", "⠽": "y",
     "⠵": "z",
+    "⠻": "ñ", "⠷": "á", "⠮": "é", "⠌": "í", "⠬": "ó",
+    "⠾": "ú", "⠳": "ü",
     " ": " "
 }
 
+# Signos de puntuación (¿? y ¡! comparten signo en Braille español)
+signos_dict = {
+    "⠂": ",", "⠆": ";", "⠒": ":", "⠄": ".", "⠢": "?",
+    "⠖": "!", "⠦": "\"", "⠣": "(", "⠜": ")", "⠤": "-",
+}
+
+# Números: las letras a-j precedidas del indicador de número
+numeros_dict = {
+    "⠁": "1", "⠃": "2", "⠉": "3", "⠙": "4", "⠑": "5",
+    "⠋": "6", "⠛": "7", "⠓": "8", "⠊": "9", "⠚": "0",
+}
+
+# Separadores que se conservan tal cual en ambos sentidos
+_WHITESPACE = "\n\r\t" + _BATCH_SEP
+
+_LETTERS = {cell: ch for cell, ch in braille_dict.items() if cell != " "}
+_LOWER = "".join(_LETTERS.values()).encode("latin-1")
+_DIGITS = b"0123456789"
+
+# Bytes de control del texto intermedio (se eliminan o sustituyen al final)
+_CAP = b"\x01"
+_NUM = b"\x02"
+_LET = b"\x03"
+_UNK = b"\x1a"
+_BLANK = b"\x1f"  # celda vacía, se convierte en espacio al final
+_UNK_SOURCE = "\ue01a"  # carácter privado que el códec convierte en _UNK
+_CONTROL = _CAP + _NUM + _LET
+
+# En latin-1 la mayúscula de todas las letras del alfabeto es el byte con
+# el bit 0x20 apagado, y ¿ / ¡ son ? / ! con el bit 0x80 encendido.
+_CASE_BIT = 0x20
+_OPENING_BIT = 0x80
+_UPPER = bytes(code & ~_CASE_BIT for code in _LOWER)
+
+
+def _unknown_cells(error):
+    """Manejador de errores del códec: los símbolos no mapeados se marcan como desconocidos."""
+    if not isinstance(error, UnicodeEncodeError):
+        raise error
+    return _UNK_SOURCE * (error.end - error.start), error.end
+
+
+_UNKNOWN_ERRORS = "braille_desconocido"
+codecs.register_error(_UNKNOWN_ERRORS, _unknown_cells)
+
+
+def _compile_back_codec():
+    """
+    Códec charmap Braille → bytes latin-1: cada celda se codifica como el
+    byte de su carácter de salida y los indicadores como bytes de control.
+    """
+    table = ["\ufffe"] * 256  # U+FFFE = sin correspondencia
+    for mapping in (braille_dict, signos_dict):
+        for cell, ch in mapping.items():
+            table[ord(ch)] = cell
+    for ch in _WHITESPACE:
+        table[ord(ch)] = ch
+    table[_CAP[0]] = CAPITAL_SIGN
+    table[_NUM[0]] = NUMBER_SIGN
+    table[_LET[0]] = LETTER_SIGN
+    table[_UNK[0]] = _UNK_SOURCE
+    table[_BLANK[0]] = BLANK_CELL
+    return codecs.charmap_build("".join(table))
+
+
+def _compile_forward_codec():
+    """
+    Tabla charmap bytes latin-1 → Braille: mayúsculas y dígitos se convierten
+    a su celda base; los indicadores ya vienen insertados como bytes de control.
+    """
+    table = [chr(i) for i in range(256)]
+    for mapping in (braille_dict, signos_dict):
+        for cell, ch in mapping.items():
+            table[ord(ch)] = cell
+    for cell, ch in _LETTERS.items():
+        table[ord(ch.upper())] = cell
+    for cell, digit in numeros_dict.items():
+        table[ord(digit)] = cell
+    table[ord("¿")] = "⠢"
+    table[ord("¡")] = "⠖"
+    table[_CAP[0]] = CAPITAL_SIGN
+    table[_NUM[0]] = NUMBER_SIGN
+    table[_LET[0]] = LETTER_SIGN
+    return "".join(table)
+
+
+def _complement(members):
+    return bytes(code for code in range(256) if code not in members)
+
+
+# Tablas compiladas (una sola vez por proceso)
+_BACK_CODEC = _compile_back_codec()
+_FORWARD_CODEC = _compile_forward_codec()
+# Los indicadores que quedan tras resolver el contexto estaban sueltos: desconocidos
+_FINAL_TABLE = bytes.maketrans(_CAP + _NUM + _LET + _UNK + _BLANK, UNKNOWN.encode() * 4 + b" ")
+
+_ALNUM = _LOWER + _UPPER + _DIGITS
+_SEPARATORS = b" " + _BLANK + _WHITESPACE.encode()
+_DIGIT_LETTERS = b"abcdefghij"
+_NON_DIGITS = _complement(_DIGITS)
+_NON_UPPER = _complement(_UPPER)
+
+# Clases de cada byte para localizar números y mayúsculas (texto → Braille)
+_CLASS_TABLE = bytes.maketrans(
+    _UPPER + _LOWER + _DIGITS,
+    b"U" * len(_UPPER) + b"l" * len(_LOWER) + b"D" * len(_DIGITS),
+)
+_WORD_CLASSES = b"UlD"
+
+_DIGIT_TABLE = bytes.maketrans(_DIGIT_LETTERS, b"1234567890")
+_UPPER_TABLE = bytes.maketrans(_LOWER, _UPPER)
+# Número: indicador, letras a-j (con . o , entre cifras) y el interruptor opcional
+_NUMBER_RE = re.compile(rb"\x02([a-j]+(?:[.,][a-j]+)*)\x03?")
+# ¿ / ¡: signo que no sigue a una letra o cifra y va delante de otro carácter
+# (una expresión por signo, empezando por el literal: la búsqueda es en C)
+_OPENINGS = [
+    (re.compile(re.escape(sign) + rb"(?<![" + re.escape(_ALNUM) + rb"]" + re.escape(sign)
+                + rb")(?=[^" + re.escape(_SEPARATORS) + rb"])"), bytes((sign[0] | _OPENING_BIT,)))
+    for sign in (b"?", b"!")
+]
+# Mayúscula suelta delante de una letra
+_CAPITAL_RE = re.compile(rb"\x01([" + re.escape(_LOWER) + rb"])")
+_LETTER_RUN_RE = re.compile(b"[" + re.escape(_LOWER) + b"]+")
+_DIGIT_RUN_RE = re.compile(rb"[0-9]+(?:[.,][0-9]+)*")
+_NON_LATIN1_RE = re.compile("([^\x00-\xff]+)")
+
+# --- Braille → texto -------------------------------------------------------
+
+def _translate_matches(regex, raw, table):
+    """
+    Aplica `table` al grupo capturado de cada coincidencia y quita el resto
+    de la coincidencia, sin bucle en Python: re.split deja los grupos en las
+    posiciones impares y map(bytes.translate) los traduce en C.
+    """
+    parts = regex.split(raw)
+    parts[1::2] = map(bytes.translate, parts[1::2], repeat(table))
+    return b"".join(parts)
+
+
+def _resolve_numbers(raw):
+    """"\\x02ab" → "12" (el interruptor sólo separa el número de la letra)."""
+    return _translate_matches(_NUMBER_RE, raw, _DIGIT_TABLE)
+
+
+def _upper_word(part):
+    m = _LETTER_RUN_RE.match(part)
+    if m is None:
+        return _UNK + part  # indicador suelto
+    return m.group().translate(_UPPER_TABLE) + part[m.end():]
+
+
+def _resolve_capitals(raw):
+    """"\\x01\\x01palabra" → "PALABRA" y "\\x01x" → "X"."""
+    if _CAP + _CAP in raw:
+        parts = raw.split(_CAP + _CAP)
+        raw = parts[0] + b"".join([_upper_word(part) for part in parts[1:]])
+    # Mayúscula suelta: la letra siguiente pasa a mayúscula
+    return _translate_matches(_CAPITAL_RE, raw, _UPPER_TABLE)
+
+
+def _resolve_openings(raw):
+    """¿ y ¡: el signo que no sigue a una letra o cifra y precede a otro carácter abre."""
+    for regex, opening in _OPENINGS:
+        raw = regex.sub(opening, raw)
+    return raw
+
+
+def _join_labels(labels):
+    """Une las etiquetas de YOLO en una cadena de celdas (una celda por etiqueta)."""
+    if isinstance(labels, str):
+        return labels
+    if not isinstance(labels, (list, tuple)):
+        labels = list(labels)
+    cells = "".join(labels)
+    if len(cells) != len(labels):
+        # Etiquetas de más de un carácter: se consideran desconocidas
+        cells = "".join(label if len(label) == 1 else UNKNOWN for label in labels)
+    return cells
+
+
+def encode_cells(cells):
+    """
+    Celdas → texto intermedio: un byte latin-1 por celda, con los indicadores
+    como bytes de control y los símbolos desconocidos marcados.
+    """
+    return codecs.charmap_encode(cells, _UNKNOWN_ERRORS, _BACK_CODEC)[0]
+
+
+def resolve_bytes(raw):
+    """
+    Texto intermedio (un byte latin-1 por celda, indicadores como bytes de
+    control) → texto: resuelve números, mayúsculas y signos de apertura.
+    """
+    # Cada paso es una búsqueda en C que no copia nada si no encuentra su indicador
+    raw = _resolve_capitals(_resolve_numbers(raw))
+    raw = _resolve_openings(raw)
+    return raw.translate(_FINAL_TABLE).decode("latin-1")
+
+
+def cells_to_text(cells):
+    """Traduce una cadena de celdas Braille a texto."""
+    return resolve_bytes(encode_cells(cells))
+
+
 def braille_to_text(labels):
     """
     Convierte etiquetas detectadas por YOLO (símbolos Braille) a texto plano.
-    :param labels: lista de caracteres Braille (ej: ["⠁", "⠃", "⠉"])
+    :param labels: lista de caracteres Braille (ej: ["⠁", "⠃", "⠉"]) o una cadena de celdas
     :return: string con texto traducido
     """
-    texto = ""
-    for label in labels:
-        if label in braille_dict:
-            texto += braille_dict[label]
-        else:
-            texto += "?"  # Símbolo desconocido
-    return texto
+    return cells_to_text(_join_labels(labels))
+
+
+# --- Texto → Braille -------------------------------------------------------
+
+def _insert(raw, insertions):
+    """Inserta los bytes de control en las posiciones indicadas (ordenadas)."""
+    parts = []
+    last = 0
+    for pos, mark in insertions:
+        parts.append(raw[last:pos])
+        parts.append(mark)
+        last = pos
+    parts.append(raw[last:])
+    return b"".join(parts)
+
+
+def _insert_before(raw, positions, mark):
+    """Inserta `mark` en cada posición (ordenadas, pueden repetirse) sin bucle en Python."""
+    bounds = [0, *positions, len(raw)]
+    return mark.join(map(raw.__getitem__, map(slice, bounds, bounds[1:])))
+
+
+def _positions(classes, code):
+    """Posiciones de `code` en `classes`, a partir de las longitudes de split."""
+    parts = classes.split(code)
+    return list(accumulate(map(len, parts[:-1]), lambda pos, size: pos + size + 1))
+
+
+def _mark_numbers(raw):
+    """Antepone el indicador de número a cada cifra y el interruptor a la letra a-j que la sigue."""
+    classes = raw.translate(_CLASS_TABLE)
+    size = len(raw)
+    insertions = []
+    pos = classes.find(b"D")
+    while pos != -1:
+        end = _DIGIT_RUN_RE.match(raw, pos).end()
+        insertions.append((pos, _NUM))
+        if end < size and raw[end] in _DIGIT_LETTERS:
+            insertions.append((end, _LET))
+        pos = classes.find(b"D", end)
+    return _insert(raw, insertions)
+
+
+def _mark_capitals(raw):
+    """Indicador doble para las palabras en mayúsculas y simple para cada mayúscula suelta."""
+    classes = raw.translate(_CLASS_TABLE)
+    doubles = []
+    if b"UU" in classes:
+        classes = bytearray(classes)
+        size = len(classes)
+        pos = classes.find(b"UU")
+        while pos != -1:
+            end = pos + 2
+            while end < size and classes[end] == 0x55:  # "U"
+                end += 1
+            if (pos == 0 or classes[pos - 1] not in _WORD_CLASSES) and (
+                end == size or classes[end] not in _WORD_CLASSES
+            ):
+                # Palabra en mayúsculas: "⠨⠨" delante y nada en el resto de letras
+                doubles.append(pos)
+                classes[pos + 1:end] = b"l" * (end - pos - 1)
+            pos = classes.find(b"UU", end)
+    positions = _positions(classes, b"U")
+    if doubles:
+        positions = sorted(positions + doubles)
+    return _insert_before(raw, positions, _CAP)
+
+
+def _latin1_to_cells(raw):
+    if raw.translate(None, _CONTROL) != raw:
+        raw = raw.translate(None, _CONTROL)  # reservados para los indicadores
+    if raw.translate(None, _NON_DIGITS):
+        raw = _mark_numbers(raw)
+    if raw.translate(None, _NON_UPPER):
+        raw = _mark_capitals(raw)
+    return codecs.charmap_decode(raw, "strict", _FORWARD_CODEC)[0]
+
+
+def text_to_braille(text):
+    """
+    Convierte texto en español a Braille Grado 1 (celdas Unicode).
+    Los caracteres sin equivalente se conservan sin cambios.
+    """
+    try:
+        return _latin1_to_cells(text.encode("latin-1"))
+    except UnicodeEncodeError:
+        parts = _NON_LATIN1_RE.split(text)
+        parts[::2] = [_latin1_to_cells(part.encode("latin-1")) for part in parts[::2]]
+        return "".join(parts)
+
+
+def validate_options(translation_type, language=LANGUAGE_GRADE1):
+    """Lanza ValueError si el tipo de traducción o el idioma no están soportados."""
+    if translation_type not in (TEXT_TO_BRAILLE, BRAILLE_TO_TEXT):
+        raise ValueError(f"Tipo de traducción no soportado: {translation_type}")
+    if language not in LANGUAGES:
+        raise ValueError(f"Idioma no soportado: {language}")
+
+
+def translate(text, translation_type=TEXT_TO_BRAILLE, language=LANGUAGE_GRADE1):
+    """Traduce en el sentido indicado por translation_type, en Grado 1 ("es") o Grado 2 ("es-g2")."""
+    validate_options(translation_type, language)
+    if language == LANGUAGE_GRADE2:
+        # Importación diferida: braille_grade2 se construye sobre este módulo
+        from utils.braille_grade2 import cells_to_grade1, text_to_braille_g2
+        if translation_type == BRAILLE_TO_TEXT:
+            return cells_to_text(cells_to_grade1(_join_labels(text)))
+        return text_to_braille_g2(text)
+    if translation_type == BRAILLE_TO_TEXT:
+        return braille_to_text(text)
+    return text_to_braille(text)
+
+
+def translate_many(items, translation_type=TEXT_TO_BRAILLE, language=LANGUAGE_GRADE1):
+    """
+    Traduce una lista de textos (o de listas de etiquetas) en una sola pasada.
+    Los elementos se unen con un separador interno, se traducen juntos y se
+    vuelven a separar, conservando el orden.
+    """
+    if translation_type == BRAILLE_TO_TEXT:
+        items = [_join_labels(item) for item in items]
+    else:
+        items = list(items)
+    if not items:
+        return []
+    joined = _BATCH_SEP.join(items)
+    if joined.count(_BATCH_SEP) != len(items) - 1:
+        # Algún elemento contiene el separador: traducción individual
+        return [translate(item, translation_type, language) for item in items]
+    return translate(joined, translation_type, language).split(_BATCH_SEP)
+
+
+# --- Traducción en streaming -----------------------------------------------
+
+# Tamaño máximo del fragmento pendiente antes de forzar un corte
+STREAM_MAX_BUFFER = 1 << 20
+
+_TEXT_CUTS = " \n\r\t"
+_CELL_CUTS = " \n\r\t" + BLANK_CELL
+_TEXT_FORCED_CUTS = ".,;:()\"-"  # sin ? ni !: su lectura depende del carácter siguiente
+_CELL_FORCED_CUTS = "⠂⠆⠒⠄⠣⠜⠦⠤"
+_PENDING_INDICATORS = CAPITAL_SIGN + NUMBER_SIGN + LETTER_SIGN + "⠰⠈⠘"  # Grado 1 y prefijos de Grado 2
+_NUMBER_CELLS = set(numeros_dict) | {"⠄", "⠂"}
+_LOWER_CELLS = set(_LETTERS)
+
+
+def _last_cut(text, separators):
+    """Posición justo después del último separador de `text` (0 si no hay ninguno)."""
+    return max(text.rfind(sep) for sep in separators) + 1
+
+
+def _carried_state(piece):
+    """
+    Indicadores que siguen activos al final de `piece` (corte forzado dentro
+    de una palabra): el número o la palabra en mayúsculas continúan en el
+    fragmento siguiente, que debe empezar con su indicador.
+    """
+    number = piece.rfind(NUMBER_SIGN)
+    if number != -1 and set(piece[number + 1:]) <= _NUMBER_CELLS:
+        return NUMBER_SIGN
+    word = piece.rfind(CAPITAL_SIGN * 2)
+    if word != -1 and set(piece[word + 2:]) <= _LOWER_CELLS:
+        return CAPITAL_SIGN * 2
+    return ""
+
+
+def translate_stream(chunks, translation_type=TEXT_TO_BRAILLE, language=LANGUAGE_GRADE1,
+                     max_buffer=STREAM_MAX_BUFFER):
+    """
+    Traduce un iterable de fragmentos (str o listas de etiquetas) y va
+    devolviendo la traducción por partes, con memoria acotada por el tamaño
+    de los fragmentos y `max_buffer`.
+
+    Sólo se corta después de un espacio o salto de línea, donde los
+    indicadores de número, mayúsculas y Grado 2 ya no tienen efecto; así el
+    resultado concatenado es idéntico al de translate() sobre el texto
+    completo. Si un tramo supera `max_buffer` sin separadores se fuerza el
+    corte en un signo de puntuación o, en último caso, en cualquier punto:
+    los indicadores sueltos al final pasan al siguiente fragmento y el
+    número o la palabra en mayúsculas en curso se reabren con su indicador.
+    """
+    validate_options(translation_type, language)
+    back = translation_type == BRAILLE_TO_TEXT
+    cuts = _CELL_CUTS if back else _TEXT_CUTS
+    forced_cuts = _CELL_FORCED_CUTS if back else _TEXT_FORCED_CUTS
+    pending = []
+    pending_size = 0
+    carry = ""
+    for chunk in chunks:
+        if back:
+            chunk = _join_labels(chunk)
+        if not chunk:
+            continue
+        cut = _last_cut(chunk, cuts)
+        if cut:
+            piece = "".join(pending) + chunk[:cut]
+            rest = chunk[cut:]
+            pending, pending_size = ([rest], len(rest)) if rest else ([], 0)
+            yield translate(carry + piece, translation_type, language)
+            carry = ""
+            continue
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < max_buffer:
+            continue
+        # Corte forzado: no hay separadores en todo el tramo pendiente
+        buffer = "".join(pending)
+        cut = _last_cut(buffer, forced_cuts) or len(buffer)
+        if back:
+            while cut > 0 and buffer[cut - 1] in _PENDING_INDICATORS:
+                cut -= 1
+        if cut == 0:
+            pending, pending_size = [buffer], len(buffer)
+            continue
+        piece, rest = carry + buffer[:cut], buffer[cut:]
+        pending, pending_size = ([rest], len(rest)) if rest else ([], 0)
+        yield translate(piece, translation_type, language)
+        carry = _carried_state(piece) if back else ""
+    if pending:
+        yield translate(carry + "".join(pending), translation_type, language)
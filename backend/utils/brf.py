@@ -0,0 +1,132 @@
+# backend/utils/brf.py
+"""
+Exportación a BRF (Braille Ready Format) para imprimir en embosadoras.
+
+BRF es Braille ASCII de 6 puntos (tabla norteamericana): cada celda se
+escribe como un carácter ASCII, las líneas terminan en CR LF y cada página
+en salto de página (form feed).
+
+La paginación es un generador: recibe las celdas por fragmentos (por
+ejemplo la salida de braille_translator.translate_stream) y va entregando
+páginas completas, así que un libro entero se pagina con memoria constante.
+"""
+from utils.braille_translator import BLANK_CELL, text_to_braille
+
+DEFAULT_CELLS_PER_LINE = 40
+DEFAULT_LINES_PER_PAGE = 25
+
+# Braille ASCII: carácter de cada máscara de puntos 0-63 (0x2800 + máscara)
+BRF_CHARS = " A1B'K2L@CIF/MSP\"E3H9O6R^DJG>NTQ,*5<-U8V.%[$+X!&;:4\\0Z7(_?W]#Y)="
+
+# Celdas de 8 puntos: BRF sólo tiene 6, se descartan los puntos 7 y 8
+_TO_BRF = {0x2800 + mask: BRF_CHARS[mask & 0x3F] for mask in range(256)}
+
+# Una palabra sin espacios más larga que esto se trata como palabra completa
+_MAX_PENDING = 4096
+
+
+def cells_to_brf(cells):
+    """Convierte celdas Unicode a Braille ASCII (lo que no es celda se deja igual)."""
+    return cells.translate(_TO_BRF)
+
+
+def _tokens(chunks):
+    """Palabras y saltos de línea ("\\n") de un iterable de fragmentos de celdas."""
+    pending = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk.replace(BLANK_CELL, " ").replace("\r", "")).split("\n")
+        # La última palabra puede continuar en el fragmento siguiente
+        words = lines[-1].split(" ")
+        pending = words.pop()
+        for line in lines[:-1]:
+            yield from filter(None, line.split(" "))
+            yield "\n"
+        yield from filter(None, words)
+        if len(pending) > _MAX_PENDING:
+            yield pending
+            pending = ""
+    if pending:
+        yield pending
+
+
+class _Pages:
+    """Estado de la paginación: líneas de la página actual y número de página."""
+
+    def __init__(self, cells_per_line, lines_per_page, page_numbers):
+        self.cells_per_line = cells_per_line
+        self.lines_per_page = lines_per_page
+        self.page_numbers = page_numbers
+        self.page = 1
+        self.lines = []
+        self.line = ""
+        self.done = []
+
+    def _number(self):
+        return text_to_braille(str(self.page)) if self.page_numbers else ""
+
+    def width(self):
+        """Celdas disponibles en la línea actual (la primera lleva el número de página)."""
+        if self.lines or not self.page_numbers:
+            return self.cells_per_line
+        return self.cells_per_line - len(self._number()) - 1
+
+    def end_line(self):
+        if not self.lines and self.page_numbers:
+            number = self._number()
+            self.line = self.line.ljust(self.cells_per_line - len(number)) + number
+        self.lines.append(self.line)
+        self.line = ""
+        if len(self.lines) == self.lines_per_page:
+            self.end_page()
+
+    def end_page(self):
+        self.done.append(self.lines)
+        self.lines = []
+        self.page += 1
+
+    def add_word(self, word):
+        if self.line and len(self.line) + 1 + len(word) <= self.width():
+            self.line += " " + word
+            return
+        if self.line:
+            self.end_line()
+        # Palabra más larga que la línea: se corta (no hay otra opción)
+        while len(word) > self.width():
+            self.line = word[:self.width()]
+            word = word[len(self.line):]
+            self.end_line()
+        self.line = word
+
+
+def paginate(chunks, cells_per_line=DEFAULT_CELLS_PER_LINE, lines_per_page=DEFAULT_LINES_PER_PAGE,
+             page_numbers=True):
+    """
+    Genera las páginas (listas de líneas de celdas) a partir de fragmentos de
+    celdas, con ajuste de línea sin partir palabras y el número de página
+    alineado a la derecha en la primera línea.
+    """
+    if cells_per_line < 10 or lines_per_page < 1:
+        raise ValueError("Formato de página demasiado pequeño")
+    pages = _Pages(cells_per_line, lines_per_page, page_numbers)
+    for token in _tokens(chunks):
+        if token == "\n":
+            pages.end_line()
+        else:
+            pages.add_word(token)
+        if pages.done:
+            yield from pages.done
+            pages.done.clear()
+    if pages.line:
+        pages.end_line()
+    if pages.lines:
+        pages.end_page()
+    yield from pages.done
+
+
+def brf_stream(chunks, cells_per_line=DEFAULT_CELLS_PER_LINE, lines_per_page=DEFAULT_LINES_PER_PAGE,
+               page_numbers=True):
+    """Genera el archivo BRF página a página (texto ASCII)."""
+    for lines in paginate(chunks, cells_per_line, lines_per_page, page_numbers):
+        yield "\r\n".join(cells_to_brf(line) for line in lines) + "\r\n\f"
@@ -0,0 +1,170 @@
+"""
+Rasterizado perezoso de documentos de varias páginas (PDF y TIFF).
+
+Las páginas se generan de una en una: sólo la página actual está en
+memoria, por largo que sea el documento.
+
+- PDF: pypdfium2 (opcional) renderiza cada página a `dpi`, con un tope de
+  píxeles por página. pdfium no es seguro entre hilos: todas las llamadas
+  pasan por un único bloqueo del proceso
+- TIFF multipágina: Pillow (lo instala ultralytics) lee cada página con
+  seek(); las páginas muy grandes se reducen con reduce() por un factor
+  entero antes de pasarlas a RGB
+- cualquier otra imagen se trata como un documento de una página
+
+open_document (services/document_service) lee la primera página al abrir,
+así un archivo que no se puede decodificar se rechaza antes de responder.
+
+Cada página se entrega como (imagen BGR, factor, ppp) igual que decode_full.
+"""
+import io
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from utils.image_utils import decode_full
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # sin pypdfium2 no se aceptan PDF
+    pdfium = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+POINTS_PER_INCH = 72
+# Modos que Image.reduce() no admite: se pasan antes al modo indicado
+_REDUCE_MODES = {"1": "L", "P": "RGB", "I;16": "I"}
+
+_PDFIUM_LOCK = threading.Lock()
+
+
+class UnsupportedDocument(ValueError):
+    """Formato de documento no reconocido o sin librería para leerlo."""
+
+
+def document_kind(data):
+    """"pdf", "tiff" o "image" según la firma del archivo."""
+    head = bytes(data[:4])
+    if head == b"%PDF":
+        return "pdf"
+    if head in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    return "image"
+
+
+class Document:
+    """Documento abierto: número de páginas y generador de páginas."""
+
+    def __init__(self, data, dpi, max_pixels):
+        self.kind = document_kind(data)
+        self.dpi = dpi
+        self.max_pixels = max_pixels
+        self._data = data
+        self._source = None
+        self._first = None
+        if self.kind == "pdf":
+            if pdfium is None:
+                raise UnsupportedDocument("Los PDF requieren pypdfium2")
+            try:
+                with _PDFIUM_LOCK:
+                    self._source = pdfium.PdfDocument(bytes(data))
+                    self.page_count = len(self._source)
+            except pdfium.PdfiumError as e:
+                raise UnsupportedDocument(f"PDF no válido: {e}")
+        elif self.kind == "tiff":
+            if Image is None:
+                raise UnsupportedDocument("Los TIFF multipágina requieren Pillow")
+            try:
+                self._source = Image.open(io.BytesIO(data))
+            except (OSError, Image.DecompressionBombError) as e:
+                raise UnsupportedDocument(f"TIFF no válido: {e}")
+            self.page_count = getattr(self._source, "n_frames", 1)
+        else:
+            self.page_count = 1
+
+    def read_first_page(self):
+        """
+        Lee ya la primera página (pages() la reutiliza). UnsupportedDocument
+        si el archivo no es una imagen reconocible, ValueError si es un PDF o
+        TIFF cuya primera página no se puede decodificar.
+        """
+        if self._first is None and self.page_count:
+            try:
+                self._first = self._page(0)
+            except Exception as e:
+                if self.kind == "image":
+                    raise UnsupportedDocument("Formato de documento no reconocido") from e
+                # PdfiumError, OSError de Pillow...: el archivo está dañado
+                raise ValueError(f"No se pudo leer la primera página: {e}") from e
+        return self._first
+
+    def pages(self):
+        """Genera (imagen BGR, factor, ppp) página a página."""
+        try:
+            for index in range(self.page_count):
+                if index == 0 and self._first is not None:
+                    page, self._first = self._first, None
+                    yield page
+                else:
+                    yield self._page(index)
+        finally:
+            self.close()
+
+    def _page(self, index):
+        if self.kind == "pdf":
+            return self._render_pdf(index)
+        if self.kind == "tiff":
+            return self._read_tiff(index)
+        img, factor = decode_full(self._data, self.max_pixels)
+        return img, factor, None
+
+    def _render_pdf(self, index):
+        with _PDFIUM_LOCK:
+            page = self._source[index]
+            try:
+                width, height = page.get_size()  # en puntos
+                scale = self.dpi / POINTS_PER_INCH
+                if width * height * scale * scale > self.max_pixels:
+                    scale = math.sqrt(self.max_pixels / (width * height))
+                bitmap = page.render(scale=scale)
+                # pdfium entrega BGR(A): el orden que espera OpenCV
+                img = bitmap.to_numpy()
+                if img.ndim == 3 and img.shape[2] == 4:
+                    img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+                else:
+                    img = np.array(img)  # el bitmap se libera al cerrar la página
+                return img, 1, round(scale * POINTS_PER_INCH)
+            finally:
+                page.close()
+
+    def _read_tiff(self, index):
+        self._source.seek(index)
+        frame = self._source
+        factor = 1
+        pixels = frame.width * frame.height
+        if pixels > self.max_pixels:
+            # Se reduce en el modo original (1 bit o gris en los escaneos),
+            # sin crear antes la página completa en RGB
+            factor = math.ceil(math.sqrt(pixels / self.max_pixels))
+            if frame.mode in _REDUCE_MODES:
+                frame = frame.convert(_REDUCE_MODES[frame.mode])
+            frame = frame.reduce(factor)
+        frame = frame.convert("RGB")
+        img = cv2.cvtColor(np.asarray(frame), cv2.COLOR_RGB2BGR)
+        dpi = self._source.info.get("dpi")
+        return img, factor, round(float(dpi[0])) if dpi else None
+
+    def close(self):
+        self._first = None
+        if self._source is not None:
+            if self.kind == "pdf":
+                with _PDFIUM_LOCK:
+                    self._source.close()
+            else:
+                self._source.close()
+            self._source = None
@@ -1,4 +1,163 @@
-from PIL import Image
+"""
+Lectura y preprocesado de imágenes subidas, sin pasar por disco.
 
-def convert_to_rgb(image_file):
-    return Image.open(image_file).convert("RGB")
+- read_upload: copia el cuerpo de la petición en un buffer del tamaño exacto
+  (o devuelve el buffer del BytesIO sin copiarlo) y aplica el límite de tamaño
+- decode_image: una sola decodificación con cv2.imdecode; si la foto es mucho
+  más grande que la entrada del modelo, libjpeg la decodifica ya reducida
+  (IMREAD_REDUCED_COLOR_2/4/8), que es varias veces más rápido
+- decode_full: decodificación a resolución completa con un tope de píxeles,
+  para la inferencia por mosaicos
+- letterbox: redimensiona sobre un lienzo reutilizado por hilo, con el mismo
+  relleno (114) que usa ultralytics
+"""
+import io
+import threading
+
+import cv2
+import numpy as np
+
+READ_CHUNK = 64 * 1024
+PAD_VALUE = 114
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+_local = threading.local()
+
+
+class UploadTooLarge(ValueError):
+    """El cuerpo supera el tamaño máximo permitido."""
+
+
+def read_upload(stream, max_bytes, length=None):
+    """
+    Lee una subida completa en memoria y devuelve un buffer (memoryview).
+    `length` es el Content-Length si se conoce: el buffer se reserva una vez.
+    """
+    if isinstance(stream, io.BytesIO):
+        # Archivo de un multipart ya en memoria: se usa su buffer tal cual
+        if stream.getbuffer().nbytes > max_bytes:
+            raise UploadTooLarge(f"La imagen supera {max_bytes} bytes")
+        return stream.getbuffer()
+
+    if length is not None and length > max_bytes:
+        raise UploadTooLarge(f"La imagen supera {max_bytes} bytes")
+    buf = bytearray(length if length is not None else READ_CHUNK)
+    view = memoryview(buf)
+    size = 0
+    while True:
+        if size == len(buf):
+            if length is not None:
+                break
+            if size >= max_bytes + 1:
+                raise UploadTooLarge(f"La imagen supera {max_bytes} bytes")
+            # Sin Content-Length: se duplica el buffer hasta el límite
+            view.release()
+            buf.extend(bytes(min(len(buf), max_bytes + 1 - len(buf))))
+            view = memoryview(buf)
+        if hasattr(stream, "readinto"):
+            n = stream.readinto(view[size:])
+        else:
+            chunk = stream.read(len(buf) - size)
+            n = len(chunk)
+            view[size:size + n] = chunk
+        if not n:
+            break
+        size += n
+    if size > max_bytes:
+        raise UploadTooLarge(f"La imagen supera {max_bytes} bytes")
+    return view[:size]
+
+
+def image_size(data):
+    """(ancho, alto) leyendo sólo la cabecera JPEG o PNG; None si no se reconoce."""
+    data = memoryview(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos, end = 2, len(data)
+    while pos + 9 <= end:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # relleno entre marcadores
+            pos += 1
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            # SOFn: alto y ancho tras la precisión
+            return int.from_bytes(data[pos + 7:pos + 9], "big"), int.from_bytes(data[pos + 5:pos + 7], "big")
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            pos += 2  # marcadores sin longitud
+            continue
+        pos += 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+    return None
+
+
+def decode_image(data, target=640):
+    """
+    Decodifica la imagen (BGR) una sola vez. Devuelve (imagen, factor) donde
+    `factor` es la reducción aplicada en la decodificación (1, 2, 4 u 8).
+    """
+    array = np.frombuffer(data, np.uint8)
+    size = image_size(data) if bytes(data[:2]) == b"\xff\xd8" else None
+    if size:
+        longest = max(size)
+        for factor, flag in _REDUCED_FLAGS:
+            if longest // factor >= target:
+                img = cv2.imdecode(array, flag)
+                if img is not None:
+                    return img, factor
+                break
+    img = cv2.imdecode(array, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("No se pudo decodificar la imagen")
+    return img, 1
+
+
+def decode_full(data, max_pixels):
+    """
+    Decodifica a la mayor resolución que no supere `max_pixels`.
+    Devuelve (imagen, factor) como decode_image.
+    """
+    array = np.frombuffer(data, np.uint8)
+    size = image_size(data)
+    if size and size[0] * size[1] > max_pixels:
+        for factor, flag in reversed(_REDUCED_FLAGS):
+            if (size[0] // factor) * (size[1] // factor) <= max_pixels or factor == 8:
+                img = cv2.imdecode(array, flag)
+                if img is None:
+                    break
+                return img, factor
+    img = cv2.imdecode(array, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("No se pudo decodificar la imagen")
+    return img, 1
+
+
+def letterbox(img, size=640):
+    """
+    Ajusta la imagen a un lienzo size×size conservando la proporción.
+    Devuelve (lienzo, escala, (izquierda, arriba)). El lienzo se reutiliza en
+    el mismo hilo: hay que terminar de usarlo antes de la siguiente llamada.
+    """
+    h, w = img.shape[:2]
+    scale = min(size / h, size / w)
+    nw, nh = max(1, round(w * scale)), max(1, round(h * scale))
+    left, top = (size - nw) // 2, (size - nh) // 2
+
+    canvas = getattr(_local, "canvas", None)
+    if canvas is None or canvas.shape != (size, size, 3):
+        canvas = _local.canvas = np.empty((size, size, 3), np.uint8)
+    canvas.fill(PAD_VALUE)
+    region = canvas[top:top + nh, left:left + nw]
+    if (nw, nh) == (w, h):
+        region[...] = img
+    else:
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        region[...] = cv2.resize(img, (nw, nh), interpolation=interpolation)
+    return canvas, scale, (left, top)
@@ -0,0 +1,155 @@
+"""
+Distancia de edición y alineamiento para puntuar CER/WER.
+
+- levenshtein: sólo la distancia, con el algoritmo bit-paralelo de Myers
+  (variante de Hyyrö para distancia global). Cada columna de la matriz se
+  actualiza con unas pocas operaciones sobre enteros de Python usados como
+  vectores de bits: O(m·⌈n/64⌉) en tiempo y O(n) bits de memoria
+- align: alineamiento completo (para los pares de confusión) con
+  Hirschberg. Divide la primera secuencia por la mitad, busca dónde cruza
+  el camino óptimo con dos pasadas bit-paralelas (una hacia delante y otra
+  sobre las secuencias invertidas) y recurre en las dos mitades. Memoria
+  lineal; los trozos pequeños se resuelven con la matriz completa
+- confusion_pairs: cuenta los pares (esperado, obtenido) de dos cadenas
+  alineadas con numpy
+
+Las secuencias pueden ser cadenas o listas de símbolos (p. ej. palabras).
+"""
+from collections import Counter
+
+import numpy as np
+
+GAP = "-"
+
+# Por debajo de estas celdas la matriz completa es más rápida que dividir
+FULL_DP_CELLS = 256
+
+
+def _peq(pattern):
+    """Máscara de posiciones de cada símbolo en el patrón (bit i = pattern[i])."""
+    peq = {}
+    for i, symbol in enumerate(pattern):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+    return peq
+
+
+def last_row(a, b):
+    """
+    Última fila de la matriz de Levenshtein de `a` contra `b`: lista de
+    m+1 distancias entre `a` completa y cada prefijo b[:j].
+    """
+    n = len(a)
+    if n == 0:
+        return list(range(len(b) + 1))
+    peq = _peq(a)
+    mask = (1 << n) - 1
+    high = 1 << (n - 1)
+    pv, mv, score = mask, 0, n
+    row = [score]
+    for symbol in b:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # Distancia global: la fila 0 crece de 1 en 1, entra un 1 por abajo
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        row.append(score)
+    return row
+
+
+def levenshtein(a, b):
+    """Distancia de edición entre dos secuencias."""
+    if len(a) > len(b):
+        a, b = b, a  # el patrón (vector de bits) es la más corta
+    if not a:
+        return len(b)
+    return last_row(a, b)[-1]
+
+
+def align_full(a, b):
+    """
+    Alineamiento con la matriz completa, O(n·m) en tiempo y memoria.
+    Devuelve (distancia, a alineada, b alineada) con GAP en los huecos.
+    """
+    n, m = len(a), len(b)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        dp[i][0] = i
+    for j in range(m + 1):
+        dp[0][j] = j
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            dp[i][j] = min(dp[i - 1][j] + 1, dp[i][j - 1] + 1, dp[i - 1][j - 1] + cost)
+    # Reconstrucción: huecos antes que sustituciones en caso de empate
+    i, j = n, m
+    ra, rb = [], []
+    while i > 0 or j > 0:
+        if i > 0 and dp[i][j] == dp[i - 1][j] + 1:
+            ra.append(a[i - 1]); rb.append(GAP); i -= 1
+        elif j > 0 and dp[i][j] == dp[i][j - 1] + 1:
+            ra.append(GAP); rb.append(b[j - 1]); j -= 1
+        else:
+            ra.append(a[i - 1] if i > 0 else GAP)
+            rb.append(b[j - 1] if j > 0 else GAP)
+            i -= 1; j -= 1
+    return dp[n][m], ra[::-1], rb[::-1]
+
+
+def _hirschberg(a, b, ra, rb):
+    """Añade el alineamiento de a y b a ra/rb y devuelve su distancia."""
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        ra.extend(list(a) + [GAP] * m)
+        rb.extend([GAP] * n + list(b))
+        return n + m
+    if n * m <= FULL_DP_CELLS or n == 1:
+        distance, xa, xb = align_full(a, b)
+        ra.extend(xa)
+        rb.extend(xb)
+        return distance
+    mid = n // 2
+    forward = np.array(last_row(a[:mid], b))
+    backward = np.array(last_row(a[mid:][::-1], b[::-1]))
+    # El camino óptimo cruza la fila `mid` en la columna j de menor coste total
+    costs = forward + backward[::-1]
+    j = int(np.argmin(costs))
+    _hirschberg(a[:mid], b[:j], ra, rb)
+    _hirschberg(a[mid:], b[j:], ra, rb)
+    return int(costs[j])
+
+
+def align(a, b):
+    """
+    Alineamiento óptimo en memoria lineal. Devuelve (distancia, a alineada,
+    b alineada); las alineadas son cadenas si las entradas lo son.
+    """
+    ra, rb = [], []
+    distance = _hirschberg(a, b, ra, rb)
+    if isinstance(a, str) and isinstance(b, str):
+        return distance, "".join(ra), "".join(rb)
+    return distance, ra, rb
+
+
+def confusion_pairs(aligned_a, aligned_b):
+    """Counter de (esperado, obtenido) en las sustituciones de dos cadenas alineadas."""
+    x = np.frombuffer(aligned_a.encode("utf-32-le"), dtype=np.uint32)
+    y = np.frombuffer(aligned_b.encode("utf-32-le"), dtype=np.uint32)
+    gap = ord(GAP)
+    substituted = (x != y) & (x != gap) & (y != gap)
+    if not substituted.any():
+        return Counter()
+    keys = (x[substituted].astype(np.uint64) << np.uint64(32)) | y[substituted]
+    values, counts = np.unique(keys, return_counts=True)
+    return Counter({
+        (chr(int(v >> np.uint64(32))), chr(int(v & np.uint64(0xFFFFFFFF)))): int(c)
+        for v, c in zip(values, counts)
+    })
@@ -0,0 +1,256 @@
+"""
+Corrector ortográfico en español con índice de borrados simétricos (SymSpell).
+
+En vez de generar todas las ediciones de cada palabra leída (lo que hace
+pyspellchecker en cada llamada), el diccionario se preprocesa una vez: cada
+palabra se indexa bajo todas las cadenas que resultan de borrarle hasta
+MAX_DISTANCE letras de su prefijo de PREFIX_LENGTH letras. Para corregir una
+palabra se generan sus propios borrados, se buscan en el índice y sólo los
+candidatos encontrados se comprueban con la distancia de edición (con
+transposiciones, como SymSpell). Gana el de menor distancia y, a igualdad,
+el más frecuente.
+
+El índice se guarda como arrays .npy en un directorio (SPELL_INDEX_PATH) y
+se abre con mmap: cargarlo no lee nada del disco y todos los workers de
+gunicorn comparten las mismas páginas de la caché del sistema.
+
+- words.bin / word_offsets.npy: palabras en UTF-8 concatenadas
+- freqs.npy: frecuencia de cada palabra
+- keys.npy: hash de 64 bits (blake2b) de cada borrado, ordenado
+- posting_offsets.npy / postings.npy: palabras de cada borrado
+
+Construcción (con el diccionario de pyspellchecker o un archivo
+"palabra frecuencia" por línea):
+  python backend/utils/spell_index.py [--words frecuencias.txt] [--out dir]
+
+Si el índice no existe, `spell_index` queda en None y no se corrige nada.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    # El índice se construye ejecutando este archivo como script
+    sys.path.insert(0, _BACKEND_DIR)
+
+
+INDEX_PATH = os.environ.get("SPELL_INDEX_PATH", os.path.join(_BACKEND_DIR, "spell_index"))
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+CACHE_SIZE = int(os.environ.get("SPELL_CACHE_SIZE", 50000))
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def _key(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def osa_distance(a, b, limit):
+    """
+    Distancia de edición con transposiciones de letras contiguas ("lectrua"
+    → "lectura" = 1), calculada sólo en la banda |i - j| <= limit. Si supera
+    `limit` devuelve limit + 1.
+    """
+    # Prefijo y sufijo comunes no cuentan (los candidatos comparten prefijo)
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    n, m = len(a), len(b)
+    over = limit + 1
+    if abs(n - m) > limit:
+        return over
+    if not n or not m:
+        return max(n, m)
+    prev2, prev = None, [j if j <= limit else over for j in range(m + 1)]
+    for i in range(1, n + 1):
+        row = [over] * (m + 1)
+        row[0] = i if i <= limit else over
+        lo, hi = max(1, i - limit), min(m, i + limit)
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            best = prev[j - 1] + (ai != b[j - 1])
+            if prev[j] + 1 < best:
+                best = prev[j] + 1
+            if row[j - 1] + 1 < best:
+                best = row[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < best:
+                best = prev2[j - 2] + 1
+            row[j] = best
+        if min(row[lo - 1:hi + 1]) > limit:
+            return over
+        prev2, prev = prev, row
+    return min(prev[m], over)
+
+
+def deletes(word, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """Conjunto de cadenas obtenidas borrando hasta max_distance letras del prefijo (incluida la palabra)."""
+    word = word[:prefix_length]
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+def build_index(frequencies, out, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """Construye el índice en `out` a partir de {palabra: frecuencia}."""
+    words = sorted(w for w in frequencies if w and not any(c.isdigit() for c in w))
+    encoded = [w.encode("utf-8") for w in words]
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    keys, ids = [], []
+    for word_id, word in enumerate(words):
+        for variant in deletes(word, max_distance, prefix_length):
+            keys.append(_key(variant))
+            ids.append(word_id)
+    keys = np.array(keys, dtype=np.uint64)
+    ids = np.array(ids, dtype=np.uint32)
+    order = np.argsort(keys, kind="stable")
+    unique_keys, starts = np.unique(keys[order], return_index=True)
+
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, "words.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(out, "word_offsets.npy"), offsets)
+    np.save(os.path.join(out, "freqs.npy"), np.array([frequencies[w] for w in words], dtype=np.int64))
+    np.save(os.path.join(out, "keys.npy"), unique_keys)
+    np.save(os.path.join(out, "posting_offsets.npy"), np.append(starts, len(order)).astype(np.int64))
+    np.save(os.path.join(out, "postings.npy"), ids[order])
+    with open(os.path.join(out, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"words": len(words), "keys": len(unique_keys), "maxDistance": max_distance,
+                   "prefixLength": prefix_length}, f)
+    return len(words), len(unique_keys)
+
+
+class SpellIndex:
+    """Índice de borrados simétricos abierto con mmap (sólo lectura)."""
+
+    def __init__(self, path=INDEX_PATH, cache_size=CACHE_SIZE):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.max_distance = meta["maxDistance"]
+        self.prefix_length = meta["prefixLength"]
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        with open(os.path.join(path, "words.bin"), "rb") as f:
+            self.words = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if meta["words"] else b""
+        self.word_offsets = load("word_offsets.npy")
+        self.freqs = load("freqs.npy")
+        self.keys = load("keys.npy")
+        self.posting_offsets = load("posting_offsets.npy")
+        self.postings = load("postings.npy")
+        # Las palabras corregidas se repiten mucho en una página: LRU por proceso
+        self.correct_word = lru_cache(maxsize=cache_size)(self._correct_word)
+
+    def word(self, word_id):
+        return self.words[self.word_offsets[word_id]:self.word_offsets[word_id + 1]].decode("utf-8")
+
+    def candidates(self, word):
+        """Ids de las palabras que comparten algún borrado con `word`."""
+        queries = np.array([_key(v) for v in deletes(word, self.max_distance, self.prefix_length)],
+                           dtype=np.uint64)
+        # Búsqueda binaria sobre el array mapeado: sólo se leen unas pocas páginas
+        pos = np.searchsorted(self.keys, queries)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == queries[found]
+        pos = pos[found]
+        ids = [self.postings[self.posting_offsets[p]:self.posting_offsets[p + 1]] for p in pos]
+        return np.unique(np.concatenate(ids)) if ids else np.zeros(0, dtype=np.uint32)
+
+    def contains(self, word):
+        """Búsqueda binaria de la palabra exacta en la lista ordenada."""
+        lo, hi = 0, len(self.word_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.word(mid) < word:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self.word_offsets) - 1 and self.word(lo) == word
+
+    def _correct_word(self, word):
+        # La mayoría de las palabras ya están bien escritas
+        if self.contains(word):
+            return word
+        ids = self.candidates(word).astype(np.int64)
+        starts, ends = self.word_offsets[ids], self.word_offsets[ids + 1]
+        # Filtro vectorizado por longitud (en bytes: las tildes ocupan dos)
+        near = np.abs((ends - starts) - len(word.encode("utf-8"))) <= 2 * self.max_distance
+        best, best_key = word, None
+        for start, end, freq in zip(starts[near].tolist(), ends[near].tolist(), self.freqs[ids[near]].tolist()):
+            candidate = self.words[start:end].decode("utf-8")
+            distance = osa_distance(word, candidate, self.max_distance)
+            if distance > self.max_distance:
+                continue
+            key = (distance, -freq)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def correct_text(self, text):
+        """Corrige cada palabra de más de una letra conservando espacios, signos y mayúsculas."""
+        def fix(match):
+            token = match.group(0)
+            if len(token) <= 1:
+                return token
+            corrected = self.correct_word(token.lower())
+            if token.isupper():
+                return corrected.upper()
+            if token[0].isupper():
+                return corrected[:1].upper() + corrected[1:]
+            return corrected
+
+        return _WORD.sub(fix, text)
+
+
+def open_index(path=INDEX_PATH):
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    try:
+        return SpellIndex(path)
+    except Exception as e:
+        print(f"⚠️ Índice ortográfico no disponible ({path}): {e}")
+        return None
+
+
+spell_index = open_index()
+
+
+def _load_frequencies(path):
+    if path is None:
+        from spellchecker import SpellChecker
+        return dict(SpellChecker(language="es").word_frequency.dictionary)
+    frequencies = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                frequencies[parts[0].lower()] = int(parts[1]) if len(parts) > 1 else 1
+    return frequencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", default=None, help='archivo "palabra frecuencia" (por defecto, pyspellchecker es)')
+    parser.add_argument("--out", default=INDEX_PATH)
+    args = parser.parse_args()
+    words, keys = build_index(_load_frequencies(args.words), args.out)
+    print(f"✅ Índice ortográfico: {words} palabras, {keys} borrados en {args.out}")
@@ -1,17 +1,33 @@
-from ultralytics import YOLO
-import cv2
+import argparse
+import os
+import sys
 
-# Cargar el modelo entrenado
-model = YOLO("runs/train/braille_model/weights/best.pt")
+# Permite ejecutar el script desde cualquier directorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.model_registry import get_model
 
-# Ruta de imagen
-image_path = "test_image.jpg"
 
-# Ejecutar predicción
-results = model(image_path, show=True, conf=0.5)
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="runs/train/braille_model/weights/best.pt")
+    parser.add_argument("--image", default="test_image.jpg")
+    parser.add_argument("--output", default="output.jpg")
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--show", action="store_true")
+    args = parser.parse_args()
 
-# Guardar resultados
-for r in results:
-    r.save(filename="output.jpg")
+    # Cargar el modelo entrenado (mismo registro que el backend)
+    model = get_model(os.path.abspath(args.model))
 
-print("✅ Detección completada y guardada en output.jpg")
+    # Ejecutar predicción
+    results = model(args.image, show=args.show, conf=args.conf)
+
+    # Guardar resultados
+    for r in results:
+        r.save(filename=args.output)
+
+    print(f"✅ Detección completada y guardada en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Exporta best.pt a ONNX Runtime u OpenVINO, en FP32 o INT8.
+
+La cuantización INT8 se calibra con las imágenes de validación que usa
+eval_translation.py (dataset7/valid/images). Los artefactos quedan junto a
+los pesos con el nombre que espera services/model_registry.artifact_path,
+así que basta con INFERENCE_BACKEND=onnxruntime|openvino (e INFERENCE_INT8=1)
+para servirlos.
+
+Uso:
+  python backend/yolov8_model/export.py --format onnx
+  python backend/yolov8_model/export.py --format onnx --int8 --calib 200
+  python backend/yolov8_model/export.py --format openvino --int8
+
+Para comparar latencia y CER con torch: backend/benchmarks/bench_backends.py
+"""
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Permite ejecutar el script desde cualquier directorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.model_registry import DEFAULT_MODEL_PATH, artifact_path
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+
+def calibration_images(images_dir, limit):
+    paths = sorted(p for p in Path(images_dir).glob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        raise FileNotFoundError(f"No hay imágenes de calibración en {images_dir}")
+    return paths[:limit] if limit else paths
+
+
+def _move(src, dst):
+    """Deja el artefacto de ultralytics en la ruta canónica del registro."""
+    src, dst = os.path.abspath(src), os.path.abspath(dst)
+    if src == dst:
+        return dst
+    if os.path.isdir(dst):
+        shutil.rmtree(dst)
+    elif os.path.exists(dst):
+        os.remove(dst)
+    shutil.move(src, dst)
+    return dst
+
+
+def export_onnx(weights, imgsz, int8=False, images=None, calib=0):
+    from ultralytics import YOLO
+
+    # Batch dinámico: el planificador de inferencia envía lotes de tamaño variable
+    exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    fp32 = _move(exported, artifact_path(weights, "onnxruntime", int8=False))
+    if not int8:
+        return fp32
+    return quantize_onnx(fp32, artifact_path(weights, "onnxruntime", int8=True),
+                         calibration_images(images, calib), imgsz)
+
+
+class _CalibrationReader:
+    """Entradas de calibración preprocesadas igual que en inferencia (letterbox, RGB, 0-1)."""
+
+    def __init__(self, input_name, paths, imgsz):
+        import cv2
+        import numpy as np
+        from ultralytics.data.augment import LetterBox
+
+        letterbox = LetterBox((imgsz, imgsz), auto=False)
+
+        def batches():
+            for path in paths:
+                img = cv2.imread(str(path))
+                if img is None:
+                    print(f"⚠️ Imagen de calibración ilegible: {path}")
+                    continue
+                img = letterbox(image=img)[..., ::-1].transpose(2, 0, 1)
+                yield {input_name: np.ascontiguousarray(img, dtype=np.float32)[None] / 255.0}
+
+        self._batches = batches()
+
+    def get_next(self):
+        return next(self._batches, None)
+
+    def rewind(self):
+        pass
+
+
+def quantize_onnx(fp32_path, int8_path, paths, imgsz):
+    import onnxruntime
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static,
+    )
+
+    class Reader(_CalibrationReader, CalibrationDataReader):
+        pass
+
+    session = onnxruntime.InferenceSession(fp32_path, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    del session
+
+    # Inferencia de formas previa recomendada por onnxruntime para cuantizar
+    source = fp32_path
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        source = fp32_path.replace(".onnx", "_prep.onnx")
+        quant_pre_process(fp32_path, source)
+    except Exception as e:
+        print(f"⚠️ Preprocesado para cuantización omitido: {e}")
+        source = fp32_path
+
+    try:
+        quantize_static(
+            source, int8_path, Reader(input_name, paths, imgsz),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    finally:
+        if source != fp32_path and os.path.exists(source):
+            os.remove(source)
+    return int8_path
+
+
+def export_openvino(weights, imgsz, int8=False, data=None):
+    from ultralytics import YOLO
+
+    # En INT8 ultralytics calibra con NNCF sobre el split "val" del data.yaml
+    options = {"int8": True, "data": data} if int8 else {}
+    exported = YOLO(weights).export(format="openvino", imgsz=imgsz, dynamic=True, **options)
+    return _move(exported, artifact_path(weights, "openvino", int8=int8))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--format", choices=("onnx", "openvino"), required=True)
+    parser.add_argument("--int8", action="store_true", help="cuantización estática INT8")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--data", default="backend/dataset/dataset7/data.yaml",
+                        help="data.yaml cuyo split val se usa para calibrar OpenVINO")
+    parser.add_argument("--images", default="backend/dataset/dataset7/valid/images",
+                        help="imágenes de validación para calibrar ONNX")
+    parser.add_argument("--calib", type=int, default=300,
+                        help="máximo de imágenes de calibración ONNX (0 = todas)")
+    args = parser.parse_args()
+
+    weights = os.path.abspath(args.weights)
+    if args.format == "onnx":
+        out = export_onnx(weights, args.imgsz, args.int8, args.images, args.calib)
+    else:
+        out = export_openvino(weights, args.imgsz, args.int8, args.data)
+
+    backend = "onnxruntime" if args.format == "onnx" else "openvino"
+    print(f"✅ Modelo exportado en {out}")
+    print(f"   Para servirlo: INFERENCE_BACKEND={backend}" + (" INFERENCE_INT8=1" if args.int8 else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,32 @@
 #!/bin/bash
 set -e
 PORT=${PORT:-8080}
+
+# Pool de inferencia separado de los workers web (ver backend/services/inference_pool.py)
+# Se relanza si termina: sin él cada petición de imagen responde 503
+if [ "${INFERENCE_POOL:-0}" = "1" ]; then
+  echo "Starting inference pool with ${INFERENCE_POOL_WORKERS:-2} processes"
+  (
+    while true; do
+      python backend/services/inference_pool.py || true
+      echo "Inference pool exited, restarting in 2s"
+      sleep 2
+    done
+  ) &
+fi
+
+# Runner de la API de trabajos asíncronos (ver backend/services/job_queue.py)
+# (opcional: sólo con JOB_RUNNER=1; sin él la API de trabajos no avanza)
+if [ "${JOB_RUNNER:-0}" = "1" ]; then
+  echo "Starting job runner with ${JOB_WORKERS:-2} threads"
+  (
+    while true; do
+      python backend/services/job_queue.py || true
+      echo "Job runner exited, restarting in 2s"
+      sleep 2
+    done
+  ) &
+fi
+
 echo "Starting EasyBraille backend on port $PORT"
 exec gunicorn --bind 0.0.0.0:${PORT} --workers 2 --worker-class sync backend.app:app